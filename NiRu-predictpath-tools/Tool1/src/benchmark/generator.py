@@ -0,0 +1,358 @@
+import json
+import logging
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+import numpy as np
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 250_000  # Rows generated and written per step; bounds memory at any scale
+
+# Weighted categorical fields, roughly following the public LANL auth.txt mix
+LANL_AUTH_TYPES = (["Kerberos", "NTLM", "Negotiate", "MICROSOFT_AUTHENTICATION_PACKAGE_V1_0", "?"],
+                   [0.55, 0.17, 0.13, 0.05, 0.10])
+LANL_LOGON_TYPES = (["Network", "Service", "Batch", "Interactive", "Unlock", "RemoteInteractive", "?"],
+                    [0.62, 0.16, 0.06, 0.06, 0.03, 0.02, 0.05])
+LANL_ORIENTATIONS = (["LogOn", "LogOff", "TGS", "TGT", "AuthMap"],
+                     [0.55, 0.25, 0.12, 0.06, 0.02])
+
+LANL_COLUMNS = ["time", "source_user", "dest_user", "source_computer", "dest_computer",
+                "auth_type", "logon_type", "auth_orientation", "success_failure"]
+
+# Subset of the CIC-IDS2017 GeneratedLabelledFlows header
+CIC_COLUMNS = ["Flow ID", "Source IP", "Source Port", "Destination IP", "Destination Port", "Protocol",
+               "Timestamp", "Flow Duration", "Total Fwd Packets", "Total Backward Packets",
+               "Total Length of Fwd Packets", "Total Length of Bwd Packets", "Label"]
+CIC_SERVICE_PORTS = ([443, 80, 53, 22, 445, 3389, 8080, 123, 21, 25],
+                     [0.46, 0.20, 0.14, 0.04, 0.05, 0.03, 0.03, 0.02, 0.01, 0.02])
+
+
+class ZipfSampler:
+    """
+    Draws entity indices with a truncated Zipf(s) popularity over `n` entities.
+    Popularity ranks are shuffled once so the busiest entity isn't always #1.
+    """
+
+    def __init__(self, n: int, s: float, rng: np.random.Generator):
+        weights = 1.0 / np.arange(1, n + 1) ** s
+        self.cdf = np.cumsum(weights / weights.sum())
+        self.cdf[-1] = 1.0
+        self.ids = rng.permutation(n)
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return self.ids[np.searchsorted(self.cdf, rng.random(size), side="right")]
+
+
+def _categorical(rng: np.random.Generator, table, size: int) -> np.ndarray:
+    values, probs = table
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=probs)]
+
+
+def _append_csv(df: pl.DataFrame, path: Path, header: bool):
+    with open(path, "ab") as f:
+        df.write_csv(f, include_header=header)
+
+
+class SyntheticLogGenerator:
+    """
+    Seeded generator for LANL-format auth logs and CIC-IDS flow CSVs.
+    Output is produced in fixed-size chunks so 1e8-row files stream to disk
+    in bounded memory, and the same (seed, rows, options) always yields the
+    same bytes. Injected attack sessions are listed in a ground-truth
+    manifest next to the data file (`<file>.attacks.json`).
+    """
+
+    def __init__(self, seed: int = 42, users: int = 10_000, hosts: int = 5_000,
+                 failure_rate: float = 0.012, attacks_per_million: float = 50.0,
+                 start_time: int = 1, events_per_second: float = 200.0):
+        self.seed = seed
+        self.users = users
+        self.hosts = hosts
+        self.failure_rate = failure_rate
+        self.attacks_per_million = attacks_per_million
+        # LANL `time` counts seconds from 1; CIC timestamps are rendered from the same clock
+        self.start_time = start_time
+        self.events_per_second = events_per_second
+
+    # --- LANL auth ---
+
+    def generate_lanl(self, path: Path, rows: int) -> Dict[str, Any]:
+        """Writes `rows` LANL auth records (no header, time-ordered) to `path`."""
+        rng = np.random.default_rng(self.seed)
+        user_dist = ZipfSampler(self.users, 1.1, rng)
+        dest_dist = ZipfSampler(self.hosts, 1.3, rng)
+        # Each user mostly authenticates from a home workstation
+        home_host = rng.integers(0, self.hosts, size=self.users)
+
+        attacks: List[Dict[str, Any]] = []
+        self._prepare(path)
+        for _, chunk_rows, t0, t1 in self._chunks(rows):
+            n_attacks = self._attack_count(rng, chunk_rows)
+            attack_frames = []
+            budget = chunk_rows
+            for _ in range(n_attacks):
+                kind = rng.choice(["brute_force", "password_spray", "lateral_movement"])
+                frame, info = self._lanl_attack(rng, kind, t0, t1, max_rows=max(1, budget // 4))
+                budget -= len(frame)
+                attack_frames.append(frame)
+                attacks.append(info)
+
+            benign = self._lanl_benign(rng, budget, t0, t1, user_dist, dest_dist, home_host)
+            chunk = pl.concat([benign] + attack_frames).sort("time", maintain_order=True)
+            _append_csv(chunk.select(LANL_COLUMNS), path, header=False)
+
+        return self._write_manifest(path, "lanl", rows, attacks)
+
+    def _lanl_benign(self, rng, n, t0, t1, user_dist, dest_dist, home_host) -> pl.DataFrame:
+        users = user_dist.sample(rng, n)
+        roaming = rng.random(n) < 0.1
+        src = np.where(roaming, dest_dist.sample(rng, n), home_host[users])
+        # ~3% machine accounts (C123$@DOM1), which dominate real LANL volume in bursts
+        machine = rng.random(n) < 0.03
+        return pl.DataFrame({
+            "time": rng.integers(t0, t1, size=n, dtype=np.int64),
+            "user_id": users,
+            "machine": machine,
+            "src_id": src,
+            "dst_id": dest_dist.sample(rng, n),
+            "auth_type": _categorical(rng, LANL_AUTH_TYPES, n),
+            "logon_type": _categorical(rng, LANL_LOGON_TYPES, n),
+            "auth_orientation": _categorical(rng, LANL_ORIENTATIONS, n),
+            "success_failure": np.where(rng.random(n) < self.failure_rate, "Fail", "Success"),
+        }).with_columns(
+            pl.when(pl.col("machine"))
+            .then(pl.format("C{}$@DOM1", pl.col("src_id")))
+            .otherwise(pl.format("U{}@DOM1", pl.col("user_id")))
+            .alias("source_user"),
+            pl.format("C{}", pl.col("src_id")).alias("source_computer"),
+            pl.format("C{}", pl.col("dst_id")).alias("dest_computer"),
+        ).with_columns(pl.col("source_user").alias("dest_user")).select(LANL_COLUMNS)
+
+    def _lanl_attack(self, rng, kind: str, t0: int, t1: int, max_rows: int):
+        user = int(rng.integers(0, self.users))
+        src = int(rng.integers(0, self.hosts))
+        start = int(rng.integers(t0, t1))
+
+        if kind == "brute_force":
+            # Burst of NTLM failures against one host, sometimes ending in a success
+            n = min(max_rows, int(rng.integers(30, 200)))
+            dst = np.full(n, int(rng.integers(0, self.hosts)))
+            users = np.full(n, user)
+            status = np.full(n, "Fail", dtype=object)
+            if rng.random() < 0.5:
+                status[-1] = "Success"
+            auth = np.full(n, "NTLM", dtype=object)
+            gap = 1
+        elif kind == "password_spray":
+            # One source, many accounts, one or two attempts each
+            n = min(max_rows, int(rng.integers(50, 300)))
+            dst = np.full(n, int(rng.integers(0, self.hosts)))
+            users = rng.integers(0, self.users, size=n)
+            status = np.where(rng.random(n) < 0.97, "Fail", "Success").astype(object)
+            auth = np.full(n, "NTLM", dtype=object)
+            gap = 2
+        else:
+            # Valid credentials hopping host to host
+            n = min(max_rows, int(rng.integers(5, 40)))
+            dst = rng.choice(self.hosts, size=n, replace=n > self.hosts)
+            users = np.full(n, user)
+            status = np.full(n, "Success", dtype=object)
+            auth = np.where(rng.random(n) < 0.7, "NTLM", "Kerberos").astype(object)
+            gap = 30
+
+        times = np.minimum(start + np.arange(n, dtype=np.int64) * gap, t1 - 1)
+        frame = pl.DataFrame({
+            "time": times,
+            "source_user": [f"U{u}@DOM1" for u in users],
+            "source_computer": np.full(n, f"C{src}", dtype=object),
+            "dest_computer": [f"C{d}" for d in dst],
+            "auth_type": auth,
+            "logon_type": np.full(n, "Network", dtype=object),
+            "auth_orientation": np.full(n, "LogOn", dtype=object),
+            "success_failure": status,
+        }).with_columns(pl.col("source_user").alias("dest_user")).select(LANL_COLUMNS)
+
+        info = {"kind": kind, "source_computer": f"C{src}", "start": int(times[0]),
+                "end": int(times[-1]), "rows": n}
+        if kind != "password_spray":
+            info["user"] = f"U{user}@DOM1"
+        return frame, info
+
+    # --- CIC-IDS flows ---
+
+    def generate_cicids(self, path: Path, rows: int) -> Dict[str, Any]:
+        """Writes `rows` CIC-IDS2017-style labelled flows (with header) to `path`."""
+        rng = np.random.default_rng(self.seed)
+        client_dist = ZipfSampler(self.hosts, 1.0, rng)
+        server_dist = ZipfSampler(max(1, self.hosts // 20), 1.4, rng)
+
+        attacks: List[Dict[str, Any]] = []
+        self._prepare(path)
+        first = True
+        for _, chunk_rows, t0, t1 in self._chunks(rows):
+            n_attacks = self._attack_count(rng, chunk_rows)
+            attack_frames = []
+            budget = chunk_rows
+            for _ in range(n_attacks):
+                kind = rng.choice(["PortScan", "DDoS", "SSH-Patator"])
+                frame, info = self._cic_attack(rng, kind, t0, t1, max_rows=max(1, budget // 4))
+                budget -= len(frame)
+                attack_frames.append(frame)
+                attacks.append(info)
+
+            benign = self._cic_benign(rng, budget, t0, t1, client_dist, server_dist)
+            chunk = pl.concat([benign] + attack_frames).sort("epoch", maintain_order=True)
+            _append_csv(self._render_cic(chunk), path, header=first)
+            first = False
+
+        return self._write_manifest(path, "cicids", rows, attacks)
+
+    def _cic_benign(self, rng, n, t0, t1, client_dist, server_dist) -> pl.DataFrame:
+        ports, probs = CIC_SERVICE_PORTS
+        fwd = rng.geometric(0.15, size=n)
+        return pl.DataFrame({
+            "epoch": rng.integers(t0, t1, size=n, dtype=np.int64),
+            "src": client_dist.sample(rng, n),
+            "dst": server_dist.sample(rng, n) + self.hosts,  # Servers live in their own range
+            "src_port": rng.integers(32768, 61000, size=n),
+            "dst_port": np.asarray(ports)[rng.choice(len(ports), size=n, p=probs)],
+            "protocol": np.where(rng.random(n) < 0.85, 6, 17),
+            "duration": rng.lognormal(10.0, 2.5, size=n).astype(np.int64),
+            "fwd": fwd,
+            "bwd": rng.binomial(fwd, 0.8),
+            "label": np.full(n, "BENIGN", dtype=object),
+        })
+
+    def _cic_attack(self, rng, kind: str, t0: int, t1: int, max_rows: int):
+        target = int(rng.integers(0, max(1, self.hosts // 20))) + self.hosts
+        start = int(rng.integers(t0, t1))
+
+        if kind == "PortScan":
+            n = min(max_rows, int(rng.integers(200, 1000)))
+            src = np.full(n, int(rng.integers(0, self.hosts)))
+            dst_port = np.sort(rng.choice(65535, size=n, replace=False)) + 1
+            duration = rng.integers(20, 200, size=n)
+            fwd = np.ones(n, dtype=np.int64)
+            per_second = 100
+        elif kind == "DDoS":
+            n = min(max_rows, int(rng.integers(500, 3000)))
+            src = rng.integers(0, self.hosts, size=n)
+            dst_port = np.full(n, 80)
+            duration = rng.integers(1_000, 100_000, size=n)
+            fwd = rng.integers(3, 12, size=n)
+            per_second = 200
+        else:
+            n = min(max_rows, int(rng.integers(50, 400)))
+            src = np.full(n, int(rng.integers(0, self.hosts)))
+            dst_port = np.full(n, 22)
+            duration = rng.integers(500_000, 5_000_000, size=n)
+            fwd = rng.integers(10, 30, size=n)
+            per_second = 2
+
+        epoch = np.minimum(start + np.arange(n, dtype=np.int64) // per_second, t1 - 1)
+        frame = pl.DataFrame({
+            "epoch": epoch,
+            "src": src,
+            "dst": np.full(n, target),
+            "src_port": rng.integers(32768, 61000, size=n),
+            "dst_port": dst_port,
+            "protocol": np.full(n, 6),
+            "duration": duration.astype(np.int64),
+            "fwd": fwd.astype(np.int64),
+            "bwd": (fwd // 2).astype(np.int64),
+            "label": np.full(n, kind, dtype=object),
+        })
+        info = {"kind": kind, "destination_ip": self._ip(target), "start": int(epoch[0]),
+                "end": int(epoch[-1]), "rows": n}
+        return frame, info
+
+    def _render_cic(self, df: pl.DataFrame) -> pl.DataFrame:
+        def ip(col: str) -> pl.Expr:
+            c = pl.col(col)
+            return pl.format("10.{}.{}.{}", (c // 65536) % 256, (c // 256) % 256, c % 256 + 1)
+
+        return df.select(
+            pl.format("{}-{}-{}-{}-{}", ip("dst"), ip("src"), pl.col("dst_port"), pl.col("src_port"), pl.col("protocol")).alias("Flow ID"),
+            ip("src").alias("Source IP"),
+            pl.col("src_port").alias("Source Port"),
+            ip("dst").alias("Destination IP"),
+            pl.col("dst_port").alias("Destination Port"),
+            pl.col("protocol").alias("Protocol"),
+            # CIC-IDS2017 renders month-first local times without zero padding
+            pl.from_epoch("epoch", time_unit="s").dt.strftime("%-m/%-d/%Y %-H:%M:%S").alias("Timestamp"),
+            pl.col("duration").alias("Flow Duration"),
+            pl.col("fwd").alias("Total Fwd Packets"),
+            pl.col("bwd").alias("Total Backward Packets"),
+            (pl.col("fwd") * 74).alias("Total Length of Fwd Packets"),
+            (pl.col("bwd") * 512).alias("Total Length of Bwd Packets"),
+            pl.col("label").alias("Label"),
+        )
+
+    def _ip(self, host_id: int) -> str:
+        return f"10.{(host_id // 65536) % 256}.{(host_id // 256) % 256}.{host_id % 256 + 1}"
+
+    # --- Shared ---
+
+    def _chunks(self, rows: int):
+        """Yields (offset, rows, t0, t1) with a contiguous time range per chunk."""
+        span = max(1, int(CHUNK_ROWS / self.events_per_second))
+        offset = 0
+        index = 0
+        while offset < rows:
+            n = min(CHUNK_ROWS, rows - offset)
+            t0 = self.start_time + index * span
+            yield offset, n, t0, t0 + span
+            offset += n
+            index += 1
+
+    def _attack_count(self, rng, chunk_rows: int) -> int:
+        expected = self.attacks_per_million * chunk_rows / 1_000_000
+        # Small chunks would otherwise never see an attack
+        return min(int(rng.poisson(expected)) or int(expected > 0), max(0, chunk_rows // 100))
+
+    def _prepare(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+
+    def _write_manifest(self, path: Path, fmt: str, rows: int, attacks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        manifest = {
+            "format": fmt,
+            "rows": rows,
+            "seed": self.seed,
+            "users": self.users,
+            "hosts": self.hosts,
+            "failure_rate": self.failure_rate,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "attacks": attacks,
+        }
+        with open(manifest_path(path), "w") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Generated {rows} {fmt} rows with {len(attacks)} attack sessions at {path}")
+        return manifest
+
+
+def manifest_path(path: Path) -> Path:
+    return path.with_name(path.name + ".attacks.json")
+
+
+def parse_scale(value: str) -> int:
+    """Accepts '100000', '1e5' or '100k'/'10m' style row counts."""
+    text = str(value).strip().lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    if multiplier > 1:
+        text = text[:-1]
+    rows = int(float(text) * multiplier)
+    if rows <= 0:
+        raise ValueError(f"Row count must be positive: {value}")
+    return rows
+
+
+def generate(fmt: str, path: Path, rows: int, generator: Optional[SyntheticLogGenerator] = None) -> Dict[str, Any]:
+    generator = generator or SyntheticLogGenerator()
+    if fmt == "lanl":
+        return generator.generate_lanl(path, rows)
+    if fmt == "cicids":
+        return generator.generate_cicids(path, rows)
+    raise ValueError(f"Unknown format: {fmt}. Supported: lanl, cicids")
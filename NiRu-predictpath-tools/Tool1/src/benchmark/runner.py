@@ -0,0 +1,207 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import tempfile
+import subprocess
+import multiprocessing
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from .generator import SyntheticLogGenerator, generate
+from .startup import measure_startup
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DATASET_DIR = settings.DATA_DIR / "benchmarks" / "datasets"
+RESULTS_PATH = settings.DATA_DIR / "benchmarks" / "results.json"
+
+# Dataset format -> ingestor type
+FORMATS = {"lanl": "lanl", "cicids": "cicids"}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=settings.BASE_DIR, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _run_case(dataset: str, fmt: str, work_dir: str) -> Dict[str, Any]:
+    """
+    One benchmark case, executed in a fresh process so peak RSS and the
+    Enricher model load belong to this case alone.
+    """
+    from ..ingestion.registry import get_ingestor
+    from ..processing.pipeline import Pipeline
+    from ..processing.metrics import PipelineMetrics, peak_rss_bytes
+
+    path = Path(dataset)
+    work = Path(work_dir)
+
+    # Parse-only pass: raw ingestor throughput with nothing downstream
+    ingestor = get_ingestor(FORMATS[fmt], path)
+    started = time.perf_counter()
+    parsed = sum(len(batch) for batch in ingestor.iter_batches())
+    parse_seconds = time.perf_counter() - started
+
+    # End-to-end pass through the real Pipeline, with the same per-stage timers as `ingest`
+    load_started = time.perf_counter()
+    pipeline = Pipeline(get_ingestor(FORMATS[fmt], path))
+    model_load_seconds = time.perf_counter() - load_started
+
+    pipeline.metrics = PipelineMetrics()
+    pipeline.writer.metrics = pipeline.metrics
+    pipeline.writer.output_dir = work / "output"
+    pipeline.writer.dlq_dir = work / "dlq"
+    pipeline.summary_path = None
+    pipeline.refresh_catalog = False
+    # The token bucket would otherwise cap throughput at MAX_INGEST_RATE
+    pipeline.rate_limit = pipeline.tokens = 10 ** 12
+
+    summary = pipeline.run()
+    metrics = summary["metrics"]
+    output_bytes = sum(p.stat().st_size for p in (work / "output").rglob("*.parquet"))
+
+    return {
+        "events": summary["total_events"],
+        "success": summary["success"],
+        "failed": summary["failed"],
+        "wall_seconds": metrics["wall_seconds"],
+        "cpu_seconds": metrics["cpu_seconds"],
+        "events_per_second": metrics["events_per_second"],
+        "parse_only_events_per_second": round(parsed / parse_seconds, 1) if parse_seconds > 0 else 0.0,
+        "model_load_seconds": round(model_load_seconds, 3),
+        "enricher_model_loaded": pipeline.enricher._mitre_model is not None,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "output_bytes": output_bytes,
+        "stages": metrics["stages"],
+        "batch_sizes": metrics["batch_sizes"],
+    }
+
+
+class BenchmarkRunner:
+    """
+    Generates (or reuses) seeded datasets at the requested scales and runs the
+    Tool1 pipeline over each one, recording throughput, per-stage timings and
+    peak RSS. Every run is appended to a JSON history so a later run can be
+    compared against the previous one on the same machine.
+    """
+
+    def __init__(self, seed: int = 42, dataset_dir: Path = DATASET_DIR, results_path: Path = RESULTS_PATH):
+        self.seed = seed
+        self.dataset_dir = dataset_dir
+        self.results_path = results_path
+        self.generator = SyntheticLogGenerator(seed=seed)
+
+    def dataset(self, fmt: str, rows: int) -> Path:
+        """Returns a cached dataset, generating it on first use."""
+        path = self.dataset_dir / f"{fmt}_{rows}_seed{self.seed}.csv"
+        if not path.exists():
+            logger.info(f"Generating {rows} {fmt} rows (seed {self.seed})...")
+            tmp = path.with_name(path.name + ".partial")
+            generate(fmt, tmp, rows, self.generator)
+            os.replace(tmp, path)
+            os.replace(tmp.with_name(tmp.name + ".attacks.json"), path.with_name(path.name + ".attacks.json"))
+        return path
+
+    def run(self, formats: List[str], scales: List[int]) -> Dict[str, Any]:
+        cases = []
+        # Spawned (not forked) so each case starts with a clean heap and RSS high-water mark
+        ctx = multiprocessing.get_context("spawn")
+
+        for fmt in formats:
+            if fmt not in FORMATS:
+                raise ValueError(f"Unknown format: {fmt}. Supported: {', '.join(FORMATS)}")
+            for rows in scales:
+                dataset = self.dataset(fmt, rows)
+                work_dir = tempfile.mkdtemp(prefix="predictpath_bench_")
+                try:
+                    with ctx.Pool(1) as pool:
+                        result = pool.apply(_run_case, (str(dataset), fmt, work_dir))
+                finally:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+
+                result = {"case": f"{fmt}/{rows}", "format": fmt, "rows": rows,
+                          "input_bytes": dataset.stat().st_size, **result}
+                logger.info(f"{result['case']}: {result['events_per_second']} events/s, "
+                            f"peak RSS {result['peak_rss_bytes']}")
+                cases.append(result)
+
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "seed": self.seed,
+            "host": {
+                "platform": platform.platform(),
+                "python": sys.version.split()[0],
+                "cpu_count": os.cpu_count(),
+            },
+            "startup": measure_startup(),
+            "cases": cases,
+        }
+
+    # --- History ---
+
+    def load_history(self) -> List[Dict[str, Any]]:
+        if not self.results_path.exists():
+            return []
+        with open(self.results_path) as f:
+            return json.load(f)
+
+    def save(self, run: Dict[str, Any]):
+        history = self.load_history()
+        history.append(run)
+        self.results_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.results_path.with_name(self.results_path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(history, f, indent=2)
+        os.replace(tmp, self.results_path)
+
+
+def find_regressions(run: Dict[str, Any], history: List[Dict[str, Any]], tolerance: float = 0.15) -> List[str]:
+    """
+    Compares each case with the most recent earlier run of the same case.
+    Flags throughput drops and peak RSS growth beyond `tolerance` (a fraction),
+    plus CLI startup over its absolute budget.
+    """
+    previous: Dict[str, Dict[str, Any]] = {}
+    for past in history:
+        for case in past.get("cases", []):
+            previous[case["case"]] = case
+
+    problems = []
+    startup = run.get("startup")
+    if startup:
+        for name, seconds in startup["seconds"].items():
+            if seconds > startup["budget_seconds"]:
+                problems.append(f"startup/{name}: {seconds}s exceeds budget {startup['budget_seconds']}s")
+        if startup["heavy_modules"]:
+            problems.append(f"startup: `import src.main` loads {', '.join(startup['heavy_modules'])}")
+
+    for case in run["cases"]:
+        base = previous.get(case["case"])
+        if not base:
+            continue
+
+        if base["events_per_second"] and case["events_per_second"] < base["events_per_second"] * (1 - tolerance):
+            drop = 1 - case["events_per_second"] / base["events_per_second"]
+            problems.append(
+                f"{case['case']}: throughput {case['events_per_second']} events/s is {drop:.0%} below "
+                f"baseline {base['events_per_second']}"
+            )
+
+        if base.get("peak_rss_bytes") and case.get("peak_rss_bytes") \
+                and case["peak_rss_bytes"] > base["peak_rss_bytes"] * (1 + tolerance):
+            growth = case["peak_rss_bytes"] / base["peak_rss_bytes"] - 1
+            problems.append(
+                f"{case['case']}: peak RSS {case['peak_rss_bytes']} bytes is {growth:.0%} above "
+                f"baseline {base['peak_rss_bytes']}"
+            )
+    return problems
@@ -12,23 +12,33 @@ class Settings(BaseSettings):
     DEAD_LETTER_QUEUE_DIR: Path = DATA_DIR / "dlq"
     OUTPUT_DIR: Path = DATA_DIR / "output"
     MODEL_DIR: Path = DATA_DIR / "models"
+    CATALOG_PATH: Path = DATA_DIR / "catalog.duckdb"
     
     # Validation settings
     STRICT_VALIDATION: bool = True
     MAX_INGEST_RATE: int = 1000  # Events per second (Token bucket)
+    MAX_INGEST_WORKERS: int = 4  # Default cap on file workers; each loads its own MiniLM model (several hundred MB of RSS)
+
+    # Instrumentation
+    PIPELINE_METRICS: bool = True  # Per-stage timers in ingestion_summary.json
+
+    # Query catalog
+    CATALOG_AUTO_REFRESH: bool = True  # Fold new Parquet into rollups after each ingest
 
     class Config:
         env_file = ".env"
 
-settings = Settings()
+    def ensure_dirs(self):
+        """Creates the data directories. Called by entry points, never at import time."""
+        for path in (self.DATA_DIR, self.DEAD_LETTER_QUEUE_DIR, self.OUTPUT_DIR, self.MODEL_DIR):
+            path.mkdir(parents=True, exist_ok=True)
 
-# Ensure directories exist
-settings.DATA_DIR.mkdir(parents=True, exist_ok=True)
-settings.DEAD_LETTER_QUEUE_DIR.mkdir(parents=True, exist_ok=True)
-settings.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-settings.MODEL_DIR.mkdir(parents=True, exist_ok=True)
+settings = Settings()
 
 def setup_logging():
+    """Configures root logging once. Entry points call this explicitly."""
+    if logging.getLogger().handlers:
+        return
     logging.basicConfig(
         level=settings.LOG_LEVEL,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -39,5 +49,4 @@ def setup_logging():
     )
     logging.info(f"Logging initialized at level {settings.LOG_LEVEL}")
 
-setup_logging()
 logger = logging.getLogger("predictpath.tool1")
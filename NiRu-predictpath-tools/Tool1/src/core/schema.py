@@ -7,6 +7,16 @@ import uuid
 from enum import Enum
 from .exceptions import SchemaValidationError
 
+def compute_event_hash(fields: dict) -> str:
+    """
+    SHA256 over the canonical JSON of an event's fields (minus `event_hash`).
+    Shared by the model and the batch pipeline so both produce identical chains.
+    """
+    model_dict = {k: v for k, v in fields.items() if k != 'event_hash'}
+    # Sort keys for deterministic hashing; datetimes serialize via str()
+    canonical_str = json.dumps(model_dict, sort_keys=True, default=str)
+    return hashlib.sha256(canonical_str.encode('utf-8')).hexdigest()
+
 class RejectionReason(str, Enum):
     SCHEMA_VIOLATION = "SchemaViolation"
     PARSING_ERROR = "ParsingError"
@@ -106,10 +116,7 @@ class CanonicalEvent(BaseModel):
         if previous_hash:
             model_dict['previous_event_hash'] = previous_hash
             
-        # Sort keys for deterministic hashing
-        # Handle datetime serialization for consistency
-        canonical_str = json.dumps(model_dict, sort_keys=True, default=str)
-        computed_event_hash = hashlib.sha256(canonical_str.encode('utf-8')).hexdigest()
+        computed_event_hash = compute_event_hash(model_dict)
         
         # Return a new object with updated hashes (bypassing validation for the update)
         return self.model_copy(update={
@@ -126,9 +133,7 @@ class CanonicalEvent(BaseModel):
              raise SchemaValidationError(f"Integrity Mismatch! Raw hash {self.raw_hash} != {computed_raw}")
         
         # Check event hash
-        model_dict = self.model_dump(exclude={'event_hash'})
-        canonical_str = json.dumps(model_dict, sort_keys=True, default=str)
-        computed_event = hashlib.sha256(canonical_str.encode('utf-8')).hexdigest()
+        computed_event = compute_event_hash(self.model_dump())
         
         if computed_event != self.event_hash:
             raise SchemaValidationError(f"Integrity Mismatch! Event hash {self.event_hash} != {computed_event}")
@@ -1,4 +1,4 @@
-from typing import Generator, Dict, Any, Optional
+from typing import Generator, Dict, Any, Optional, Iterator
 from datetime import datetime, timezone
 import polars as pl
 from .base import BaseIngestor
@@ -17,6 +17,10 @@ class LanlAuthIngestor(BaseIngestor):
         self.parser_version = "lanl_auth_v1.0"
 
     def ingest(self) -> Generator[Dict[str, Any], None, None]:
+        for batch in self.iter_batches():
+            yield from batch.iter_rows(named=True)
+
+    def iter_batches(self) -> Iterator[pl.DataFrame]:
         try:
             # LANL data is CSV-like. We can use Polars for lazy reading if the file is huge,
             # but for line-by-line processing in the engine, standard file reading is often safer for custom parsing.
@@ -36,8 +40,7 @@ class LanlAuthIngestor(BaseIngestor):
             )
 
             # We process in chunks to be memory efficient
-            for batch in q.collect(streaming=True).iter_rows(named=True):
-                yield batch
+            yield from q.collect(streaming=True).iter_slices(self.batch_size)
 
         except Exception as e:
             logger.error(f"Error reading LANL file {self.file_path}: {e}")
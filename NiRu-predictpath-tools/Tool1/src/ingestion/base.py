@@ -19,6 +19,7 @@ class BaseIngestor(ABC):
         if not self.file_path.exists():
             raise IngestionError(f"File not found: {self.file_path}")
         self.parser_version = "1.0.0" # Default, override in subclasses
+        self.batch_size = 10000 # Rows per columnar chunk handed to the pipeline
 
     @abstractmethod
     def ingest(self) -> Generator[Dict[str, Any], None, None]:
@@ -28,6 +29,20 @@ class BaseIngestor(ABC):
         """
         pass
 
+    def iter_batches(self) -> Iterator[pl.DataFrame]:
+        """
+        Yields columnar chunks of at most `batch_size` raw records.
+        Default implementation buffers `ingest()`; columnar sources should override it.
+        """
+        buffer = []
+        for record in self.ingest():
+            buffer.append(record)
+            if len(buffer) >= self.batch_size:
+                yield pl.DataFrame(buffer, infer_schema_length=None)
+                buffer = []
+        if buffer:
+            yield pl.DataFrame(buffer, infer_schema_length=None)
+
     def estimate_count(self) -> int:
         """Optional: Estimate number of records for progress bars."""
         return 0
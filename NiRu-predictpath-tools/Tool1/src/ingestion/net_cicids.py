@@ -1,4 +1,4 @@
-from typing import Generator, Dict, Any
+from typing import Generator, Dict, Any, Iterator
 from .base import BaseIngestor
 import polars as pl
 import logging
@@ -15,14 +15,17 @@ class CicIdsIngestor(BaseIngestor):
         self.parser_version = "cic_ids_v1.0"
 
     def ingest(self) -> Generator[Dict[str, Any], None, None]:
+        for batch in self.iter_batches():
+            yield from batch.iter_rows(named=True)
+
+    def iter_batches(self) -> Iterator[pl.DataFrame]:
         try:
              # CIC-IDS usually has headers.
             q = pl.scan_csv(self.file_path, ignore_errors=True)
             
             # Normalize column names to lowercase to avoid issues
             # We will grab specific columns we care about in the normalizer
-            for batch in q.collect(streaming=True).iter_rows(named=True):
-                yield batch
+            yield from q.collect(streaming=True).iter_slices(self.batch_size)
 
         except Exception as e:
             logger.error(f"Error reading CIC-IDS file {self.file_path}: {e}")
@@ -0,0 +1,28 @@
+import importlib
+from typing import Dict, TYPE_CHECKING
+from pathlib import Path
+from ..core.exceptions import IngestionError
+
+if TYPE_CHECKING:
+    from .base import BaseIngestor
+
+# --type value -> "module:Class". Resolved on use so the CLI can list types
+# without importing Polars and every parser.
+INGESTORS: Dict[str, str] = {
+    "lanl": ".auth_lanl:LanlAuthIngestor",
+    "cicids": ".net_cicids:CicIdsIngestor",
+    "json": ".winlog_jsonl:JsonLinesIngestor",
+    "jsonl": ".winlog_jsonl:JsonLinesIngestor",
+    "ndjson": ".winlog_jsonl:JsonLinesIngestor",
+    "xml": ".winlog_xml:WindowsXmlIngestor",
+    "evtx": ".winlog_xml:WindowsXmlIngestor",
+}
+
+
+def get_ingestor(log_type: str, path: Path) -> "BaseIngestor":
+    target = INGESTORS.get(log_type.lower())
+    if target is None:
+        raise IngestionError(f"Unknown type: {log_type}. Supported: {', '.join(INGESTORS)}")
+    module_name, class_name = target.split(":")
+    ingestor_cls = getattr(importlib.import_module(module_name, __package__), class_name)
+    return ingestor_cls(path)
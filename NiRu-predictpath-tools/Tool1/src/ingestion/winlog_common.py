@@ -0,0 +1,102 @@
+from typing import Dict, Any, Optional, List
+import polars as pl
+
+# Shared field mapping for Windows event sources (Winlogbeat JSON, Sysmon, event XML).
+# Every Windows ingestor flattens records onto the same raw layout the pipeline
+# already understands for LANL (time, source_user, source_host, dest_host, ...).
+
+# Raw column layout emitted per chunk. `_raw` carries the original record for audit.
+RAW_COLUMNS: List[str] = [
+    "event_code", "source_user", "dest_user", "source_host", "dest_host",
+    "auth_type", "logon_type", "success_failure", "dest_port",
+    "timestamp_text", "_raw"
+]
+
+# Every raw column is text; typing it up front keeps chunks whose values are
+# all missing (e.g. only malformed lines) from being inferred as Null dtype
+RAW_SCHEMA: Dict[str, pl.DataType] = {c: pl.String for c in RAW_COLUMNS}
+
+# Security log event IDs with a clear auth outcome
+SUCCESS_EVENT_IDS = {"4624", "4648", "4768", "4769", "4776"}
+FAILURE_EVENT_IDS = {"4625", "4771"}
+
+# Field aliases, first non-empty wins
+USER_FIELDS = ("TargetUserName", "SubjectUserName", "User", "user")
+DOMAIN_FIELDS = ("TargetDomainName", "SubjectDomainName")
+SOURCE_HOST_FIELDS = ("WorkstationName", "SourceHostname", "IpAddress", "SourceIp", "source_host")
+DEST_HOST_FIELDS = ("DestinationHostname", "DestinationIp")
+AUTH_FIELDS = ("AuthenticationPackageName", "LogonProcessName", "Protocol")
+PORT_FIELDS = ("DestinationPort", "IpPort")
+TIME_FIELDS = ("UtcTime",)
+
+# Placeholders Windows uses for "no value"
+_EMPTY = {"", "-", "::1", "127.0.0.1", "null"}
+
+
+def _first(data: Dict[str, Any], fields) -> Optional[str]:
+    for field in fields:
+        val = data.get(field)
+        if val is not None:
+            val = str(val).strip()
+            if val not in _EMPTY:
+                return val
+    return None
+
+
+def map_windows_event(event_id: Any, computer: Optional[str], timestamp: Optional[str],
+                      event_data: Dict[str, Any], raw: str) -> tuple:
+    """
+    Maps one Windows event (System header + EventData) onto RAW_COLUMNS order.
+    Returns a plain tuple so chunks can be built column-wise without dict overhead.
+    """
+    code = str(event_id) if event_id is not None else None
+
+    user = _first(event_data, USER_FIELDS)
+    domain = _first(event_data, DOMAIN_FIELDS)
+    if user and domain and "@" not in user and "\\" not in user:
+        user = f"{user}@{domain}"
+
+    status = None
+    if code in SUCCESS_EVENT_IDS:
+        status = "Success"
+    elif code in FAILURE_EVENT_IDS:
+        status = "Fail"
+
+    # For logon events the recording machine is the target
+    dest_host = _first(event_data, DEST_HOST_FIELDS) or computer
+    port = _first(event_data, PORT_FIELDS)
+
+    return (
+        code,
+        user,
+        user,
+        _first(event_data, SOURCE_HOST_FIELDS),
+        dest_host,
+        _first(event_data, AUTH_FIELDS),
+        _first(event_data, ("LogonType",)),
+        status,
+        port if port and port.isdigit() else None,
+        _first(event_data, TIME_FIELDS) or timestamp,
+        raw,
+    )
+
+
+def build_chunk(rows: List[tuple]) -> pl.DataFrame:
+    """
+    Turns mapped rows into a columnar chunk and parses timestamps vectorized.
+    Rows whose timestamp doesn't match the common Windows formats keep
+    `time` null and fall back to per-row parsing via `timestamp_text`.
+    """
+    df = pl.DataFrame(rows, schema=RAW_SCHEMA, orient="row")
+    text = (
+        pl.col("timestamp_text")
+        .str.replace(r"Z$", "")
+        .str.replace("T", " ")
+        .str.replace(r"(\.\d{6})\d+", "${1}")  # SystemTime carries 7 fractional digits
+    )
+    return df.with_columns(
+        text.str.to_datetime("%Y-%m-%d %H:%M:%S%.f", strict=False)
+        .dt.replace_time_zone("UTC")
+        .alias("time"),
+        pl.col("dest_port").cast(pl.Int64, strict=False),
+    )
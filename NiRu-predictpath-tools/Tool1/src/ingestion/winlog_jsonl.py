@@ -0,0 +1,85 @@
+from typing import Generator, Dict, Any, Iterator
+import json
+import polars as pl
+from .base import BaseIngestor
+from .winlog_common import map_windows_event, build_chunk
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _lookup(record: Dict[str, Any], dotted: str) -> Any:
+    node = record
+    for part in dotted.split("."):
+        if not isinstance(node, dict):
+            return None
+        node = node.get(part)
+    return node
+
+
+class JsonLinesIngestor(BaseIngestor):
+    """
+    Ingestor for newline-delimited JSON Windows events (Winlogbeat / Sysmon exports).
+    Reads line by line so memory stays bounded by `batch_size`, and emits
+    columnar chunks shaped like the LANL raw layout.
+    Handles both Winlogbeat documents (winlog.event_data.*) and flat exports.
+    """
+
+    def __init__(self, file_path):
+        super().__init__(file_path)
+        self.parser_version = "winlog_jsonl_v1.0"
+
+    def _map_line(self, line: str) -> tuple:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # Keep the raw line so the pipeline routes it to the DLQ
+            return map_windows_event(None, None, None, {}, line)
+
+        if not isinstance(record, dict):
+            return map_windows_event(None, None, None, {}, line)
+
+        event_data = (
+            _lookup(record, "winlog.event_data")
+            or record.get("event_data")
+            or record.get("EventData")
+            or record  # Flat export: fields at top level
+        )
+        event_id = (
+            _lookup(record, "winlog.event_id")
+            or _lookup(record, "event.code")
+            or record.get("EventID")
+            or record.get("Id")
+        )
+        computer = (
+            _lookup(record, "winlog.computer_name")
+            or _lookup(record, "host.name")
+            or record.get("Computer")
+            or record.get("MachineName")
+        )
+        timestamp = record.get("@timestamp") or record.get("TimeCreated") or record.get("timestamp")
+
+        return map_windows_event(event_id, computer, timestamp, event_data, line)
+
+    def iter_batches(self) -> Iterator[pl.DataFrame]:
+        try:
+            rows = []
+            with open(self.file_path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    rows.append(self._map_line(line))
+                    if len(rows) >= self.batch_size:
+                        yield build_chunk(rows)
+                        rows = []
+            if rows:
+                yield build_chunk(rows)
+
+        except Exception as e:
+            logger.error(f"Error reading JSON-lines file {self.file_path}: {e}")
+            raise e
+
+    def ingest(self) -> Generator[Dict[str, Any], None, None]:
+        for batch in self.iter_batches():
+            yield from batch.iter_rows(named=True)
@@ -0,0 +1,162 @@
+from typing import Generator, Dict, Any, Iterator, Iterable, Optional
+import re
+import xml.etree.ElementTree as ET
+import polars as pl
+from .base import BaseIngestor
+from .winlog_common import map_windows_event, build_chunk
+from ..core.exceptions import IngestionError
+import logging
+
+logger = logging.getLogger(__name__)
+
+EVTX_MAGIC = b"ElfFile\x00"
+READ_SIZE = 1 << 20  # 1 MiB per parser feed
+_XML_DECL = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+# Serialize the Windows event schema as the default namespace, as exports write it
+# (ElementTree would otherwise invent an ns0: prefix for the audit copy)
+EVENT_NS = "http://schemas.microsoft.com/win/2004/08/events/event"
+ET.register_namespace("", EVENT_NS)
+
+
+def _local(tag: str) -> str:
+    """Strips the '{namespace}' prefix ElementTree puts on tags."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _is_event_tag(tag: str) -> bool:
+    return tag == "Event" or tag.endswith("}Event")
+
+
+class _EventCollector:
+    """
+    XMLParser target that only builds a tree for the current <Event> and hands
+    it off when it closes, so nothing accumulates under the document root.
+    """
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+        self._builder: Optional[ET.TreeBuilder] = None
+
+    def start(self, tag, attrib):
+        if self._builder is None and _is_event_tag(tag):
+            self._builder = ET.TreeBuilder()
+        if self._builder is not None:
+            self._builder.start(tag, attrib)
+
+    def end(self, tag):
+        if self._builder is not None:
+            self._builder.end(tag)
+            if _is_event_tag(tag):
+                self.on_event(self._builder.close())
+                self._builder = None
+
+    def data(self, data):
+        if self._builder is not None:
+            self._builder.data(data)
+
+    def close(self):
+        return None
+
+
+class WindowsXmlIngestor(BaseIngestor):
+    """
+    Ingestor for Windows Event Log XML (wevtutil / Get-WinEvent / Event Viewer exports).
+    Parses incrementally and builds one <Event> tree at a time,
+    so memory is bounded by `batch_size` rather than file size.
+    Binary .evtx files are read through the optional `python-evtx` package.
+    """
+
+    def __init__(self, file_path):
+        super().__init__(file_path)
+        self.parser_version = "winlog_xml_v1.0"
+
+    def _is_binary_evtx(self) -> bool:
+        with open(self.file_path, "rb") as f:
+            return f.read(len(EVTX_MAGIC)) == EVTX_MAGIC
+
+    def _xml_chunks(self) -> Iterable[str]:
+        """Raw XML text in chunks. Binary EVTX records are converted to XML first."""
+        if self._is_binary_evtx():
+            try:
+                from Evtx.Evtx import Evtx
+            except ImportError:
+                raise IngestionError(
+                    f"{self.file_path} is a binary .evtx file. Install the 'evtx' extra "
+                    f"(python-evtx) or export it with `wevtutil qe <log> /lf:true /f:xml`."
+                )
+            with Evtx(str(self.file_path)) as log:
+                for record in log.records():
+                    yield _XML_DECL.sub("", record.xml())
+            return
+
+        with open(self.file_path, "r", encoding="utf-8-sig", errors="replace") as f:
+            first = True
+            while True:
+                chunk = f.read(READ_SIZE)
+                if not chunk:
+                    break
+                if first:
+                    # The declaration must not end up inside our synthetic root
+                    chunk = _XML_DECL.sub("", chunk)
+                    first = False
+                yield chunk
+
+    def _map_event(self, elem: ET.Element) -> tuple:
+        event_id: Optional[str] = None
+        computer: Optional[str] = None
+        timestamp: Optional[str] = None
+        event_data: Dict[str, Any] = {}
+
+        for child in elem:
+            section = _local(child.tag)
+            if section == "System":
+                for field in child:
+                    name = _local(field.tag)
+                    if name == "EventID":
+                        event_id = (field.text or "").strip()
+                    elif name == "Computer":
+                        computer = (field.text or "").strip()
+                    elif name == "TimeCreated":
+                        timestamp = field.get("SystemTime")
+            elif section in ("EventData", "UserData"):
+                for data in child.iter():
+                    key = data.get("Name") or _local(data.tag)
+                    if data.text and data.text.strip():
+                        event_data[key] = data.text.strip()
+
+        # The original record, so raw_hash covers the source event
+        return map_windows_event(event_id, computer, timestamp, event_data, ET.tostring(elem, encoding="unicode"))
+
+    def iter_batches(self) -> Iterator[pl.DataFrame]:
+        try:
+            # Exports are either <Events><Event/>...</Events> or bare concatenated
+            # <Event/> elements (wevtutil). A synthetic root makes both well-formed.
+            rows = []
+            parser = ET.XMLParser(target=_EventCollector(lambda elem: rows.append(self._map_event(elem))))
+            parser.feed("<PredictPathRoot>")
+
+            for chunk in self._xml_chunks():
+                parser.feed(chunk)
+                # Slice so chunk sizes stay exact even if one feed produced many events
+                while len(rows) >= self.batch_size:
+                    yield build_chunk(rows[:self.batch_size])
+                    del rows[:self.batch_size]
+
+            parser.feed("</PredictPathRoot>")
+            parser.close()
+
+            while rows:
+                yield build_chunk(rows[:self.batch_size])
+                del rows[:self.batch_size]
+
+        except ET.ParseError as e:
+            logger.error(f"Malformed event XML in {self.file_path}: {e}")
+            raise IngestionError(f"Malformed event XML in {self.file_path}: {e}")
+        except Exception as e:
+            logger.error(f"Error reading event XML file {self.file_path}: {e}")
+            raise e
+
+    def ingest(self) -> Generator[Dict[str, Any], None, None]:
+        for batch in self.iter_batches():
+            yield from batch.iter_rows(named=True)
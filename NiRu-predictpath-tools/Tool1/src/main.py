@@ -1,47 +1,66 @@
 import typer
 from pathlib import Path
-from typing import Optional
-from src.ingestion.auth_lanl import LanlAuthIngestor
-from src.ingestion.net_cicids import CicIdsIngestor
-from src.processing.pipeline import Pipeline
-from src.core.config import settings
+from typing import Optional, List
+from src.ingestion.registry import INGESTORS
+from src.core.config import settings, setup_logging
 import logging
 
+# Heavy dependencies (Polars, DuckDB, sentence-transformers) are imported inside
+# the commands that use them so `--help` and `query` start quickly.
 app = typer.Typer(name="predictpath-tool1", help="Unified Event Intelligence Engine")
 logger = logging.getLogger(__name__)
 
+@app.callback()
+def main():
+    """
+    Unified Event Intelligence Engine.
+    """
+    settings.ensure_dirs()
+    setup_logging()
+
 @app.command()
 def ingest(
-    source: Path = typer.Argument(..., help="Path to raw log file", exists=True),
-    type: str = typer.Option(..., "--type", "-t", help="Log type: 'lanl' or 'cicids'"),
-    rate_limit: int = typer.Option(settings.MAX_INGEST_RATE, help="Max events per second")
+    sources: List[str] = typer.Argument(..., help="Raw log files, directories or glob patterns"),
+    type: str = typer.Option(..., "--type", "-t", help="Log type: " + ", ".join(INGESTORS)),
+    rate_limit: int = typer.Option(settings.MAX_INGEST_RATE, help="Max events per second (per file)"),
+    workers: Optional[int] = typer.Option(None, "--workers", "-w", help=f"Parallel file workers (default: CPU count, at most {settings.MAX_INGEST_WORKERS}). Each worker loads its own enrichment model (torch + all-MiniLM-L6-v2, several hundred MB of RSS)"),
+    metrics_textfile: Optional[Path] = typer.Option(None, "--metrics-textfile", help="Also write stage metrics as a Prometheus textfile (.prom)")
 ):
     """
     Ingest raw security logs, normalize, enrich, and store them.
     """
-    typer.echo(f"Starting ingestion for {source} as {type}...")
+    from src.processing.scheduler import FileScheduler, resolve_sources
+
+    typer.echo(f"Starting ingestion for {', '.join(sources)} as {type}...")
     
-    # 1. Select Ingestor
+    # 1. Resolve Inputs
     try:
-        if type.lower() == 'lanl':
-            print("Initializing LANL ingestor...")
-            ingestor = LanlAuthIngestor(source)
-        elif type.lower() == 'cicids':
-            ingestor = CicIdsIngestor(source)
-        else:
-            typer.echo(f"Unknown type: {type}. Supported: lanl, cicids")
+        if type.lower() not in INGESTORS:
+            typer.echo(f"Unknown type: {type}. Supported: {', '.join(INGESTORS)}")
+            raise typer.Exit(code=1)
+
+        files = resolve_sources(sources)
+        if not files:
+            typer.echo("No input files matched.")
             raise typer.Exit(code=1)
             
-        # 2. Configure Pipeline
-        print("Initializing Pipeline...")
-        pipeline = Pipeline(ingestor)
-        pipeline.rate_limit = rate_limit
+        # 2. Configure Scheduler
+        print(f"Scheduling {len(files)} file(s)...")
+        scheduler = FileScheduler(type, workers=workers, rate_limit=rate_limit)
+        scheduler.metrics_textfile = metrics_textfile
         
         # 3. Run
         print("Running Pipeline...")
-        pipeline.run()
+        report = scheduler.run(files)
         print("Pipeline run completed.")
-        typer.echo("Ingestion complete. Check output directory for Parquet files.")
+        typer.echo(
+            f"Ingestion complete: {report['success']} events written, {report['failed']} rejected "
+            f"across {report['run']['file_count']} file(s) in {report['run']['wall_seconds']}s."
+        )
+        if report["failed_files"]:
+            typer.echo(f"{len(report['failed_files'])} file(s) failed; see ingestion_summary.json")
+    except typer.Exit:
+        raise
     except Exception as e:
         print(f"CRITICAL ERROR IN MAIN: {e}")
         typer.echo(f"Ingestion failed: {e}")
@@ -49,35 +68,174 @@ def ingest(
 
 @app.command()
 def query(
-    query: str = typer.Argument(..., help="DuckDB SQL query to run against output")
+    query: str = typer.Argument(..., help="DuckDB SQL query (or WHERE filter) to run against the `events` view"),
+    limit: Optional[int] = typer.Option(None, "--limit", "-n", help="Max rows to return"),
+    format: str = typer.Option("table", "--format", "-f", help="Output format: 'table', 'csv' or 'parquet'"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Output file for csv/parquet (default: query_result.<format>)"),
+    refresh: bool = typer.Option(False, "--refresh", help="Fold new Parquet files into the catalog before querying")
 ):
     """
-    Query the processed events using DuckDB.
+    Query the processed events using the persistent DuckDB catalog.
+    Tables: events (view), rollup_daily, rollup_user_daily, rollup_technique_daily.
     """
-    import duckdb
-    
-    output_path = settings.OUTPUT_DIR / "**/*.parquet"
-    typer.echo(f"Querying data at {output_path}...")
-    
+    from src.storage.catalog import EventCatalog
+
+    fmt = format.lower()
+    if fmt not in ("table", "csv", "parquet"):
+        typer.echo(f"Unknown format: {format}. Supported: table, csv, parquet")
+        raise typer.Exit(code=1)
+
+    typer.echo(f"Querying catalog at {settings.CATALOG_PATH}...")
+
     try:
-        # Create relation from parquet files
-        conn = duckdb.connect()
-        path_str = str(output_path).replace("\\", "/")
-        
-        # Determine if it's a full query or a filter
-        if query.strip().upper().startswith("SELECT"):
-            # Raw query, execute as is
-            arrow_table = conn.execute(query).fetch_arrow_table()
-        else:
-            # Filter shorthand
-            arrow_table = conn.execute(f"SELECT * FROM '{path_str}' WHERE {query}").fetch_arrow_table()
-            
-        import polars as pl
-        df = pl.from_arrow(arrow_table)
-        typer.echo(df)
-        
+        with EventCatalog() as catalog:
+            if refresh:
+                catalog.refresh()
+            else:
+                catalog.register_views()
+
+            if fmt == "table":
+                import polars as pl
+                arrow_table = catalog.execute(query, limit=limit).fetch_arrow_table()
+                df = pl.from_arrow(arrow_table)
+                typer.echo(df)
+            else:
+                target = output or Path(f"query_result.{fmt}")
+                catalog.export(query, target, fmt, limit=limit)
+                typer.echo(f"Results written to {target}")
+
     except Exception as e:
         typer.echo(f"Query error: {e}")
 
+@app.command()
+def catalog(
+    rebuild: bool = typer.Option(False, "--rebuild", help="Drop and recompute all rollups from disk")
+):
+    """
+    Refresh (or rebuild) the DuckDB catalog and rollups over the output directory.
+    """
+    from src.storage.catalog import EventCatalog, ROLLUPS
+
+    with EventCatalog() as cat:
+        added = cat.rebuild() if rebuild else cat.refresh()
+        typer.echo(f"Catalog up to date ({added} file(s) registered).")
+        for name in ROLLUPS:
+            rows = cat.conn.execute(f"SELECT count(*) FROM {name}").fetchone()[0]
+            typer.echo(f"  {name}: {rows} rows")
+
+@app.command()
+def verify(
+    date: Optional[List[str]] = typer.Option(None, "--date", "-d", help="Only verify these partitions (YYYY-MM-DD, repeatable)"),
+    workers: Optional[int] = typer.Option(None, "--workers", "-w", help="Parallel hashing workers (default: CPU count)"),
+    report: Optional[Path] = typer.Option(None, "--report", help="Also write the full verification report as JSON")
+):
+    """
+    Recompute raw/event hashes over the stored Parquet and check the hash-chain links.
+    """
+    import json
+    from src.storage.verifier import ChainVerifier
+
+    typer.echo(f"Verifying hash chains under {settings.OUTPUT_DIR}...")
+    result = ChainVerifier(workers=workers).run(dates=date)
+
+    if report:
+        with open(report, "w") as f:
+            json.dump(result, f, indent=2, default=str)
+
+    if not result["files"]:
+        typer.echo("No stored events found.")
+        return
+
+    typer.echo(
+        f"Checked {result['events']} events in {result['files']} file(s) "
+        f"({result['chain_heads']} chain segment(s)) in {result['wall_seconds']}s "
+        f"[{result['events_per_second']} events/s]"
+    )
+    if result["ok"]:
+        typer.echo("Integrity OK: all hashes recomputed and every link resolves.")
+        return
+
+    typer.echo(
+        f"INTEGRITY FAILURE: {result['raw_hash_mismatches']} raw hash mismatch(es), "
+        f"{result['event_hash_mismatches']} event hash mismatch(es), "
+        f"{result['dangling_links']} dangling link(s), {result['forked_links']} forked link(s)"
+    )
+    first = result["first_break"]
+    typer.echo(f"First break: {first['kind']} at {first['file']} row {first['row']} (event {first['event_id']})")
+    raise typer.Exit(code=1)
+
+@app.command()
+def generate(
+    output: Path = typer.Argument(..., help="Destination file for the synthetic logs"),
+    format: str = typer.Option("lanl", "--format", "-f", help="Dataset format: 'lanl' or 'cicids'"),
+    rows: str = typer.Option("100000", "--rows", "-r", help="Row count, e.g. 1e6 or 250k"),
+    seed: int = typer.Option(42, "--seed", help="RNG seed; identical seeds produce identical files"),
+    users: int = typer.Option(10_000, "--users", help="Distinct user accounts"),
+    hosts: int = typer.Option(5_000, "--hosts", help="Distinct hosts"),
+    failure_rate: float = typer.Option(0.012, "--failure-rate", help="Background authentication failure rate"),
+    attacks: float = typer.Option(50.0, "--attacks-per-million", help="Injected attack sessions per million rows")
+):
+    """
+    Generate seeded LANL auth or CIC-IDS flow data with injected attack sessions.
+    """
+    from src.benchmark.generator import SyntheticLogGenerator, generate as generate_dataset, parse_scale, manifest_path
+
+    try:
+        count = parse_scale(rows)
+        generator = SyntheticLogGenerator(seed=seed, users=users, hosts=hosts,
+                                          failure_rate=failure_rate, attacks_per_million=attacks)
+        manifest = generate_dataset(format.lower(), output, count, generator)
+    except ValueError as e:
+        typer.echo(f"Generation failed: {e}")
+        raise typer.Exit(code=1)
+
+    typer.echo(f"Wrote {count} rows to {output} ({len(manifest['attacks'])} attack sessions, "
+               f"ground truth in {manifest_path(output)})")
+
+@app.command()
+def benchmark(
+    scale: List[str] = typer.Option(["1e4", "1e5"], "--scale", "-s", help="Dataset sizes to run (repeatable), e.g. 1e4 1e6"),
+    format: List[str] = typer.Option(["lanl", "cicids"], "--format", "-f", help="Dataset formats to run (repeatable)"),
+    seed: int = typer.Option(42, "--seed", help="Dataset seed"),
+    results: Optional[Path] = typer.Option(None, "--results", help="JSON results history (default: data/benchmarks/results.json)"),
+    check: bool = typer.Option(False, "--check", help="Exit non-zero if a case regressed against the previous run"),
+    tolerance: float = typer.Option(0.15, "--tolerance", help="Allowed throughput drop / RSS growth for --check")
+):
+    """
+    Run the ingestion pipeline over seeded synthetic datasets and record events/sec, stage timings and RSS.
+    """
+    from src.benchmark.generator import parse_scale
+    from src.benchmark.runner import BenchmarkRunner, RESULTS_PATH, find_regressions
+
+    try:
+        scales = [parse_scale(s) for s in scale]
+        runner = BenchmarkRunner(seed=seed, results_path=results or RESULTS_PATH)
+        history = runner.load_history()
+        run = runner.run([f.lower() for f in format], scales)
+    except ValueError as e:
+        typer.echo(f"Benchmark failed: {e}")
+        raise typer.Exit(code=1)
+
+    startup = run["startup"]
+    typer.echo(f"{'startup':>20}: import {startup['seconds']['import']}s, --help {startup['seconds']['help']}s "
+               f"(budget {startup['budget_seconds']}s)")
+    for case in run["cases"]:
+        rss_mb = (case["peak_rss_bytes"] or 0) / (1 << 20)
+        typer.echo(f"{case['case']:>20}: {case['events_per_second']:>10} events/s  "
+                   f"(parse-only {case['parse_only_events_per_second']}/s, peak RSS {rss_mb:.0f} MiB)")
+        slowest = sorted(case["stages"].items(), key=lambda kv: kv[1]["wall_seconds"], reverse=True)[:3]
+        typer.echo("    " + ", ".join(f"{stage} {vals['wall_seconds']}s" for stage, vals in slowest))
+
+    runner.save(run)
+    typer.echo(f"Results appended to {runner.results_path}")
+
+    if check:
+        problems = find_regressions(run, history, tolerance)
+        for problem in problems:
+            typer.echo(f"REGRESSION {problem}")
+        if problems:
+            raise typer.Exit(code=1)
+        typer.echo("No regressions against the previous run.")
+
 if __name__ == "__main__":
     app()
@@ -1,5 +1,4 @@
 from typing import Dict, Any, Tuple, Optional
-from sentence_transformers import SentenceTransformer, util
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +13,7 @@ class Enricher:
         self._mitre_model = None
         self._mitre_embeddings = None
         self._mitre_techniques = [] 
+        self._semantic_search = None
         self.model_version = "all-MiniLM-L6-v2"
         self._load_resources()
 
@@ -21,6 +21,10 @@ class Enricher:
         """Lazy load heavy ML models"""
         logger.info(f"Loading MITRE inference model: {self.model_version}...")
         try:
+            # Imported here: sentence-transformers pulls in torch, which costs
+            # seconds of startup for commands that never enrich
+            from sentence_transformers import SentenceTransformer, util
+            self._semantic_search = util.semantic_search
             self._mitre_model = SentenceTransformer(self.model_version)
             
             # Expanded Seed Dictionary (Audit Grade)
@@ -52,7 +56,7 @@ class Enricher:
 
         # Run Semantic Search
         desc_embedding = self._mitre_model.encode(description, convert_to_tensor=True)
-        hits = util.semantic_search(desc_embedding, self._mitre_embeddings, top_k=1)
+        hits = self._semantic_search(desc_embedding, self._mitre_embeddings, top_k=1)
         
         technique_id = None
         score = 0.0
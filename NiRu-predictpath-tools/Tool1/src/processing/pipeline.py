@@ -1,7 +1,8 @@
 import time
 import uuid
+import hashlib
 import logging
-from typing import Optional
+from typing import Optional, Dict, Any, List, Tuple
 from pathlib import Path
 from datetime import datetime
 from ..ingestion.base import BaseIngestor
@@ -9,10 +10,13 @@ from ..ingestion.auth_lanl import LanlAuthIngestor
 from ..ingestion.net_cicids import CicIdsIngestor
 from ..processing.normalizer import Normalizer
 from ..processing.enricher import Enricher
+from ..processing.validator import BatchValidator, ROW_INDEX
 from ..storage.writer import StorageWriter
-from ..core.schema import CanonicalEvent, RejectionEvent, RejectionReason, EventType
+from ..processing.metrics import PipelineMetrics, NullMetrics
+from ..core.schema import RejectionEvent, RejectionReason, EventType, compute_event_hash
 from ..core.config import settings
 from ..core.exceptions import SchemaValidationError, RateLimitExceeded
+import polars as pl
 import json
 import os
 
@@ -24,11 +28,21 @@ class Pipeline:
     Includes Rate Limiting Defense and strict DLQ.
     """
 
-    def __init__(self, ingestor: BaseIngestor):
+    def __init__(self, ingestor: BaseIngestor, enricher: Optional[Enricher] = None):
         self.ingestor = ingestor
         self.normalizer = Normalizer()
-        self.enricher = Enricher()
+        # Enricher loads an ML model; schedulers pass a shared instance per worker
+        self.enricher = enricher or Enricher()
+        self.validator = BatchValidator()
         self.writer = StorageWriter()
+
+        # Per-stage timers (see processing/metrics.py); no-op when disabled
+        self.metrics = PipelineMetrics() if settings.PIPELINE_METRICS else NullMetrics()
+        self.writer.metrics = self.metrics
+
+        # Outputs (the file scheduler disables both and consolidates itself)
+        self.summary_path: Optional[Path] = Path("ingestion_summary.json")
+        self.refresh_catalog = settings.CATALOG_AUTO_REFRESH
         
         # Rate Limiting (Token Bucket)
         self.rate_limit = settings.MAX_INGEST_RATE
@@ -37,6 +51,7 @@ class Pipeline:
         
         # Tracking
         self.previous_event_hash: Optional[str] = None
+        self.chain_head: Optional[str] = None
 
     def _check_rate_limit(self):
         """
@@ -54,10 +69,18 @@ class Pipeline:
         
         self.tokens -= 1
 
-    def _map_semantic_type(self, raw_type: str, success_status: str) -> str:
+    def _map_semantic_type(self, raw_type: str, success_status: str, event_code: Optional[str] = None) -> str:
         """
         Maps raw log types to semantic EventType.
+        Windows events carry the authentication package (NTLM, Kerberos) as
+        raw type; their outcome is derived from the event ID by the ingestor.
         """
+        if event_code is not None:
+            if success_status == "Success":
+                return EventType.AuthSuccess.value
+            if success_status == "Fail":
+                return EventType.AuthFailure.value
+
         raw_lower = raw_type.lower()
         status_lower = str(success_status).lower()
         
@@ -70,101 +93,195 @@ class Pipeline:
         
         return EventType.Unknown.value
 
-    def run(self):
+    def _refresh_catalog(self):
+        """
+        Folds freshly written Parquet into the DuckDB rollups.
+        A catalog failure must never fail the ingest itself.
+        """
+        try:
+            from ..storage.catalog import EventCatalog  # duckdb is only needed here
+            with EventCatalog() as catalog:
+                catalog.refresh()
+        except Exception as e:
+            logger.warning(f"Catalog refresh skipped: {e}")
+
+    def _reject(self, raw_dict: Dict[str, Any], error: Exception) -> RejectionEvent:
+        reason = RejectionReason.UNKNOWN
+        if isinstance(error, RateLimitExceeded): reason = RejectionReason.INTEGRITY_FAILURE
+        elif "validation" in str(error).lower(): reason = RejectionReason.SCHEMA_VIOLATION
+        return RejectionEvent(
+            rejection_reason=reason,
+            raw_source=str(raw_dict),
+            source_file=str(self.ingestor.file_path),
+            parser_version=self.ingestor.parser_version,
+            error_message=str(error)
+        )
+
+    def _normalize(self, raw_dict: Dict[str, Any], type_counts: Dict[str, int]) -> Dict[str, Any]:
+        # 1. Rate Defense
+        self._check_rate_limit()
+        
+        # 2. Extract Raw Source (for hash/audit)
+        # Columnar ingestors carry the original record in `_raw`
+        raw_source = raw_dict.get('_raw') or str(raw_dict)
+        
+        # 3. Normalize & Clean
+        raw_auth_type = raw_dict.get('auth_type') or raw_dict.get('Label') or "Unknown"
+        success_status = raw_dict.get('success_failure') or "Unknown"
+        
+        # Semantic Mapping
+        semantic_event_type = self._map_semantic_type(str(raw_auth_type), str(success_status), raw_dict.get('event_code'))
+        type_counts[semantic_event_type] = type_counts.get(semantic_event_type, 0) + 1
+        
+        # Timestamp Norm
+        raw_time = raw_dict.get('time') or raw_dict.get('Timestamp') or raw_dict.get('timestamp_text')
+        timestamp = self.normalizer.normalize_timestamp(raw_time)
+        
+        return {
+            "event_id": str(uuid.uuid4()),
+            "timestamp": timestamp,
+            "event_type": semantic_event_type, # Semantic
+            "source_host": self.normalizer.normalize_host(raw_dict.get('source_host') or raw_dict.get('Source IP') or raw_dict.get('source_computer')),
+            "target_host": self.normalizer.normalize_host(raw_dict.get('dest_host') or raw_dict.get('Destination IP') or raw_dict.get('dest_computer')),
+            "user": self.normalizer.normalize_user(raw_dict.get('source_user') or raw_dict.get('source_user@domain')),
+            
+            # Protocol Separation
+            "protocol": str(raw_auth_type) if raw_auth_type not in ["?", "Unknown"] else "UNKNOWN",
+            "port": int(raw_dict['dest_port']) if raw_dict.get('dest_port') else None,
+            
+            # Interim values
+            "mitre_technique": None,
+            "mitre_tactic": None,
+            "confidence_score": 0.0,
+            "data_quality_score": 0.0,
+            "raw_source": raw_source,
+            "ingest_timestamp": datetime.utcnow(),
+            "source_file": str(self.ingestor.file_path),
+            "parser_version": self.ingestor.parser_version,
+            "model_version": "init",
+            "raw_hash": "", 
+            "previous_event_hash": None,
+        }
+
+    def _enrich(self, normalized_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Pass specific context for MITRE
+        semantic_event_type = normalized_data['event_type']
+        enrich_text = f"{semantic_event_type} via {normalized_data['protocol']} by {normalized_data['user']}"
+        if semantic_event_type == EventType.AuthFailure.value:
+            enrich_text += " authentication failure brute force"
+        
+        return self.enricher.enrich(normalized_data, enrich_text)
+
+    def _process_chunk(self, records: List[Dict[str, Any]], raws: List[Dict[str, Any]], t: int) -> Tuple[int, int, int]:
+        """
+        Validates, hashes and stores one chunk of normalized records.
+        Returns (written, rejected, stage mark).
+        """
+        metrics = self.metrics
+
+        # 5. Validate (columnar; per-row Pydantic only if the chunk can't be typed)
+        try:
+            df = self.validator.to_frame(records)
+            valid_df, rejected_df = self.validator.validate(df)
+            valid_idx = valid_df[ROW_INDEX].to_list()
+            rejected = list(zip(rejected_df[ROW_INDEX].to_list(), rejected_df["error_message"].to_list()))
+        except (TypeError, ValueError, pl.exceptions.PolarsError) as e:
+            logger.debug(f"Chunk not columnar-typeable ({e}); validating row by row")
+            valid_idx, rejected = self.validator.validate_rows(records)
+            if valid_idx:
+                # Rows Pydantic accepted always type column-wise; validate() also normalizes the tz
+                valid_df, _ = self.validator.validate(self.validator.to_frame([records[i] for i in valid_idx]))
+        t = metrics.lap("validate", t)
+
+        if rejected:
+            self.writer.write_dlq_batch([
+                self._reject(raws[i], SchemaValidationError(f"Batch validation failed: {message}"))
+                for i, message in rejected
+            ])
+            for i, message in rejected:
+                logger.warning(f"Event rejected: {message}")
+            t = metrics.lap("dlq", t)
+
+        if not valid_idx:
+            return 0, len(rejected), t
+
+        # 6. Integrity & Chaining (sequential by nature; same canonical JSON as CanonicalEvent.compute_hashes)
+        raw_hashes, previous_hashes, event_hashes = [], [], []
+        for i in valid_idx:
+            record = records[i]
+            record['raw_hash'] = hashlib.sha256(record['raw_source'].encode('utf-8')).hexdigest()
+            record['previous_event_hash'] = self.previous_event_hash
+            record['event_hash'] = compute_event_hash(record)
+            raw_hashes.append(record['raw_hash'])
+            previous_hashes.append(self.previous_event_hash)
+            event_hashes.append(record['event_hash'])
+
+            self.previous_event_hash = record['event_hash']
+            if self.chain_head is None:
+                self.chain_head = record['event_hash']
+
+        valid_df = valid_df.with_columns(
+            pl.Series("raw_hash", raw_hashes, dtype=pl.String),
+            pl.Series("previous_event_hash", previous_hashes, dtype=pl.String),
+            pl.Series("event_hash", event_hashes, dtype=pl.String),
+        )
+        t = metrics.lap("hash", t)
+
+        # 7. Write
+        self.writer.write_batch(valid_df)
+        t = metrics.lap("storage", t)
+        return len(valid_idx), len(rejected), t
+
+    def run(self) -> Dict[str, Any]:
         logger.info(f"Starting pipeline for {self.ingestor.file_path}")
         count_success = 0
         count_fail = 0
         type_counts = {}
+        metrics = self.metrics
+        metrics.start()
         
         try:
-            for raw_dict in self.ingestor.ingest():
-                try:
-                    # 1. Rate Defense
-                    self._check_rate_limit()
-                    
-                    # 2. Extract Raw Source (for hash/audit)
-                    raw_source = str(raw_dict)
-                    
-                    # 3. Normalize & Clean
-                    raw_auth_type = raw_dict.get('auth_type') or raw_dict.get('Label') or "Unknown"
-                    success_status = raw_dict.get('success_failure') or "Unknown"
-                    
-                    # Semantic Mapping
-                    semantic_event_type = self._map_semantic_type(str(raw_auth_type), str(success_status))
-                    type_counts[semantic_event_type] = type_counts.get(semantic_event_type, 0) + 1
-                    
-                    # Timestamp Norm
-                    raw_time = raw_dict.get('time') or raw_dict.get('Timestamp')
-                    timestamp = self.normalizer.normalize_timestamp(raw_time)
-                    
-                    normalized_data = {
-                        "event_id": str(uuid.uuid4()),
-                        "timestamp": timestamp,
-                        "event_type": semantic_event_type, # Semantic
-                        "source_host": self.normalizer.normalize_host(raw_dict.get('source_host') or raw_dict.get('Source IP') or raw_dict.get('source_computer')),
-                        "target_host": self.normalizer.normalize_host(raw_dict.get('dest_host') or raw_dict.get('Destination IP') or raw_dict.get('dest_computer')),
-                        "user": self.normalizer.normalize_user(raw_dict.get('source_user') or raw_dict.get('source_user@domain')),
+            # `t` is the running stage mark; each lap charges elapsed time to a stage.
+            # "parse" covers pulling the next record (file read, chunking, row conversion).
+            t = metrics.clock()
+            for batch in self.ingestor.iter_batches():
+                metrics.record_batch("ingest", len(batch))
+                records: List[Dict[str, Any]] = []
+                raws: List[Dict[str, Any]] = []
+
+                for raw_dict in batch.iter_rows(named=True):
+                    t = metrics.lap("parse", t)
+                    try:
+                        normalized_data = self._normalize(raw_dict, type_counts)
+                        t = metrics.lap("normalize", t)
+
+                        # 4. Enrich
+                        records.append(self._enrich(normalized_data))
+                        raws.append(raw_dict)
+                        t = metrics.lap("enrich", t)
+                        metrics.end_event()
                         
-                        # Protocol Separation
-                        "protocol": str(raw_auth_type) if raw_auth_type not in ["?", "Unknown"] else "UNKNOWN",
-                        "port": int(raw_dict['dest_port']) if raw_dict.get('dest_port') else None,
+                    except Exception as e:
+                        # 🔴 AUDIT BLOCKER FIX: HARD WRITES TO DLQ
+                        self.writer.write_dlq_strict(self._reject(raw_dict, e))
+                        count_fail += 1
                         
-                        # Interim values
-                        "mitre_technique": None,
-                        "confidence_score": 0.0,
-                        "data_quality_score": 0.0,
-                        "raw_source": raw_source,
-                        "ingest_timestamp": datetime.utcnow(),
-                        "source_file": str(self.ingestor.file_path),
-                        "parser_version": self.ingestor.parser_version,
-                        "model_version": "init",
-                        "raw_hash": "", 
-                        "event_hash": "",
-                    }
-                    
-                    # 4. Enrich
-                    # Pass specific context for MITRE
-                    enrich_text = f"{semantic_event_type} via {normalized_data['protocol']} by {normalized_data['user']}"
-                    if semantic_event_type == EventType.AuthFailure.value:
-                        enrich_text += " authentication failure brute force"
-                    
-                    normalized_data = self.enricher.enrich(normalized_data, enrich_text)
-                    
-                    # 5. Create Canonical Event
-                    import hashlib
-                    normalized_data['raw_hash'] = hashlib.sha256(raw_source.encode('utf-8')).hexdigest()
-                    
-                    event = CanonicalEvent(**normalized_data)
-                    
-                    # 6. Integrity & Chaining
-                    event = event.compute_hashes(self.previous_event_hash)
-                    self.previous_event_hash = event.event_hash
-                    
-                    # 7. Write
-                    self.writer.write(event)
-                    count_success += 1
-                    
-                except Exception as e:
-                    # 🔴 AUDIT BLOCKER FIX: HARD WRITES TO DLQ
-                    reason = RejectionReason.UNKNOWN
-                    if isinstance(e, RateLimitExceeded): reason = RejectionReason.INTEGRITY_FAILURE
-                    elif "validation" in str(e).lower(): reason = RejectionReason.SCHEMA_VIOLATION
-                    
-                    dlq_event = RejectionEvent(
-                        rejection_reason=reason,
-                        raw_source=str(raw_dict),
-                        source_file=str(self.ingestor.file_path),
-                        parser_version=self.ingestor.parser_version,
-                        error_message=str(e)
-                    )
-                    self.writer.write_dlq_strict(dlq_event)
-                    count_fail += 1
-                    
-                    # Log but continue
-                    logger.warning(f"Event rejected: {e}")
+                        # Log but continue
+                        logger.warning(f"Event rejected: {e}")
+                        t = metrics.lap("dlq", t)
+                        metrics.end_event()
+
+                if records:
+                    metrics.begin_batch()
+                    written, rejected, t = self._process_chunk(records, raws, t)
+                    count_success += written
+                    count_fail += rejected
+                    metrics.end_batch()
 
             # Final flush
             self.writer.flush()
+            metrics.lap("storage", t)
+            metrics.stop()
             logger.info(f"Pipeline finished. Success: {count_success}, Failed: {count_fail}")
             
             # Dump Stats for UI
@@ -173,15 +290,29 @@ class Pipeline:
                 "success": count_success,
                 "failed": count_fail,
                 "by_type": type_counts,
-                "source_file": str(self.ingestor.file_path)
+                "source_file": str(self.ingestor.file_path),
+                # Hash-chain segment produced by this run (head links to None)
+                "chain": {
+                    "head": self.chain_head,
+                    "tail": self.previous_event_hash,
+                    "length": count_success
+                }
             }
-            try:
-                # Save to Tool1 root
-                with open("ingestion_summary.json", "w") as f:
-                    json.dump(summary, f, indent=2)
-            except Exception as e:
-                logger.error(f"Failed to write summary: {e}")
-            
+            if metrics.enabled:
+                summary["metrics"] = metrics.to_dict(count_success + count_fail)
+            if self.summary_path:
+                try:
+                    # Save to Tool1 root
+                    with open(self.summary_path, "w") as f:
+                        json.dump(summary, f, indent=2)
+                except Exception as e:
+                    logger.error(f"Failed to write summary: {e}")
+
+            if self.refresh_catalog:
+                self._refresh_catalog()
+
+            return summary
+
         except Exception as e:
             logger.critical(f"Pipeline crashed: {e}")
             raise e
@@ -0,0 +1,176 @@
+import os
+import glob
+import time
+import json
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ..ingestion.registry import get_ingestor
+from ..processing.enricher import Enricher
+from ..processing.pipeline import Pipeline
+from ..processing.metrics import PipelineMetrics, write_prometheus_textfile
+from ..core.config import settings, setup_logging
+
+logger = logging.getLogger(__name__)
+
+# One Enricher per worker process, created by the pool initializer so the
+# model load is paid once per worker instead of once per file.
+_worker_enricher: Optional[Enricher] = None
+
+
+def _init_worker():
+    global _worker_enricher
+    setup_logging()  # No-op under fork; spawned workers (Windows) start unconfigured
+    _worker_enricher = Enricher()
+
+
+def _ingest_file(path: str, log_type: str, rate_limit: int) -> Dict[str, Any]:
+    """Runs one file through its own Pipeline. Executed inside a worker."""
+    started = time.time()
+    pipeline = Pipeline(get_ingestor(log_type, Path(path)), enricher=_worker_enricher)
+    pipeline.rate_limit = rate_limit
+    pipeline.summary_path = None      # Consolidated by the scheduler
+    pipeline.refresh_catalog = False  # Refreshed once at the end of the run
+
+    summary = pipeline.run()
+    summary["bytes"] = os.path.getsize(path)
+    summary["wall_seconds"] = round(time.time() - started, 3)
+    summary["worker_pid"] = os.getpid()
+    return summary
+
+
+def resolve_sources(sources: Iterable[str]) -> List[Path]:
+    """
+    Expands files, directories (recursively) and glob patterns into a
+    de-duplicated list of files.
+    """
+    files: Dict[Path, Path] = {}
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            candidates = [p for p in path.rglob("*") if p.is_file()]
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = [Path(p) for p in glob.glob(str(source), recursive=True) if Path(p).is_file()]
+
+        for candidate in candidates:
+            files.setdefault(candidate.resolve(), candidate)
+    return list(files.values())
+
+
+class FileScheduler:
+    """
+    Schedules many raw log files across a process pool.
+    Files are dispatched largest-first (LPT) so the pool stays balanced and
+    wall time tracks total bytes / aggregate throughput. Each file keeps its
+    own hash-chain segment; statistics are merged into one run report.
+    """
+
+    def __init__(self, log_type: str, workers: Optional[int] = None, rate_limit: int = settings.MAX_INGEST_RATE):
+        self.log_type = log_type
+        # Every worker holds its own Enricher (torch + MiniLM), so the default is capped
+        self.workers = workers or min(os.cpu_count() or 1, settings.MAX_INGEST_WORKERS)
+        self.rate_limit = rate_limit  # Token bucket applies per file pipeline
+        self.summary_path: Optional[Path] = Path("ingestion_summary.json")
+        self.metrics_textfile: Optional[Path] = None  # Prometheus textfile-collector output
+
+    def run(self, files: List[Path]) -> Dict[str, Any]:
+        started = time.time()
+        # Largest first: long files start early instead of becoming the tail
+        ordered = sorted(files, key=lambda p: p.stat().st_size, reverse=True)
+        workers = max(1, min(self.workers, len(ordered)))
+        logger.info(f"Scheduling {len(ordered)} file(s) across {workers} worker(s)")
+
+        results: List[Dict[str, Any]] = []
+        errors: List[Dict[str, str]] = []
+
+        if workers == 1:
+            # No pool overhead for the common single-file case
+            _init_worker()
+            for path in ordered:
+                try:
+                    results.append(_ingest_file(str(path), self.log_type, self.rate_limit))
+                except Exception as e:
+                    logger.error(f"Ingestion failed for {path}: {e}")
+                    errors.append({"source_file": str(path), "error": str(e)})
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = {
+                    pool.submit(_ingest_file, str(path), self.log_type, self.rate_limit): path
+                    for path in ordered
+                }
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        logger.error(f"Ingestion failed for {path}: {e}")
+                        errors.append({"source_file": str(path), "error": str(e)})
+
+        report = self.consolidate(results, errors, workers, time.time() - started)
+
+        if self.summary_path:
+            try:
+                with open(self.summary_path, "w") as f:
+                    json.dump(report, f, indent=2)
+            except Exception as e:
+                logger.error(f"Failed to write summary: {e}")
+
+        if self.metrics_textfile and "metrics" in report:
+            try:
+                write_prometheus_textfile(report["metrics"], report, self.metrics_textfile)
+            except Exception as e:
+                logger.error(f"Failed to write metrics textfile: {e}")
+
+        if settings.CATALOG_AUTO_REFRESH and results:
+            try:
+                from ..storage.catalog import EventCatalog  # duckdb is only needed here
+                with EventCatalog() as catalog:
+                    catalog.refresh()
+            except Exception as e:
+                logger.warning(f"Catalog refresh skipped: {e}")
+
+        return report
+
+    @staticmethod
+    def consolidate(results: List[Dict[str, Any]], errors: List[Dict[str, str]],
+                    workers: int, wall_seconds: float) -> Dict[str, Any]:
+        """
+        Merges per-file summaries. Top-level keys match the single-file
+        summary so the UI keeps reading `ingestion_summary.json` unchanged.
+        """
+        results = sorted(results, key=lambda r: r["source_file"])
+
+        by_type: Dict[str, int] = {}
+        for r in results:
+            for event_type, count in r["by_type"].items():
+                by_type[event_type] = by_type.get(event_type, 0) + count
+
+        success = sum(r["success"] for r in results)
+        failed = sum(r["failed"] for r in results)
+        total_bytes = sum(r.get("bytes", 0) for r in results)
+
+        report = {
+            "total_events": success + failed,
+            "success": success,
+            "failed": failed,
+            "by_type": by_type,
+            "source_file": results[0]["source_file"] if len(results) == 1 else f"{len(results)} files",
+            "files": results,
+            "failed_files": errors,
+            "run": {
+                "workers": workers,
+                "file_count": len(results) + len(errors),
+                "bytes": total_bytes,
+                "wall_seconds": round(wall_seconds, 3),
+                "events_per_second": round((success + failed) / wall_seconds, 1) if wall_seconds > 0 else 0.0,
+                "bytes_per_second": round(total_bytes / wall_seconds, 1) if wall_seconds > 0 else 0.0,
+            }
+        }
+
+        file_metrics = [r["metrics"] for r in results if "metrics" in r]
+        if file_metrics:
+            report["metrics"] = PipelineMetrics.merge(file_metrics, wall_seconds, success + failed)
+        return report
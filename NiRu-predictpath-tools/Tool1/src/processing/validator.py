@@ -0,0 +1,111 @@
+from typing import List, Dict, Any, Tuple
+import polars as pl
+from ..core.schema import CanonicalEvent
+
+# Columnar mirror of CanonicalEvent. Keep in step with the model (tests enforce the field set).
+CANONICAL_SCHEMA: Dict[str, pl.DataType] = {
+    "event_id": pl.String,
+    "timestamp": pl.Datetime("us", "UTC"),
+    "event_type": pl.String,
+    "source_host": pl.String,
+    "target_host": pl.String,
+    "user": pl.String,
+    "protocol": pl.String,
+    "port": pl.Int64,
+    "mitre_technique": pl.String,
+    "mitre_tactic": pl.String,
+    "confidence_score": pl.Float64,
+    "data_quality_score": pl.Float64,
+    "ingest_timestamp": pl.Datetime("us"),
+    "source_file": pl.String,
+    "parser_version": pl.String,
+    "model_version": pl.String,
+    "raw_source": pl.String,
+    "raw_hash": pl.String,
+    "previous_event_hash": pl.String,
+    "event_hash": pl.String,
+}
+
+REQUIRED_FIELDS = [name for name, field in CanonicalEvent.model_fields.items() if field.is_required()]
+
+ROW_INDEX = "_row"
+
+
+class BatchValidator:
+    """
+    Vectorized equivalent of constructing `CanonicalEvent` for every row.
+    Column types are enforced when the chunk is built (strict, per column);
+    value constraints run as expressions over the whole chunk. Chunks whose
+    types can't be built column-wise fall back to per-row Pydantic validation,
+    so rejection messages stay exact either way.
+    """
+
+    def __init__(self):
+        # (violation expression, message) pairs; a row is rejected if any expression is true
+        self.checks: List[Tuple[pl.Expr, str]] = [
+            (pl.col(name).is_null(), f"{name}: Field required") for name in REQUIRED_FIELDS
+        ]
+        self.checks += [
+            (pl.col("port").is_not_null() & ~pl.col("port").is_between(0, 65535),
+             "port: Input should be between 0 and 65535"),
+        ]
+        for score in ("confidence_score", "data_quality_score"):
+            # NaN fails is_between, matching Pydantic's ge/le behaviour
+            self.checks.append((
+                pl.col(score).is_not_null() & ~pl.col(score).is_between(0.0, 1.0),
+                f"{score}: Input should be between 0.0 and 1.0",
+            ))
+
+    def to_frame(self, records: List[Dict[str, Any]]) -> pl.DataFrame:
+        """
+        Builds a typed chunk from normalized records. Raises TypeError/ValueError
+        (via Polars) if any value doesn't fit its column type.
+        """
+        columns = []
+        for name, dtype in CANONICAL_SCHEMA.items():
+            values = [r.get(name) for r in records]
+            if name == "timestamp":
+                # Inferred, not cast: a naive column must stay naive so the tz check can see it
+                series = pl.Series(name, values, strict=True)
+                if not isinstance(series.dtype, pl.Datetime) and series.dtype != pl.Null:
+                    raise TypeError("timestamp: Input should be a valid datetime")
+            else:
+                series = pl.Series(name, values, dtype=dtype, strict=True)
+            columns.append(series)
+        return pl.DataFrame(columns).with_row_index(ROW_INDEX)
+
+    def validate(self, df: pl.DataFrame) -> Tuple[pl.DataFrame, pl.DataFrame]:
+        """
+        Splits a chunk into (valid, rejected). `rejected` has the row index
+        and an `error_message` listing every violated constraint.
+        """
+        checks = list(self.checks)
+        ts_dtype = df.schema["timestamp"]
+        if isinstance(ts_dtype, pl.Datetime) and ts_dtype.time_zone is None:
+            checks.append((pl.col("timestamp").is_not_null(), "timestamp: Timestamp must be timezone-aware (UTC)."))
+
+        errors = pl.concat_str(
+            [pl.when(violation).then(pl.lit(message)) for violation, message in checks],
+            separator="; ",
+            ignore_nulls=True,
+        )
+        # concat_str of all-null parts yields "" with ignore_nulls; treat that as valid
+        flagged = df.with_columns(errors.alias("error_message"))
+        is_bad = pl.col("error_message").is_not_null() & (pl.col("error_message") != "")
+
+        rejected = flagged.filter(is_bad).select(ROW_INDEX, "error_message")
+        valid = flagged.filter(~is_bad).drop("error_message")
+        if ts_dtype != CANONICAL_SCHEMA["timestamp"] and len(valid):
+            valid = valid.with_columns(pl.col("timestamp").cast(CANONICAL_SCHEMA["timestamp"]))
+        return valid, rejected
+
+    def validate_rows(self, records: List[Dict[str, Any]]) -> Tuple[List[int], List[Tuple[int, str]]]:
+        """Slow path: per-row Pydantic validation, used when a chunk can't be typed column-wise."""
+        valid, rejected = [], []
+        for i, record in enumerate(records):
+            try:
+                CanonicalEvent(**record)
+                valid.append(i)
+            except Exception as e:
+                rejected.append((i, str(e)))
+        return valid, rejected
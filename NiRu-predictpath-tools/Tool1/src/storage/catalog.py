@@ -0,0 +1,184 @@
+import duckdb
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, List
+from ..core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Materialized rollups over the `events` view.
+# Each rollup is a plain table keyed on its group columns so new Parquet files
+# can be folded in with an additive upsert instead of a full recompute.
+ROLLUPS = {
+    "rollup_daily": {
+        "keys": ["date", "event_type"],
+        "select": "date, event_type, count(*) AS events, "
+                  "count(*) FILTER (WHERE event_type = 'auth_failure') AS auth_failures",
+        "measures": ["events", "auth_failures"],
+        "ddl": "date DATE, event_type VARCHAR, events BIGINT, auth_failures BIGINT",
+    },
+    "rollup_user_daily": {
+        "keys": ["date", "user"],
+        "select": "date, COALESCE(user, 'unknown') AS user, count(*) AS events, "
+                  "count(*) FILTER (WHERE event_type = 'auth_failure') AS auth_failures",
+        "measures": ["events", "auth_failures"],
+        "ddl": "date DATE, user VARCHAR, events BIGINT, auth_failures BIGINT",
+    },
+    "rollup_technique_daily": {
+        "keys": ["date", "mitre_technique"],
+        "select": "date, COALESCE(mitre_technique, 'none') AS mitre_technique, count(*) AS events, "
+                  "sum(confidence_score) AS confidence_sum",
+        "measures": ["events", "confidence_sum"],
+        "ddl": "date DATE, mitre_technique VARCHAR, events BIGINT, confidence_sum DOUBLE",
+    },
+}
+
+
+def _posix_path(path) -> str:
+    """Forward-slash form, as catalog_files stores DuckDB's `filename` (Windows paths)."""
+    return str(path).replace("\\", "/")
+
+
+def _sql_path(path) -> str:
+    """Path as the body of a SQL string literal: forward slashes, single quotes doubled."""
+    return _posix_path(path).replace("'", "''")
+
+
+class EventCatalog:
+    """
+    Persistent DuckDB catalog over the Parquet event store.
+    Registers a hive-partitioned `events` view over OUTPUT_DIR and keeps
+    per-day / per-user / per-technique rollups refreshed incrementally,
+    so interactive queries don't re-glob and re-scan raw Parquet every time.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, output_dir: Optional[Path] = None):
+        self.db_path = db_path or settings.CATALOG_PATH
+        self.output_dir = output_dir or settings.OUTPUT_DIR
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+
+    @property
+    def conn(self) -> duckdb.DuckDBPyConnection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = duckdb.connect(str(self.db_path))
+            # Keep Parquet footers cached across statements in this session
+            self._conn.execute("PRAGMA enable_object_cache")
+            self._init_schema()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> "EventCatalog":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _init_schema(self):
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalog_files ("
+            "path VARCHAR PRIMARY KEY, row_count BIGINT, registered_at TIMESTAMP)"
+        )
+        for name, spec in ROLLUPS.items():
+            keys = ", ".join(spec["keys"])
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {name} ({spec['ddl']}, PRIMARY KEY ({keys}))")
+
+    def _parquet_files(self) -> List[str]:
+        return sorted(_posix_path(p) for p in self.output_dir.rglob("*.parquet"))
+
+    def register_views(self) -> bool:
+        """
+        (Re)creates the `events` view. Returns False if there is no data yet,
+        since DuckDB binds the glob at view creation time.
+        """
+        if not self._parquet_files():
+            logger.warning(f"No Parquet files under {self.output_dir}; `events` view not registered.")
+            return False
+
+        glob = _sql_path(self.output_dir / "**" / "*.parquet")
+        self.conn.execute(
+            f"CREATE OR REPLACE VIEW events AS "
+            f"SELECT * FROM read_parquet('{glob}', hive_partitioning = true, union_by_name = true)"
+        )
+        return True
+
+    def refresh(self) -> int:
+        """
+        Folds Parquet files not yet seen by the catalog into the rollups.
+        Falls back to a full rebuild if files were removed (e.g. UI reset).
+        Returns the number of newly registered files.
+        """
+        on_disk = set(self._parquet_files())
+        known = {row[0] for row in self.conn.execute("SELECT path FROM catalog_files").fetchall()}
+
+        if known - on_disk:
+            logger.info("Catalog files removed from disk, rebuilding rollups...")
+            return self.rebuild()
+
+        new_files = sorted(on_disk - known)
+        self.register_views()
+        if not new_files:
+            return 0
+
+        file_list = "[" + ", ".join(f"'{_sql_path(p)}'" for p in new_files) + "]"
+        source = f"read_parquet({file_list}, hive_partitioning = true, union_by_name = true, filename = true)"
+
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            for name, spec in ROLLUPS.items():
+                keys = ", ".join(spec["keys"])
+                updates = ", ".join(f"{m} = {name}.{m} + excluded.{m}" for m in spec["measures"])
+                self.conn.execute(
+                    f"INSERT INTO {name} SELECT {spec['select']} FROM {source} GROUP BY ALL "
+                    f"ON CONFLICT ({keys}) DO UPDATE SET {updates}"
+                )
+            self.conn.execute(
+                f"INSERT INTO catalog_files "
+                f"SELECT replace(filename, '\\', '/'), count(*), ? FROM {source} GROUP BY filename",
+                [datetime.utcnow()]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        logger.info(f"Catalog refreshed: {len(new_files)} new file(s) folded into rollups.")
+        return len(new_files)
+
+    def rebuild(self) -> int:
+        """Drops all rollup state and recomputes it from the files on disk."""
+        self.conn.execute("DELETE FROM catalog_files")
+        for name in ROLLUPS:
+            self.conn.execute(f"DELETE FROM {name}")
+        return self.refresh()
+
+    def resolve(self, query: str) -> str:
+        """
+        Full SELECT/WITH statements run as-is; anything else is treated as
+        a WHERE filter over the `events` view (legacy shorthand).
+        """
+        stripped = query.strip().rstrip(";")
+        if stripped.upper().startswith(("SELECT", "WITH")):
+            return stripped
+        return f"SELECT * FROM events WHERE {stripped}"
+
+    def execute(self, query: str, limit: Optional[int] = None):
+        sql = self.resolve(query)
+        if limit is not None:
+            sql = f"SELECT * FROM ({sql}) LIMIT {int(limit)}"
+        return self.conn.execute(sql)
+
+    def export(self, query: str, path: Path, fmt: str, limit: Optional[int] = None) -> Path:
+        """Streams a result set straight to disk without materializing it in Python."""
+        sql = self.resolve(query)
+        if limit is not None:
+            sql = f"SELECT * FROM ({sql}) LIMIT {int(limit)}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        options = "FORMAT PARQUET" if fmt == "parquet" else "FORMAT CSV, HEADER"
+        self.conn.execute(f"COPY ({sql}) TO '{_sql_path(path)}' ({options})")
+        return path
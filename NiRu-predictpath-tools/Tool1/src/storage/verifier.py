@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import polars as pl
+from ..core.config import settings
+from ..processing.validator import CANONICAL_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+# Fields covered by event_hash, in the sorted order json.dumps(sort_keys=True) uses
+HASHED_FIELDS = sorted(name for name in CANONICAL_SCHEMA if name != "event_hash")
+
+# Linkage is checked on 60-bit hash prefixes: 15 hex chars fit a signed int64,
+# so the whole chain fits in flat numpy arrays (16 bytes per event).
+PREFIX_HEX = 15
+NO_PREV = -1
+
+MAX_ISSUES = 20
+
+
+def _prefix(col: str) -> pl.Expr:
+    return pl.col(col).str.slice(0, PREFIX_HEX).str.to_integer(base=16, strict=False)
+
+
+# Printable ASCII without '"' or '\\': json.dumps leaves these strings untouched
+_JSON_SAFE = r'^[ !#-\[\]-~]*$'
+_encode_str = json.encoder.encode_basestring_ascii
+_encode_value = json.JSONEncoder(default=str).encode
+
+
+def _json_fragment(s: pl.Series) -> pl.Series:
+    """
+    JSON text for every value of a column, byte-identical to what
+    json.dumps(..., default=str) emits inside compute_event_hash.
+    """
+    dtype = s.dtype
+    if dtype == pl.Null:
+        return pl.Series(s.name, ["null"] * len(s), dtype=pl.String)
+
+    if isinstance(dtype, pl.Datetime):
+        # str(datetime): microseconds only when non-zero, "+00:00" for UTC-aware values
+        text = pl.select(
+            pl.when(s.dt.microsecond() == 0)
+            .then(s.dt.strftime("%Y-%m-%d %H:%M:%S"))
+            .otherwise(s.dt.strftime("%Y-%m-%d %H:%M:%S%.6f"))
+        ).to_series()
+        if dtype.time_zone is not None:
+            text = text + "+00:00"
+        s, dtype = text.alias(s.name), pl.String
+
+    if dtype == pl.String:
+        quoted = pl.select(pl.lit('"') + s + pl.lit('"')).to_series()
+        unsafe = (~s.str.contains(_JSON_SAFE)).fill_null(False)
+        if unsafe.any():
+            idx = unsafe.arg_true()
+            quoted = quoted.scatter(idx, [_encode_str(v) for v in s.gather(idx).to_list()])
+    elif dtype.is_integer():
+        quoted = s.cast(pl.String)
+    else:
+        # Floats (and anything else) follow Python's repr; scores are low-cardinality
+        mapping = {v: _encode_value(v) for v in s.drop_nulls().unique().to_list()}
+        quoted = s.replace_strict(mapping, default=None, return_dtype=pl.String)
+
+    return quoted.fill_null("null").alias(s.name)
+
+
+def canonical_json(df: pl.DataFrame) -> pl.Series:
+    """
+    The canonical JSON compute_event_hash() hashes, built column-wise for a whole chunk.
+    """
+    parts = [pl.lit(json.dumps(name) + ": ") + pl.lit(_json_fragment(df[name])) for name in HASHED_FIELDS]
+    return pl.select(pl.lit("{") + pl.concat_str(parts, separator=", ") + pl.lit("}")).to_series().alias("canonical")
+
+
+def _verify_file(path: str) -> Dict[str, Any]:
+    """
+    Recomputes raw_hash and event_hash for every row of one Parquet file.
+    Executed inside a worker; returns link prefixes plus the first few mismatches.
+    """
+    df = pl.read_parquet(path, columns=HASHED_FIELDS + ["event_hash"])
+    sha256 = hashlib.sha256
+
+    # Canonical text is built vectorized; only the SHA256 calls remain per row
+    raw_hashes = [sha256(v.encode("utf-8")).hexdigest() for v in df["raw_source"].fill_null("").to_list()]
+    event_hashes = [sha256(v.encode("utf-8")).hexdigest() for v in canonical_json(df).to_list()]
+
+    checked = df.select("event_id", "raw_hash", "event_hash").with_columns(
+        pl.Series("computed_raw", raw_hashes),
+        pl.Series("computed_event", event_hashes),
+    ).with_row_index("row")
+    raw_bad = checked.filter(pl.col("raw_hash").ne_missing(pl.col("computed_raw")))
+    event_bad = checked.filter(pl.col("event_hash").ne_missing(pl.col("computed_event")))
+
+    issues = (
+        [{"kind": "raw_hash_mismatch", "row": r["row"], "event_id": r["event_id"]} for r in raw_bad.head(MAX_ISSUES).to_dicts()]
+        + [{"kind": "event_hash_mismatch", "row": r["row"], "event_id": r["event_id"]} for r in event_bad.head(MAX_ISSUES).to_dicts()]
+    )
+    raw_mismatches = len(raw_bad)
+    event_mismatches = len(event_bad)
+
+    links = df.select(
+        _prefix("event_hash").fill_null(NO_PREV).alias("hash"),
+        _prefix("previous_event_hash").fill_null(NO_PREV).alias("prev"),
+    )
+    return {
+        "path": path,
+        "rows": len(df),
+        "hash": links["hash"].to_numpy(),
+        "prev": links["prev"].to_numpy(),
+        "raw_mismatches": raw_mismatches,
+        "event_mismatches": event_mismatches,
+        "issues": issues,
+    }
+
+
+class ChainVerifier:
+    """
+    Verifies the stored hash chains end to end.
+    Files are hashed in parallel (the per-row work is CPU-bound SHA256 +
+    canonical JSON), then linkage is checked order-independently: every
+    `previous_event_hash` must resolve to exactly one stored event, no event
+    may have two successors, and each run contributes one chain head.
+    """
+
+    def __init__(self, output_dir: Optional[Path] = None, workers: Optional[int] = None):
+        self.output_dir = Path(output_dir or settings.OUTPUT_DIR)
+        self.workers = workers or os.cpu_count() or 1
+
+    def files(self, dates: Optional[Iterable[str]] = None) -> List[Path]:
+        """Stored partitions in date then flush order, optionally limited to some dates."""
+        if dates:
+            found = [p for d in dates for p in (self.output_dir / f"date={d}").glob("*.parquet")]
+        else:
+            found = list(self.output_dir.glob("**/*.parquet"))
+        return sorted(found)
+
+    def _stored_hashes(self, exclude: List[Path]) -> np.ndarray:
+        """Event-hash prefixes of files outside the verified scope (read, not recomputed)."""
+        skip = set(exclude)
+        others = [p for p in self.files() if p not in skip]
+        if not others:
+            return np.empty(0, dtype=np.int64)
+        return (
+            pl.scan_parquet(others).select(_prefix("event_hash").alias("hash"))
+            .drop_nulls().collect()["hash"].to_numpy()
+        )
+
+    def run(self, dates: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        started = time.time()
+        files = self.files(dates)
+        if not files:
+            return {"ok": True, "events": 0, "files": 0, "issues": [], "first_break": None}
+
+        # Largest first keeps the pool busy, results are re-sorted into storage order
+        ordered = sorted(files, key=lambda p: p.stat().st_size, reverse=True)
+        workers = max(1, min(self.workers, len(ordered)))
+        logger.info(f"Verifying {len(files)} file(s) across {workers} worker(s)")
+
+        if workers == 1:
+            results = [_verify_file(str(p)) for p in ordered]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_verify_file, [str(p) for p in ordered], chunksize=4))
+        results.sort(key=lambda r: r["path"])
+
+        report = self._check_links(results, dates)
+        report["wall_seconds"] = round(time.time() - started, 3)
+        report["events_per_second"] = round(report["events"] / report["wall_seconds"], 1) if report["wall_seconds"] > 0 else 0.0
+        return report
+
+    def _check_links(self, results: List[Dict[str, Any]], dates: Optional[Iterable[str]]) -> Dict[str, Any]:
+        hashes = np.concatenate([r["hash"] for r in results])
+        prevs = np.concatenate([r["prev"] for r in results])
+        # Global row index -> (file, row) via file offsets
+        offsets = np.cumsum([0] + [r["rows"] for r in results])
+
+        def locate(index: int) -> Dict[str, Any]:
+            f = int(np.searchsorted(offsets, index, side="right") - 1)
+            row = int(index - offsets[f])
+            # Only a handful of issues are reported, so event ids are read back on demand
+            event_id = pl.read_parquet(results[f]["path"], columns=["event_id"])["event_id"][row]
+            return {"file": results[f]["path"], "row": row, "event_id": event_id}
+
+        issues: List[Dict[str, Any]] = []
+        for r in results:
+            for issue in r["issues"]:
+                issues.append({"kind": issue["kind"], "file": r["path"], "row": issue["row"], "event_id": issue["event_id"]})
+
+        # Links may legitimately point into partitions outside a --date selection
+        known = hashes if not dates else np.concatenate([hashes, self._stored_hashes([Path(r["path"]) for r in results])])
+        known_sorted = np.sort(known)
+
+        linked = prevs != NO_PREV
+        pos = np.searchsorted(known_sorted, prevs)
+        pos[pos >= len(known_sorted)] = 0
+        dangling = np.flatnonzero(linked & (known_sorted[pos] != prevs)) if len(known_sorted) else np.flatnonzero(linked)
+        for i in dangling[:MAX_ISSUES]:
+            issues.append({"kind": "dangling_link", **locate(int(i))})
+
+        # Two events claiming the same predecessor = a fork (replayed or duplicated rows)
+        order = np.argsort(prevs, kind="stable")
+        sorted_prevs = prevs[order]
+        dup = np.flatnonzero((sorted_prevs[1:] == sorted_prevs[:-1]) & (sorted_prevs[1:] != NO_PREV)) + 1
+        forks = order[dup]
+        for i in np.sort(forks)[:MAX_ISSUES]:
+            issues.append({"kind": "forked_link", **locate(int(i))})
+
+        issues.sort(key=lambda x: (x["file"], x["row"]))
+        raw_mismatches = sum(r["raw_mismatches"] for r in results)
+        event_mismatches = sum(r["event_mismatches"] for r in results)
+
+        return {
+            "ok": not (raw_mismatches or event_mismatches or len(dangling) or len(forks)),
+            "events": int(offsets[-1]),
+            "files": len(results),
+            "chain_heads": int((~linked).sum()),
+            "raw_hash_mismatches": raw_mismatches,
+            "event_hash_mismatches": event_mismatches,
+            "dangling_links": int(len(dangling)),
+            "forked_links": int(len(forks)),
+            "first_break": issues[0] if issues else None,
+            "issues": issues[:MAX_ISSUES],
+        }
@@ -4,8 +4,10 @@ from datetime import datetime
 from typing import List, Dict, Any, Union
 from ..core.config import settings
 from ..core.schema import CanonicalEvent, RejectionEvent
+from ..processing.validator import CANONICAL_SCHEMA
 import logging
 import json
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -20,40 +22,62 @@ class StorageWriter:
         self.dlq_dir = settings.DEAD_LETTER_QUEUE_DIR
         self.max_batch_size = 10000
         self._buffer: List[CanonicalEvent] = []
+        self._frames: List[pl.DataFrame] = []  # Validated chunks from the batch path
+        self._frame_rows = 0
+        self.metrics = None  # Optional PipelineMetrics for flush-size histograms
 
     def write(self, event: CanonicalEvent):
         """Add event to buffer and flush if full."""
         self._buffer.append(event)
-        if len(self._buffer) >= self.max_batch_size:
+        if len(self._buffer) + self._frame_rows >= self.max_batch_size:
+            self.flush()
+
+    def write_batch(self, df: pl.DataFrame):
+        """Add a validated, hashed chunk (CANONICAL_SCHEMA columns) and flush if full."""
+        if df.is_empty():
+            return
+        self._frames.append(df.select(list(CANONICAL_SCHEMA)))
+        self._frame_rows += len(df)
+        if len(self._buffer) + self._frame_rows >= self.max_batch_size:
             self.flush()
 
     def flush(self):
         """Write buffered events to Parquet partitioned by date."""
-        if not self._buffer:
+        if not self._buffer and not self._frames:
             return
 
         try:
-            # Convert list of Pydantic models to Polars DataFrame
-            dicts = [e.model_dump() for e in self._buffer]
-            df = pl.DataFrame(dicts)
+            frames = list(self._frames)
+            if self._buffer:
+                # Convert list of Pydantic models to Polars DataFrame
+                dicts = [e.model_dump() for e in self._buffer]
+                frames.append(pl.DataFrame(dicts, schema=CANONICAL_SCHEMA))
+            df = pl.concat(frames) if len(frames) > 1 else frames[0]
 
             # Add partition date column
             df = df.with_columns(
                 pl.col("timestamp").dt.date().alias("date")
             )
 
+            if self.metrics is not None:
+                self.metrics.record_batch("flush", len(df))
+
             partitions = df.partition_by("date", as_dict=True)
             
             for date_key, part_df in partitions.items():
                 date_val = date_key[0] if isinstance(date_key, tuple) else date_key
-                filename = f"events_{date_val}_{datetime.utcnow().timestamp()}.parquet"
-                path = self.output_dir / str(date_val) / filename
+                # PID keeps names unique when several worker processes flush concurrently
+                filename = f"events_{date_val}_{datetime.utcnow().timestamp()}_{os.getpid()}.parquet"
+                # Hive-style partition dir so DuckDB/Polars can prune on `date`
+                path = self.output_dir / f"date={date_val}" / filename
                 path.parent.mkdir(parents=True, exist_ok=True)
                 
                 part_df.drop("date").write_parquet(path)
                 logger.debug(f"Flushed {len(part_df)} events to {path}")
 
             self._buffer.clear()
+            self._frames.clear()
+            self._frame_rows = 0
             
         except Exception as e:
             logger.error(f"Failed to flush storage buffer: {e}")
@@ -66,7 +90,7 @@ class StorageWriter:
         try:
             # Create a localized DLQ path
             date_str = event.ingest_timestamp.strftime("%Y-%m-%d")
-            filename = f"rejected_{datetime.utcnow().timestamp()}.parquet"
+            filename = f"rejected_{datetime.utcnow().timestamp()}_{os.getpid()}.parquet"
             path = self.dlq_dir / date_str / filename
             path.parent.mkdir(parents=True, exist_ok=True)
             
@@ -81,6 +105,26 @@ class StorageWriter:
             # Last resort fallback
             self._emergency_dlq_dump(event)
 
+    def write_dlq_batch(self, events: List[RejectionEvent]):
+        """
+        Hard write path for a chunk's rejections: one Parquet file, written immediately.
+        """
+        if not events:
+            return
+        try:
+            date_str = events[0].ingest_timestamp.strftime("%Y-%m-%d")
+            filename = f"rejected_{datetime.utcnow().timestamp()}_{os.getpid()}.parquet"
+            path = self.dlq_dir / date_str / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            pl.DataFrame([e.model_dump() for e in events]).write_parquet(path)
+            logger.info(f"{len(events)} rejected event(s) persisted to DLQ: {path}")
+
+        except Exception as e:
+            logger.critical(f"FATAL: Failed to write DLQ batch: {e}")
+            for event in events:
+                self._emergency_dlq_dump(event)
+
     def _emergency_dump(self):
         """Fallback if Parquet writing fails"""
         try:
@@ -88,8 +132,12 @@ class StorageWriter:
              with open(path, "w") as f:
                  for e in self._buffer:
                      f.write(e.model_dump_json() + "\n")
+                 for frame in self._frames:
+                     f.write(frame.write_ndjson())
              logger.warning(f"Emergency dump written to {path}")
              self._buffer.clear()
+             self._frames.clear()
+             self._frame_rows = 0
         except Exception:
             logger.error("CRITICAL: Emergency dump failed. Data loss occurring.")
 
@@ -0,0 +1,72 @@
+import unittest
+import json
+import tempfile
+import shutil
+from pathlib import Path
+from src.benchmark.generator import SyntheticLogGenerator, manifest_path, parse_scale
+from src.benchmark.runner import find_regressions
+from src.ingestion.auth_lanl import LanlAuthIngestor
+from src.ingestion.net_cicids import CicIdsIngestor
+
+
+class TestSyntheticGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.generator = SyntheticLogGenerator(seed=7, users=200, hosts=100, attacks_per_million=2000)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_lanl_is_deterministic_and_ingestible(self):
+        a, b = self.tmp / "a.txt", self.tmp / "b.txt"
+        manifest = self.generator.generate_lanl(a, 5000)
+        self.generator.generate_lanl(b, 5000)
+
+        self.assertEqual(a.read_bytes(), b.read_bytes())
+        self.assertTrue(manifest["attacks"])
+        self.assertEqual(json.loads(manifest_path(a).read_text())["rows"], 5000)
+
+        batches = list(LanlAuthIngestor(a).iter_batches())
+        self.assertEqual(sum(len(batch) for batch in batches), 5000)
+        times = batches[0]["time"].to_list()
+        self.assertEqual(times, sorted(times))
+        self.assertGreaterEqual(times[0], 1)
+
+    def test_cicids_has_header_and_labels(self):
+        path = self.tmp / "flows.csv"
+        manifest = self.generator.generate_cicids(path, 3000)
+
+        df = next(CicIdsIngestor(path).iter_batches())
+        self.assertEqual(len(df), 3000)
+        self.assertIn("Destination Port", df.columns)
+        labels = set(df["Label"].unique().to_list())
+        self.assertIn("BENIGN", labels)
+        self.assertTrue({a["kind"] for a in manifest["attacks"]} <= labels)
+
+    def test_parse_scale(self):
+        self.assertEqual(parse_scale("1e4"), 10_000)
+        self.assertEqual(parse_scale("250k"), 250_000)
+        self.assertEqual(parse_scale("100_000"), 100_000)
+        with self.assertRaises(ValueError):
+            parse_scale("0")
+
+
+class TestRegressionCheck(unittest.TestCase):
+    def _run(self, eps, rss):
+        return {"cases": [{"case": "lanl/10000", "events_per_second": eps, "peak_rss_bytes": rss}]}
+
+    def test_flags_throughput_drop_and_rss_growth(self):
+        history = [self._run(1000.0, 100), self._run(2000.0, 100)]
+
+        self.assertEqual(find_regressions(self._run(1900.0, 110), history), [])
+        problems = find_regressions(self._run(1500.0, 200), history)
+        self.assertEqual(len(problems), 2)
+        self.assertIn("25% below", problems[0])
+
+    def test_new_cases_have_no_baseline(self):
+        run = {"cases": [{"case": "cicids/10000", "events_per_second": 1.0, "peak_rss_bytes": 1}]}
+        self.assertEqual(find_regressions(run, [self._run(1000.0, 100)]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
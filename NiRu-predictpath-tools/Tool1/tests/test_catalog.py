@@ -0,0 +1,117 @@
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+import polars as pl
+from src.storage.catalog import EventCatalog, ROLLUPS
+
+
+def write_events(output_dir: Path, day: str, name: str, rows):
+    """Writes (user, event_type, mitre_technique, confidence_score) rows as one Parquet file in date=`day`."""
+    partition = output_dir / f"date={day}"
+    partition.mkdir(parents=True, exist_ok=True)
+    path = partition / f"{name}.parquet"
+    pl.DataFrame(
+        rows, schema=["user", "event_type", "mitre_technique", "confidence_score"], orient="row"
+    ).write_parquet(path)
+    return path
+
+
+class TestEventCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.output_dir = self.tmp / "output"
+        self.output_dir.mkdir()
+        self.catalog = EventCatalog(db_path=self.tmp / "catalog.duckdb", output_dir=self.output_dir)
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def rows(self, sql: str):
+        return self.catalog.conn.execute(sql).fetchall()
+
+    def assertRollupsMatchFullScan(self):
+        for name, spec in ROLLUPS.items():
+            expected = self.rows(f"SELECT {spec['select']} FROM events GROUP BY ALL ORDER BY ALL")
+            self.assertEqual(self.rows(f"SELECT * FROM {name} ORDER BY ALL"), expected, name)
+
+    def test_refresh_is_incremental(self):
+        write_events(self.output_dir, "2024-03-01", "a", [
+            ("alice", "auth_failure", "T1110", 0.5),
+            ("alice", "auth_success", None, 0.25),
+        ])
+        self.assertEqual(self.catalog.refresh(), 1)
+        self.assertRollupsMatchFullScan()
+
+        write_events(self.output_dir, "2024-03-01", "b", [("bob", "auth_success", None, 0.25)])
+        write_events(self.output_dir, "2024-03-02", "c", [(None, "auth_failure", "T1110", 0.75)])
+        self.assertEqual(self.catalog.refresh(), 2)
+        self.assertEqual(self.catalog.refresh(), 0)
+        self.assertRollupsMatchFullScan()
+        self.assertEqual(self.rows("SELECT sum(row_count) FROM catalog_files"), [(4,)])
+
+    def test_refresh_adds_to_existing_rollup_keys(self):
+        for name in ("a", "b"):
+            write_events(self.output_dir, "2024-03-01", name, [
+                ("alice", "auth_failure", "T1110", 0.5),
+                ("alice", "auth_failure", "T1110", 0.5),
+            ])
+            self.catalog.refresh()
+
+        self.assertEqual(
+            self.rows("SELECT events, auth_failures FROM rollup_user_daily WHERE user = 'alice'"), [(4, 4)]
+        )
+        self.assertEqual(
+            self.rows("SELECT events, confidence_sum FROM rollup_technique_daily WHERE mitre_technique = 'T1110'"),
+            [(4, 2.0)],
+        )
+        self.assertRollupsMatchFullScan()
+
+    def test_deleted_files_trigger_rebuild(self):
+        first = write_events(self.output_dir, "2024-03-01", "a", [("alice", "auth_failure", "T1110", 0.5)])
+        write_events(self.output_dir, "2024-03-02", "b", [("bob", "auth_success", None, 0.25)] * 3)
+        self.catalog.refresh()
+
+        first.unlink()
+        self.assertEqual(self.catalog.refresh(), 1)
+        self.assertRollupsMatchFullScan()
+        self.assertEqual(self.rows("SELECT sum(events) FROM rollup_daily"), [(3,)])
+        self.assertEqual(self.rows("SELECT count(*) FROM catalog_files"), [(1,)])
+
+    def test_paths_with_quotes_are_not_rebuilt(self):
+        quoted = self.tmp / "o'brien"
+        quoted.mkdir()
+        catalog = EventCatalog(db_path=self.tmp / "quoted.duckdb", output_dir=quoted)
+        try:
+            write_events(quoted, "2024-03-01", "a", [("alice", "auth_success", None, 0.25)])
+            self.assertEqual(catalog.refresh(), 1)
+            # Registered paths match the files on disk, so nothing is refolded
+            self.assertEqual(catalog.refresh(), 0)
+            self.assertEqual(catalog.conn.execute("SELECT sum(events) FROM rollup_daily").fetchall(), [(1,)])
+        finally:
+            catalog.close()
+
+    def test_resolve_shorthand(self):
+        self.assertEqual(self.catalog.resolve("  select 1;"), "select 1")
+        self.assertEqual(self.catalog.resolve("WITH x AS (SELECT 1) SELECT * FROM x"),
+                         "WITH x AS (SELECT 1) SELECT * FROM x")
+        self.assertEqual(self.catalog.resolve("user = 'alice'"), "SELECT * FROM events WHERE user = 'alice'")
+
+    def test_export_csv_and_parquet(self):
+        write_events(self.output_dir, "2024-03-01", "a", [
+            ("alice", "auth_failure", "T1110", 0.5),
+            ("bob", "auth_success", None, 0.25),
+        ])
+        self.catalog.refresh()
+
+        csv = self.catalog.export("event_type = 'auth_failure'", self.tmp / "out" / "failures.csv", "csv")
+        self.assertEqual(pl.read_csv(csv)["user"].to_list(), ["alice"])
+
+        parquet = self.catalog.export("SELECT user FROM events ORDER BY user", self.tmp / "out" / "users.parquet",
+                                      "parquet", limit=1)
+        self.assertEqual(pl.read_parquet(parquet)["user"].to_list(), ["alice"])
+
+
+if __name__ == '__main__':
+    unittest.main()
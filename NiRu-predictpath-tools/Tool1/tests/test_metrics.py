@@ -0,0 +1,66 @@
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from src.processing.metrics import PipelineMetrics, NullMetrics, write_prometheus_textfile
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _run(self, metrics, events=10):
+        metrics.start()
+        t = metrics.clock()
+        for _ in range(events):
+            t = metrics.lap("parse", t)
+            t = metrics.lap("normalize", t)
+            t = metrics.lap("storage", t)
+            metrics.end_event()
+        metrics.record_batch("ingest", 7)
+        metrics.record_batch("ingest", 1000)
+        metrics.record_batch("flush", 1000)
+        metrics.stop()
+        return metrics.to_dict(events)
+
+    def test_laps_and_batch_histogram(self):
+        report = self._run(PipelineMetrics(cpu_sample_every=3))
+
+        self.assertEqual(report["stages"]["parse"]["calls"], 10)
+        self.assertEqual(report["stages"]["enrich"]["calls"], 0)
+        self.assertGreaterEqual(report["stages"]["storage"]["wall_seconds"], 0.0)
+        self.assertEqual(report["batch_sizes"]["ingest"], {"rows": 1007, "buckets": {"8": 1, "1024": 1}})
+
+    def test_merge_sums_stages_across_files(self):
+        a = self._run(PipelineMetrics(), events=4)
+        b = self._run(PipelineMetrics(), events=6)
+        merged = PipelineMetrics.merge([a, b], wall_seconds=2.0, total_events=10)
+
+        self.assertEqual(merged["stages"]["parse"]["calls"], 10)
+        self.assertEqual(merged["batch_sizes"]["flush"]["rows"], 2000)
+        self.assertEqual(merged["events_per_second"], 5.0)
+
+    def test_null_metrics_records_nothing(self):
+        report = self._run(NullMetrics())
+        self.assertFalse(NullMetrics.enabled)
+        self.assertEqual(report["stages"]["parse"]["calls"], 0)
+        self.assertEqual(report["batch_sizes"]["ingest"]["rows"], 0)
+
+    def test_prometheus_textfile(self):
+        report = self._run(PipelineMetrics())
+        path = self.tmp / "metrics" / "tool1.prom"
+        write_prometheus_textfile(report, {"success": 9, "failed": 1}, path)
+
+        text = path.read_text()
+        self.assertIn('predictpath_tool1_events_total{outcome="failed"} 1', text)
+        self.assertIn('predictpath_tool1_stage_wall_seconds{stage="parse"}', text)
+        self.assertIn('predictpath_tool1_batch_size_bucket{kind="ingest",le="+Inf"} 2', text)
+        self.assertIn('predictpath_tool1_batch_size_count{kind="flush"} 1', text)
+        self.assertEqual(list(path.parent.glob("*.tmp")), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
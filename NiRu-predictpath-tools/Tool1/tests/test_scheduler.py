@@ -0,0 +1,72 @@
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from src.core.config import settings
+from src.processing.scheduler import resolve_sources, FileScheduler
+from src.storage.catalog import EventCatalog
+
+
+class TestFileScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        (self.tmp / "day1").mkdir()
+        for name in ["day1/auth.log.1", "day1/auth.log.2", "other.txt"]:
+            (self.tmp / name).write_text("x")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_resolve_directories_and_globs(self):
+        files = resolve_sources([str(self.tmp / "day1"), str(self.tmp / "**" / "auth.log.*")])
+        self.assertEqual(sorted(p.name for p in files), ["auth.log.1", "auth.log.2"])
+
+        everything = resolve_sources([str(self.tmp)])
+        self.assertEqual(len(everything), 3)
+
+    def test_consolidate_merges_file_summaries(self):
+        results = [
+            {"source_file": "b", "success": 3, "failed": 1, "by_type": {"auth_success": 4}, "bytes": 100,
+             "chain": {"head": "h2", "tail": "t2", "length": 3}},
+            {"source_file": "a", "success": 5, "failed": 0, "by_type": {"auth_success": 2, "unknown": 3}, "bytes": 300,
+             "chain": {"head": "h1", "tail": "t1", "length": 5}},
+        ]
+        report = FileScheduler.consolidate(results, [{"source_file": "c", "error": "boom"}], workers=2, wall_seconds=2.0)
+
+        self.assertEqual(report["total_events"], 9)
+        self.assertEqual(report["success"], 8)
+        self.assertEqual(report["by_type"], {"auth_success": 6, "unknown": 3})
+        # Deterministic order and per-file chain segments preserved
+        self.assertEqual([f["chain"]["head"] for f in report["files"]], ["h1", "h2"])
+        self.assertEqual(report["run"]["file_count"], 3)
+        self.assertEqual(report["run"]["bytes_per_second"], 200.0)
+
+    def test_default_workers_are_capped(self):
+        with mock.patch("os.cpu_count", return_value=64):
+            self.assertEqual(FileScheduler("lanl").workers, settings.MAX_INGEST_WORKERS)
+            self.assertEqual(FileScheduler("lanl", workers=16).workers, 16)
+        with mock.patch("os.cpu_count", return_value=2):
+            self.assertEqual(FileScheduler("lanl").workers, 2)
+
+    def test_run_refreshes_catalog(self):
+        source = self.tmp / "auth.txt"
+        source.write_text("1,U1@DOM1,U1@DOM1,C1,C2,Kerberos,Network,LogOn,Success\n"
+                          "2,U2@DOM1,U2@DOM1,C3,C2,NTLM,Network,LogOn,Fail\n")
+        data = self.tmp / "data"
+        with mock.patch.multiple(settings, OUTPUT_DIR=data / "output", DEAD_LETTER_QUEUE_DIR=data / "dlq",
+                                 CATALOG_PATH=data / "catalog.duckdb", CATALOG_AUTO_REFRESH=True):
+            scheduler = FileScheduler("lanl", workers=1)
+            scheduler.summary_path = None
+            report = scheduler.run([source])
+
+        self.assertEqual(report["failed_files"], [])
+        self.assertEqual(report["success"], 2)
+        self.assertTrue((data / "catalog.duckdb").exists())
+        with EventCatalog(db_path=data / "catalog.duckdb", output_dir=data / "output") as catalog:
+            folded = catalog.conn.execute("SELECT sum(events) FROM rollup_daily").fetchone()[0]
+        self.assertEqual(folded, report["success"])
+
+
+if __name__ == '__main__':
+    unittest.main()
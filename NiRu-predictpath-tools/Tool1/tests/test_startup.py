@@ -0,0 +1,30 @@
+import sys
+import unittest
+import subprocess
+from src.core.config import settings
+from src.benchmark.startup import heavy_imports_on_startup
+
+# Records directory creation and logging setup performed by merely importing the CLI
+SIDE_EFFECT_PROBE = """
+import logging, pathlib
+made = []
+pathlib.Path.mkdir = lambda self, *a, **k: made.append(str(self))
+import src.main
+print(len(made), len(logging.getLogger().handlers))
+"""
+
+
+class TestCliStartup(unittest.TestCase):
+    def test_startup_is_lazy(self):
+        # Wall time is gated by the benchmark (find_regressions); here only what gets imported.
+        # Polars/DuckDB/torch belong inside the commands that need them
+        self.assertEqual(heavy_imports_on_startup(), [])
+
+    def test_import_has_no_side_effects(self):
+        out = subprocess.run([sys.executable, "-c", SIDE_EFFECT_PROBE], cwd=settings.BASE_DIR,
+                             capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.split(), ["0", "0"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import hashlib
+from datetime import datetime, timezone
+from src.core.schema import CanonicalEvent, compute_event_hash
+from src.processing.validator import BatchValidator, CANONICAL_SCHEMA, ROW_INDEX
+
+
+def make_record(**overrides):
+    record = {
+        "event_id": "e-1",
+        "timestamp": datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc),
+        "event_type": "auth_success",
+        "source_host": "c1",
+        "target_host": "c2",
+        "user": "u1@dom1",
+        "protocol": "NTLM",
+        "port": 445,
+        "mitre_technique": "T1078",
+        "mitre_tactic": None,
+        "confidence_score": 0.8,
+        "data_quality_score": 1.0,
+        "ingest_timestamp": datetime(2024, 3, 1, 10, 5),
+        "source_file": "auth.txt",
+        "parser_version": "lanl_auth_v1.0",
+        "model_version": "all-MiniLM-L6-v2",
+        "raw_source": "1,U1@DOM1,...",
+        "raw_hash": "",
+        "previous_event_hash": None,
+    }
+    record.update(overrides)
+    return record
+
+
+class TestBatchValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = BatchValidator()
+
+    def test_schema_mirrors_model(self):
+        self.assertEqual(list(CANONICAL_SCHEMA), list(CanonicalEvent.model_fields))
+
+    def test_rejects_constraint_violations_per_row(self):
+        records = [
+            make_record(),
+            make_record(port=70000),
+            make_record(confidence_score=1.5, data_quality_score=float("nan")),
+            make_record(source_file=None),
+        ]
+        valid, rejected = self.validator.validate(self.validator.to_frame(records))
+
+        self.assertEqual(valid[ROW_INDEX].to_list(), [0])
+        messages = dict(zip(rejected[ROW_INDEX].to_list(), rejected["error_message"].to_list()))
+        self.assertIn("port", messages[1])
+        self.assertIn("confidence_score", messages[2])
+        self.assertIn("data_quality_score", messages[2])
+        self.assertEqual(messages[3], "source_file: Field required")
+
+    def test_naive_timestamps_are_rejected(self):
+        records = [make_record(timestamp=datetime(2024, 3, 1, 10, 0))] * 2
+        valid, rejected = self.validator.validate(self.validator.to_frame(records))
+        self.assertEqual(len(valid), 0)
+        self.assertIn("timezone-aware", rejected["error_message"][0])
+
+    def test_mistyped_chunk_falls_back_to_row_validation(self):
+        records = [make_record(), make_record(port="445")]
+        with self.assertRaises(TypeError):
+            self.validator.to_frame(records)
+
+        valid, rejected = self.validator.validate_rows(records)
+        self.assertEqual(valid, [0])
+        self.assertEqual(rejected[0][0], 1)
+
+    def test_event_hash_matches_model(self):
+        # The pipeline fills raw_hash before hashing the event, on both paths
+        raw_hash = hashlib.sha256(b"1,U1@DOM1,...").hexdigest()
+        record = make_record(raw_hash=raw_hash, previous_event_hash="prev")
+        expected = CanonicalEvent(**record).compute_hashes("prev")
+
+        self.assertEqual(compute_event_hash(record), expected.event_hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
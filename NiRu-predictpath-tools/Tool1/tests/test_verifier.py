@@ -0,0 +1,83 @@
+import unittest
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from datetime import datetime, timezone
+import polars as pl
+from src.benchmark.generator import SyntheticLogGenerator
+from src.ingestion.auth_lanl import LanlAuthIngestor
+from src.processing.pipeline import Pipeline
+from src.processing.validator import CANONICAL_SCHEMA
+from src.storage.verifier import ChainVerifier, HASHED_FIELDS, canonical_json
+
+
+class TestChainVerifier(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        source = self.tmp / "auth.txt"
+        SyntheticLogGenerator(seed=3, users=20, hosts=10).generate_lanl(source, 900)
+
+        pipeline = Pipeline(LanlAuthIngestor(source))
+        pipeline.ingestor.batch_size = 300
+        pipeline.writer.max_batch_size = 300  # Several files so links cross file boundaries
+        pipeline.writer.output_dir = self.tmp / "output"
+        pipeline.writer.dlq_dir = self.tmp / "dlq"
+        pipeline.summary_path = None
+        pipeline.refresh_catalog = False
+        pipeline.rate_limit = pipeline.tokens = 10 ** 9
+        pipeline.run()
+
+        self.verifier = ChainVerifier(output_dir=self.tmp / "output", workers=1)
+        self.files = self.verifier.files()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _rewrite(self, path, fn):
+        fn(pl.read_parquet(path)).write_parquet(path)
+
+    def test_intact_chain_verifies(self):
+        report = self.verifier.run()
+        self.assertTrue(report["ok"])
+        self.assertEqual(report["events"], 900)
+        self.assertEqual(report["chain_heads"], 1)
+        self.assertGreater(len(self.files), 1)
+
+    def test_tampered_row_is_located(self):
+        self._rewrite(self.files[1], lambda df: df.with_columns(
+            pl.when(pl.int_range(pl.len()) == 5).then(pl.lit("forged")).otherwise(pl.col("raw_source")).alias("raw_source")
+        ))
+        report = self.verifier.run()
+
+        self.assertFalse(report["ok"])
+        self.assertEqual(report["raw_hash_mismatches"], 1)
+        self.assertEqual(report["first_break"]["file"], str(self.files[1]))
+        self.assertEqual(report["first_break"]["row"], 5)
+
+    def test_deleted_and_replayed_rows_break_links(self):
+        self._rewrite(self.files[0], lambda df: df.filter(pl.int_range(pl.len()) != 10))
+        shutil.copy(self.files[2], self.files[2].with_name("replayed.parquet"))
+        report = self.verifier.run()
+
+        self.assertEqual(report["dangling_links"], 1)
+        self.assertEqual(report["forked_links"], 300)
+        dangling = [i for i in report["issues"] if i["kind"] == "dangling_link"][0]
+        self.assertEqual((dangling["file"], dangling["row"]), (str(self.files[0]), 10))
+
+    def test_canonical_json_matches_json_dumps(self):
+        rows = [{
+            "event_id": 'q"uote\\ é\x7f\n', "timestamp": datetime(2024, 1, 1, tzinfo=timezone.utc),
+            "event_type": "auth_failure", "source_host": None, "target_host": "ü", "user": "u1",
+            "protocol": None, "port": 65535, "mitre_technique": None, "mitre_tactic": None,
+            "confidence_score": 1e-05, "data_quality_score": 0.35,
+            "ingest_timestamp": datetime(2024, 1, 1, 0, 0, 0, 5), "source_file": "f",
+            "parser_version": "p", "model_version": "m", "raw_source": "😀", "raw_hash": "h",
+            "previous_event_hash": None, "event_hash": None,
+        }]
+        expected = [json.dumps({k: r[k] for k in HASHED_FIELDS}, sort_keys=True, default=str) for r in rows]
+        self.assertEqual(canonical_json(pl.DataFrame(rows, schema=CANONICAL_SCHEMA)).to_list(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import json
+import tempfile
+import shutil
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from unittest import mock
+import polars as pl
+from src.core.config import settings
+from src.ingestion.winlog_jsonl import JsonLinesIngestor
+from src.ingestion.winlog_xml import WindowsXmlIngestor
+from src.processing.pipeline import Pipeline
+
+WINLOGBEAT_LINE = {
+    "@timestamp": "2024-03-01T10:15:00.123Z",
+    "event": {"code": "4625"},
+    "winlog": {
+        "event_id": 4625,
+        "computer_name": "DC01.corp.local",
+        "event_data": {
+            "TargetUserName": "alice",
+            "TargetDomainName": "CORP",
+            "WorkstationName": "WS-17",
+            "AuthenticationPackageName": "NTLM",
+            "LogonType": "3"
+        }
+    }
+}
+
+EVENT_XML = """<Event xmlns="http://schemas.microsoft.com/win/2004/08/events/event">
+  <System>
+    <EventID>4624</EventID>
+    <TimeCreated SystemTime="2024-03-01T10:16:00.1234567Z"/>
+    <Computer>DC01.corp.local</Computer>
+  </System>
+  <EventData>
+    <Data Name="TargetUserName">bob</Data>
+    <Data Name="TargetDomainName">CORP</Data>
+    <Data Name="IpAddress">10.0.0.5</Data>
+    <Data Name="AuthenticationPackageName">Kerberos</Data>
+  </EventData>
+</Event>"""
+
+
+class TestWinlogIngestors(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_jsonl_maps_winlogbeat_fields(self):
+        path = self.tmp / "events.jsonl"
+        path.write_text(json.dumps(WINLOGBEAT_LINE) + "\n\nnot json\n")
+
+        rows = list(JsonLinesIngestor(path).ingest())
+        self.assertEqual(len(rows), 2)
+
+        first = rows[0]
+        self.assertEqual(first["source_user"], "alice@CORP")
+        self.assertEqual(first["source_host"], "WS-17")
+        self.assertEqual(first["dest_host"], "DC01.corp.local")
+        self.assertEqual(first["auth_type"], "NTLM")
+        self.assertEqual(first["success_failure"], "Fail")
+        self.assertIsNotNone(first["time"].tzinfo)
+
+        # Malformed line is kept (raw) so the pipeline can dead-letter it
+        self.assertEqual(rows[1]["_raw"], "not json")
+        self.assertIsNone(rows[1]["time"])
+
+    def test_jsonl_chunks_are_bounded(self):
+        path = self.tmp / "many.jsonl"
+        path.write_text("\n".join(json.dumps(WINLOGBEAT_LINE) for _ in range(25)))
+
+        ingestor = JsonLinesIngestor(path)
+        ingestor.batch_size = 10
+        sizes = [len(b) for b in ingestor.iter_batches()]
+        self.assertEqual(sizes, [10, 10, 5])
+
+    def test_jsonl_chunk_of_only_malformed_lines(self):
+        path = self.tmp / "garbage.jsonl"
+        path.write_text("not json\n{broken\n[1, 2]\n")
+
+        rows = list(JsonLinesIngestor(path).ingest())
+        self.assertEqual([r["_raw"] for r in rows], ["not json", "{broken", "[1, 2]"])
+        self.assertTrue(all(r["time"] is None for r in rows))
+
+    def test_jsonl_chunk_without_timestamps(self):
+        record = json.loads(json.dumps(WINLOGBEAT_LINE))
+        del record["@timestamp"]
+        record["winlog"]["event_data"]["IpPort"] = "49152"
+        path = self.tmp / "untimed.jsonl"
+        path.write_text("\n".join(json.dumps(record) for _ in range(3)))
+
+        batch = next(JsonLinesIngestor(path).iter_batches())
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(batch["time"].null_count(), 3)
+        self.assertEqual(batch["dest_port"].to_list(), [49152] * 3)
+        self.assertEqual(batch["source_user"][0], "alice@CORP")
+
+    def test_xml_handles_bare_and_wrapped_exports(self):
+        bare = self.tmp / "bare.xml"
+        bare.write_text(EVENT_XML * 3)
+        wrapped = self.tmp / "wrapped.xml"
+        wrapped.write_text('<?xml version="1.0" encoding="utf-8"?>\n<Events>' + EVENT_XML * 3 + "</Events>")
+
+        for path in (bare, wrapped):
+            ingestor = WindowsXmlIngestor(path)
+            ingestor.batch_size = 2
+            batches = list(ingestor.iter_batches())
+            self.assertEqual([len(b) for b in batches], [2, 1])
+
+            row = batches[0].row(0, named=True)
+            self.assertEqual(row["event_code"], "4624")
+            self.assertEqual(row["source_user"], "bob@CORP")
+            self.assertEqual(row["source_host"], "10.0.0.5")
+            self.assertEqual(row["success_failure"], "Success")
+            self.assertEqual(row["time"].microsecond, 123456)
+
+            # The audit copy is the <Event> itself, not a re-encoded subset
+            self.assertTrue(row["_raw"].startswith('<Event xmlns="http://schemas.microsoft.com/win/2004/08/events/event">'))
+            self.assertEqual(ET.canonicalize(row["_raw"]), ET.canonicalize(EVENT_XML))
+
+    def test_pipeline_maps_logon_event_ids(self):
+        success = json.loads(json.dumps(WINLOGBEAT_LINE))
+        success["event"]["code"] = "4624"
+        success["winlog"]["event_id"] = 4624
+        success["@timestamp"] = "2024-03-01T10:14:00Z"
+        path = self.tmp / "logons.jsonl"
+        path.write_text(json.dumps(success) + "\n" + json.dumps(WINLOGBEAT_LINE) + "\n")
+
+        output = self.tmp / "output"
+        with mock.patch.multiple(settings, OUTPUT_DIR=output, DEAD_LETTER_QUEUE_DIR=self.tmp / "dlq"):
+            pipeline = Pipeline(JsonLinesIngestor(path))
+            pipeline.summary_path = None
+            pipeline.refresh_catalog = False
+            summary = pipeline.run()
+
+        self.assertEqual(summary["by_type"], {"auth_success": 1, "auth_failure": 1})
+        events = pl.read_parquet(output / "**" / "*.parquet").sort("timestamp")
+        self.assertEqual(events["event_type"].to_list(), ["auth_success", "auth_failure"])
+        self.assertEqual(events["protocol"].to_list(), ["NTLM", "NTLM"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import os
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE_DIR = Path(__file__).resolve().parent.parent / "data" / "baselines"
+
+# Per-session behaviour metrics, each kept as a running count/mean/M2 per user:
+# - avg_delta: log1p(seconds between events), the inverse event rate
+# - duration: log1p(session minutes)
+# - host_count: hosts touched (fan-out)
+# - severity: confidence-weighted MITRE severity per event (technique mix)
+BASELINE_METRICS = ("avg_delta", "duration", "host_count", "severity")
+
+# Noise floor for each metric's standard deviation, so a perfectly regular
+# principal (a service account touching exactly 5 hosts) is not flagged for
+# a rounding-level change
+MIN_STD = {"avg_delta": 0.25, "duration": 0.25, "host_count": 1.0, "severity": 0.25}
+
+# A baseline is used once it has this many sessions for the metric
+MIN_BASELINE_SESSIONS = 10
+
+# Deviation (in standard deviations) beyond which behaviour is unusual
+BASELINE_Z = 3.0
+
+BASELINE_SCHEMA = {
+    "user": pl.String,
+    # End of the latest folded session; sessions starting at or before it were already folded
+    "last_end": pl.Datetime("us", "UTC"),
+    **{f"{m}_{stat}": dtype for m in BASELINE_METRICS for stat, dtype in (("n", pl.Int64), ("mean", pl.Float64), ("m2", pl.Float64))},
+}
+
+
+def session_metrics(event_count: np.ndarray, start_us: np.ndarray, end_us: np.ndarray,
+                    host_count: np.ndarray, base_risk: np.ndarray) -> Dict[str, np.ndarray]:
+    """BASELINE_METRICS per session; avg_delta is NaN for single-event sessions."""
+    duration = (end_us - start_us) / 1_000_000
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_delta = np.where(event_count > 1, duration / (event_count - 1), np.nan)
+    return {
+        "avg_delta": np.log1p(avg_delta),
+        "duration": np.log1p(duration / 60),
+        "host_count": host_count.astype(np.float64),
+        "severity": base_risk / np.maximum(event_count, 1),
+    }
+
+
+def _stats(baseline: pl.DataFrame, metric: str):
+    """(mature, mean, std) per aligned baseline row; std has the MIN_STD floor."""
+    n = baseline[f"{metric}_n"].fill_null(0).to_numpy()
+    mean = baseline[f"{metric}_mean"].fill_null(np.nan).to_numpy()
+    m2 = baseline[f"{metric}_m2"].fill_null(np.nan).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.fmax(np.sqrt(m2 / n), MIN_STD[metric])
+    return n >= MIN_BASELINE_SESSIONS, mean, std
+
+
+def deviations(metrics: Dict[str, np.ndarray], baseline: pl.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Z-scores of session metrics against aligned baseline rows (one per
+    session, nulls where the user has none). NaN where the baseline is
+    still immature for that metric.
+    """
+    z = {}
+    for m in BASELINE_METRICS:
+        mature, mean, std = _stats(baseline, m)
+        z[m] = np.where(mature, (metrics[m] - mean) / std, np.nan)
+    return z
+
+
+def expected_max(baseline: pl.DataFrame, metric: str) -> np.ndarray:
+    """mean + BASELINE_Z standard deviations per aligned row; NaN if immature."""
+    mature, mean, std = _stats(baseline, metric)
+    return np.where(mature, mean + BASELINE_Z * std, np.nan)
+
+
+class BehaviorBaselines:
+    """
+    Per-user behavioural baselines: for every metric a running count, mean
+    and sum of squared deviations (M2), so the variance is M2 / n. A batch of
+    sessions is reduced per user and folded in with the pairwise form of
+    Welford's update (Chan et al.), which is exact and O(1) per user.
+    """
+
+    def __init__(self, frame: Optional[pl.DataFrame] = None):
+        self.frame = frame if frame is not None else pl.DataFrame(schema=BASELINE_SCHEMA)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def lookup(self, users: pl.Series) -> pl.DataFrame:
+        """Baseline rows aligned with `users` (one hash join; nulls for unknown users)."""
+        return users.alias("user").to_frame().join(self.frame, on="user", how="left").drop("user")
+
+    def update(self, users: pl.Series, scores: pl.DataFrame) -> int:
+        """
+        Folds scored sessions (score_table rows, aligned with `users`) into the
+        baselines. A user's sessions do not overlap, so one starting at or
+        before the user's watermark was folded by an earlier run (or is an
+        open session extended since) and is skipped. Returns the number folded in.
+        """
+        metrics = session_metrics(
+            scores["event_count"].to_numpy(),
+            scores["start_time"].dt.epoch("us").to_numpy(),
+            scores["end_time"].dt.epoch("us").to_numpy(),
+            scores["host_count"].to_numpy(),
+            scores["base_risk"].to_numpy(),
+        )
+        sessions = pl.DataFrame({"user": users, "start_time": scores["start_time"], "end_time": scores["end_time"], **metrics}).with_columns(
+            pl.col(m).fill_nan(None) for m in BASELINE_METRICS
+        )
+        fresh = (
+            sessions.join(self.frame.select("user", "last_end"), on="user", how="left")
+            .filter(pl.col("user").is_not_null() & (pl.col("last_end").is_null() | (pl.col("start_time") > pl.col("last_end"))))
+        )
+        if fresh.is_empty():
+            return 0
+        batch = fresh.group_by("user").agg(
+            pl.col("end_time").max().alias("batch_end"),
+            *[expr for m in BASELINE_METRICS for expr in (
+                pl.col(m).count().alias(f"{m}_bn"),
+                pl.col(m).mean().alias(f"{m}_bmean"),
+                (pl.col(m).var(ddof=0) * pl.col(m).count()).alias(f"{m}_bm2"),
+            )]
+        )
+
+        known = pl.concat([self.frame.select("user"), batch.select("user")]).unique()
+        merged = known.join(self.frame, on="user", how="left").join(batch, on="user", how="left")
+        columns = [pl.max_horizontal("last_end", "batch_end").alias("last_end")]
+        for m in BASELINE_METRICS:
+            na, ma, qa = (pl.col(f"{m}_{s}").fill_null(0) for s in ("n", "mean", "m2"))
+            nb, mb, qb = (pl.col(f"{m}_{s}").fill_null(0) for s in ("bn", "bmean", "bm2"))
+            n = na + nb
+            delta = mb - ma
+            safe_n = pl.when(n > 0).then(n).otherwise(1)
+            columns += [
+                n.alias(f"{m}_n"),
+                pl.when(n > 0).then(ma + delta * nb / safe_n).otherwise(None).alias(f"{m}_mean"),
+                pl.when(n > 0).then(qa + qb + delta * delta * na * nb / safe_n).otherwise(None).alias(f"{m}_m2"),
+            ]
+        self.frame = merged.with_columns(columns).select(
+            [pl.col(name).cast(dtype) for name, dtype in BASELINE_SCHEMA.items()]
+        ).sort("user")
+        return len(fresh)
+
+
+class BaselineStore:
+    """Persists BehaviorBaselines as one Parquet file, replaced atomically."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or DEFAULT_BASELINE_DIR)
+        self.path = self.root / "baselines.parquet"
+
+    def load(self) -> BehaviorBaselines:
+        if not self.path.exists():
+            return BehaviorBaselines()
+        return BehaviorBaselines(pl.read_parquet(self.path).select(list(BASELINE_SCHEMA)))
+
+    def save(self, baselines: BehaviorBaselines):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        baselines.frame.write_parquet(tmp)
+        os.replace(tmp, self.path)
+        logger.info(f"Behaviour baselines saved: {len(baselines)} user(s)")
@@ -0,0 +1,213 @@
+import json
+import logging
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import numpy as np
+import polars as pl
+from ..engine import FEATURE_TECHNIQUES
+from ..ingest import EVENT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 500_000  # Events generated and written per step; bounds memory at any scale
+
+# Session sizes (events per session) are drawn from one of these, with the requested mean
+SESSION_SIZE_DISTRIBUTIONS = ("geometric", "lognormal", "uniform", "fixed")
+
+# Shape of the lognormal sizes: a heavy tail of sessions 10-100x the mean
+LOGNORMAL_SIGMA = 1.5
+
+T0 = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+# Benign timing, in seconds: events within a session stay well inside the
+# default 60m gap, a user's consecutive sessions are hours apart
+EVENT_GAP_MEAN = 20.0
+EVENT_GAP_MAX = 1_800.0
+IDLE_GAP = (2 * 3600.0, 12 * 3600.0)
+
+# Pathological sessions: one account hopping across the estate at machine speed
+GIANT_EVENT_GAP = (0.01, 1.0)
+
+PROTOCOLS = (["Kerberos", "NTLM", "Negotiate"], [0.6, 0.25, 0.15])
+
+
+class SessionWorkloadGenerator:
+    """
+    Seeded generator for Tool1-schema Parquet (hive-partitioned by event
+    date, like Tool1's OUTPUT_DIR) with a controllable session shape:
+    session sizes follow `sizes` with mean `mean_session_events`, and
+    `giant_sessions` pathological sessions of `giant_session_events` events
+    each (one user at machine speed) are mixed in. Data is produced in
+    CHUNK_ROWS steps so 1e7-event datasets stream to disk in bounded memory,
+    and the same (seed, rows, options) always yields the same events.
+    """
+
+    def __init__(self, seed: int = 42, users: int = 10_000, hosts: int = 5_000, sizes: str = "geometric",
+                 mean_session_events: float = 20.0, giant_sessions: int = 0, giant_session_events: int = 100_000,
+                 technique_rate: float = 0.05):
+        if sizes not in SESSION_SIZE_DISTRIBUTIONS:
+            raise ValueError(f"Unknown session size distribution: {sizes}. Supported: {', '.join(SESSION_SIZE_DISTRIBUTIONS)}")
+        if mean_session_events < 1:
+            raise ValueError("Mean session size must be at least 1 event")
+        self.seed = seed
+        self.users = users
+        self.hosts = hosts
+        self.sizes = sizes
+        self.mean_session_events = mean_session_events
+        self.giant_sessions = giant_sessions
+        self.giant_session_events = giant_session_events
+        self.technique_rate = technique_rate
+
+    @property
+    def profile(self) -> str:
+        """Short name of the session shape, e.g. geometric-20 or lognormal-50+2x100000."""
+        name = f"{self.sizes}-{self.mean_session_events:g}"
+        if self.giant_sessions:
+            name += f"+{self.giant_sessions}x{self.giant_session_events}"
+        return name
+
+    def generate(self, out_dir: Path, rows: int) -> Dict[str, Any]:
+        """Writes `rows` events under `out_dir` (date=YYYY-MM-DD/part-NNNNN.parquet) plus manifest.json."""
+        giant_rows = self.giant_sessions * self.giant_session_events
+        if giant_rows > rows // 2:
+            raise ValueError(f"{self.giant_sessions} giant session(s) of {self.giant_session_events} events "
+                             f"need more than half of {rows} rows")
+        rng = np.random.default_rng(self.seed)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        # Each user's clock (µs after T0) advances session by session across chunks
+        clocks = (rng.random(self.users) * IDLE_GAP[1] * 1e6).astype(np.int64)
+        home_host = rng.integers(0, self.hosts, size=self.users)
+
+        part = 0
+        sessions = 0
+        benign_rows = rows - giant_rows
+        for offset in range(0, benign_rows, CHUNK_ROWS):
+            chunk, count = self._benign(rng, min(CHUNK_ROWS, benign_rows - offset), clocks, home_host)
+            self._write(out_dir, chunk, part, offset)
+            part += 1
+            sessions += count
+
+        giants: List[Dict[str, Any]] = []
+        for g in range(self.giant_sessions):
+            chunk, info = self._giant(rng, g)
+            self._write(out_dir, chunk, part, benign_rows + g * self.giant_session_events)
+            part += 1
+            giants.append(info)
+
+        manifest = {
+            "rows": rows,
+            "seed": self.seed,
+            "users": self.users,
+            "hosts": self.hosts,
+            "sizes": self.sizes,
+            "mean_session_events": self.mean_session_events,
+            "benign_sessions": sessions,
+            "giant_sessions": giants,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(out_dir / "manifest.json", "w") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Generated {rows} events in {sessions + len(giants)} sessions ({self.profile}) at {out_dir}")
+        return manifest
+
+    def session_sizes(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """`n` session sizes (>= 1 event) from the configured distribution."""
+        mean = self.mean_session_events
+        if self.sizes == "geometric":
+            return rng.geometric(1.0 / mean, size=n)
+        if self.sizes == "lognormal":
+            mu = np.log(mean) - LOGNORMAL_SIGMA ** 2 / 2
+            return np.maximum(1, np.rint(rng.lognormal(mu, LOGNORMAL_SIGMA, size=n))).astype(np.int64)
+        if self.sizes == "uniform":
+            return rng.integers(1, max(2, int(round(2 * mean))), size=n)
+        return np.full(n, max(1, int(round(mean))))
+
+    def _benign(self, rng, n, clocks, home_host):
+        """One chunk of whole sessions totalling `n` events; returns (frame, sessions)."""
+        sizes = self.session_sizes(rng, max(1, int(n / self.mean_session_events * 1.2) + 16))
+        while sizes.sum() < n:
+            sizes = np.concatenate([sizes, self.session_sizes(rng, len(sizes))])
+        count = int(np.searchsorted(np.cumsum(sizes), n)) + 1
+        sizes = sizes[:count]
+        sizes[-1] -= sizes.sum() - n
+        users = rng.integers(0, self.users, size=count)
+
+        session = np.repeat(np.arange(count), sizes)
+        first = np.r_[0, np.cumsum(sizes)[:-1]]
+        gaps = np.minimum(rng.exponential(EVENT_GAP_MEAN, size=n), EVENT_GAP_MAX)
+        gaps[first] = 0.0
+        offsets = (np.cumsum(gaps) * 1e6).astype(np.int64)
+        offsets -= offsets[first][session]
+        durations = offsets[np.r_[first[1:], n] - 1]
+
+        # Each user's sessions in this chunk follow each other, separated by an idle gap
+        span = durations + (rng.uniform(*IDLE_GAP, size=count) * 1e6).astype(np.int64)
+        order = np.argsort(users, kind="stable")
+        by_user, span_sorted = users[order], span[order]
+        ends = np.cumsum(span_sorted)
+        group_start = np.r_[True, by_user[1:] != by_user[:-1]]
+        before = ends - span_sorted - (ends - span_sorted)[np.maximum.accumulate(np.where(group_start, np.arange(count), 0))]
+        starts = np.empty(count, dtype=np.int64)
+        starts[order] = clocks[by_user] + before
+        last = np.r_[group_start[1:], True]
+        clocks[by_user[last]] += before[last] + span_sorted[last]
+
+        return self._events(rng, starts[session] + offsets, home_host[users][session], user_ids=users[session]), count
+
+    def _giant(self, rng, index: int):
+        n = self.giant_session_events
+        start = int(rng.integers(0, int(IDLE_GAP[1] * 1e6)))
+        timestamps = start + (np.cumsum(rng.uniform(*GIANT_EVENT_GAP, size=n)) * 1e6).astype(np.int64)
+        user = f"G{index}@DOM1"
+        frame = self._events(rng, timestamps, rng.integers(0, self.hosts, size=n), user=user)
+        info = {"user": user, "rows": n,
+                "start": T0.timestamp() + timestamps[0] / 1e6, "end": T0.timestamp() + timestamps[-1] / 1e6}
+        return frame, info
+
+    def _events(self, rng, timestamps: np.ndarray, sources: np.ndarray, user_ids=None, user=None) -> pl.DataFrame:
+        """Event columns for µs offsets `timestamps`: users U<id>@DOM1 from `user_ids`, or the single `user`."""
+        n = len(timestamps)
+        flagged = rng.random(n) < self.technique_rate
+        techniques = pl.Series(FEATURE_TECHNIQUES).gather(rng.integers(0, len(FEATURE_TECHNIQUES), size=n))
+        protocols, weights = PROTOCOLS
+        frame = pl.DataFrame({
+            "timestamp": pl.Series(timestamps, dtype=pl.Int64),
+            "user_id": user_ids if user_ids is not None else np.zeros(n, dtype=np.int64),
+            "source_id": sources,
+            "target_id": rng.integers(0, self.hosts, size=n),
+            "mitre_technique": techniques.scatter(np.flatnonzero(~flagged), None),
+            "confidence_score": np.where(flagged, rng.uniform(0.3, 1.0, size=n), rng.uniform(0.0, 0.3, size=n)).round(3),
+            "protocol": pl.Series(protocols).gather(rng.choice(len(protocols), size=n, p=weights)),
+            "failed": rng.random(n) < 0.02,
+        })
+        return frame.with_columns(
+            (pl.lit(T0) + pl.duration(microseconds=pl.col("timestamp"))).alias("timestamp"),
+            (pl.lit(user) if user else pl.format("U{}@DOM1", pl.col("user_id"))).alias("user"),
+            pl.format("C{}", pl.col("source_id")).alias("source_host"),
+            pl.format("C{}", pl.col("target_id")).alias("target_host"),
+            pl.when(pl.col("failed")).then(pl.lit("auth_failure")).otherwise(pl.lit("auth_success")).alias("event_type"),
+            pl.lit(1.0).alias("data_quality_score"),
+        )
+
+    def _write(self, out_dir: Path, chunk: pl.DataFrame, part: int, first_id: int):
+        chunk = chunk.sort("timestamp").with_columns(
+            pl.format("bench-{}", pl.int_range(first_id, first_id + len(chunk), dtype=pl.Int64)).alias("event_id"),
+        )
+        chunk = chunk.select(EVENT_COLUMNS).with_columns(pl.col("timestamp").dt.date().alias("_date"))
+        for (day,), frame in chunk.group_by("_date"):
+            partition = out_dir / f"date={day.isoformat()}"
+            partition.mkdir(exist_ok=True)
+            frame.drop("_date").write_parquet(partition / f"part-{part:05d}.parquet")
+
+
+def parse_scale(value: str) -> int:
+    """Accepts '100000', '1e5' or '100k'/'10m' style event counts."""
+    text = str(value).strip().lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    if multiplier > 1:
+        text = text[:-1]
+    rows = int(float(text) * multiplier)
+    if rows <= 0:
+        raise ValueError(f"Event count must be positive: {value}")
+    return rows
@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import multiprocessing
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from .generator import SESSION_SIZE_DISTRIBUTIONS, SessionWorkloadGenerator, parse_scale
+from ..report import REPORT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+DATASET_DIR = BASE_DIR / "data" / "benchmarks" / "datasets"
+RESULTS_PATH = BASE_DIR / "data" / "benchmarks" / "results.json"
+
+DEFAULT_SCALES = ("1e5", "1e6", "1e7")
+
+# Timed phases of one case, in order; load + sessionize is DataIngester.load_sessions
+PHASES = ("load", "sessionize", "score", "write")
+
+# Phases faster than this are never flagged: scheduler noise dominates them
+MIN_REGRESSION_SECONDS = 0.25
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None if the platform can't tell us."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+    except ImportError:
+        # Windows: no `resource`; psutil is optional
+        try:
+            import psutil
+            return int(psutil.Process().memory_info().peak_wset)
+        except Exception:
+            return None
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=BASE_DIR, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _run_case(dataset: str, work_dir: str, workers: int, report_format: str) -> Dict[str, Any]:
+    """
+    One benchmark case, executed in a fresh process so peak RSS belongs to
+    this case alone. Each phase records its wall time and the RSS
+    high-water mark at its end.
+    """
+    from ..engine import GraphEngine
+    from ..ingest import DataIngester, sessionize_many
+    from ..domain import SessionSpec
+    from ..report import REPORT_BATCH_ROWS, open_report_writer
+
+    phases: Dict[str, Dict[str, Any]] = {}
+    clock = time.perf_counter()
+
+    def done(phase: str):
+        nonlocal clock
+        now = time.perf_counter()
+        phases[phase] = {"seconds": round(now - clock, 3), "peak_rss_bytes": peak_rss_bytes()}
+        clock = now
+
+    events = DataIngester(dataset).scan().collect()
+    done("load")
+    spec = SessionSpec()
+    table = sessionize_many(events, [spec])[spec]
+    done("sessionize")
+    engine = GraphEngine()
+    scores = engine.scorer.score_table(table, workers)
+    done("score")
+    output = Path(work_dir) / f"path_report.{report_format}"
+    generated_at = datetime.utcnow()
+    with open_report_writer(str(output), report_format) as writer:
+        for batch in scores.iter_slices(REPORT_BATCH_ROWS):
+            writer.write([engine.scorer.to_record(row, generated_at) for row in batch.iter_rows(named=True)])
+    done("write")
+
+    total = sum(phase["seconds"] for phase in phases.values())
+    return {
+        "events": len(events),
+        "sessions": len(table),
+        "sketched_sessions": int(scores["sketched"].sum()),
+        "largest_session_events": int(scores["event_count"].max() or 0),
+        "wall_seconds": round(total, 3),
+        "events_per_second": round(len(events) / total, 1) if total > 0 else 0.0,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "output_bytes": output.stat().st_size,
+        "phases": phases,
+    }
+
+
+class BenchmarkRunner:
+    """
+    Generates (or reuses) seeded Tool1-schema datasets at the requested scales
+    and runs Tool2 over each one phase by phase (load, sessionize, score,
+    write), recording wall time and peak RSS. Every run is appended to a JSON
+    history so a later run can be compared against the previous one on the
+    same machine.
+    """
+
+    def __init__(self, generator: Optional[SessionWorkloadGenerator] = None, dataset_dir: Path = DATASET_DIR,
+                 results_path: Path = RESULTS_PATH, workers: int = 1, report_format: str = "json"):
+        self.generator = generator or SessionWorkloadGenerator()
+        self.dataset_dir = dataset_dir
+        self.results_path = results_path
+        self.workers = workers
+        self.report_format = report_format
+
+    def dataset(self, rows: int) -> Path:
+        """Returns a cached dataset directory, generating it on first use."""
+        g = self.generator
+        path = self.dataset_dir / f"{g.profile}_{rows}_u{g.users}_h{g.hosts}_seed{g.seed}"
+        if not path.exists():
+            logger.info(f"Generating {rows} events ({g.profile}, seed {g.seed})...")
+            tmp = path.with_name(path.name + ".partial")
+            shutil.rmtree(tmp, ignore_errors=True)
+            g.generate(tmp, rows)
+            os.replace(tmp, path)
+        return path
+
+    def run(self, scales: List[int]) -> Dict[str, Any]:
+        cases = []
+        # Spawned (not forked) so each case starts with a clean heap and RSS high-water mark
+        ctx = multiprocessing.get_context("spawn")
+
+        for rows in scales:
+            dataset = self.dataset(rows)
+            work_dir = tempfile.mkdtemp(prefix="predictpath_tool2_bench_")
+            try:
+                with ctx.Pool(1) as pool:
+                    result = pool.apply(_run_case, (str(dataset), work_dir, self.workers, self.report_format))
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+            result = {
+                "case": f"{self.generator.profile}/{rows}", "rows": rows,
+                "workers": self.workers, "format": self.report_format,
+                "input_bytes": sum(p.stat().st_size for p in dataset.rglob("*.parquet")), **result,
+            }
+            logger.info(f"{result['case']}: {result['events_per_second']} events/s, "
+                        f"peak RSS {result['peak_rss_bytes']}")
+            cases.append(result)
+
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "seed": self.generator.seed,
+            "host": {
+                "platform": platform.platform(),
+                "python": sys.version.split()[0],
+                "cpu_count": os.cpu_count(),
+            },
+            "cases": cases,
+        }
+
+    # --- History ---
+
+    def load_history(self) -> List[Dict[str, Any]]:
+        if not self.results_path.exists():
+            return []
+        with open(self.results_path) as f:
+            return json.load(f)
+
+    def save(self, run: Dict[str, Any]):
+        history = self.load_history()
+        history.append(run)
+        self.results_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.results_path.with_name(self.results_path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(history, f, indent=2)
+        os.replace(tmp, self.results_path)
+
+
+def find_regressions(run: Dict[str, Any], history: List[Dict[str, Any]], tolerance: float = 0.2) -> List[str]:
+    """
+    Compares each case with the most recent earlier run of the same case
+    (same profile, scale, workers and format). Flags any phase slower by
+    more than `tolerance` (a fraction, ignoring phases under
+    MIN_REGRESSION_SECONDS) and peak RSS growth beyond it.
+    """
+    def key(case: Dict[str, Any]):
+        return case["case"], case.get("workers"), case.get("format")
+
+    previous: Dict[Any, Dict[str, Any]] = {}
+    for past in history:
+        for case in past.get("cases", []):
+            previous[key(case)] = case
+
+    problems = []
+    for case in run["cases"]:
+        base = previous.get(key(case))
+        if not base:
+            continue
+
+        for phase in PHASES:
+            now, then = case["phases"].get(phase), base.get("phases", {}).get(phase)
+            if not now or not then:
+                continue
+            if now["seconds"] > MIN_REGRESSION_SECONDS and now["seconds"] > then["seconds"] * (1 + tolerance):
+                growth = now["seconds"] / then["seconds"] - 1 if then["seconds"] else float("inf")
+                problems.append(
+                    f"{case['case']}: {phase} took {now['seconds']}s, {growth:.0%} over baseline {then['seconds']}s"
+                )
+
+        if base.get("peak_rss_bytes") and case.get("peak_rss_bytes") \
+                and case["peak_rss_bytes"] > base["peak_rss_bytes"] * (1 + tolerance):
+            growth = case["peak_rss_bytes"] / base["peak_rss_bytes"] - 1
+            problems.append(
+                f"{case['case']}: peak RSS {case['peak_rss_bytes']} bytes is {growth:.0%} above "
+                f"baseline {base['peak_rss_bytes']}"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tool 2 benchmark: load, sessionize, score and write over synthetic Tool 1 data")
+    parser.add_argument("--scale", action="append", dest="scales", help=f"Events per dataset (repeatable), e.g. 1e5 or 10m (default: {' '.join(DEFAULT_SCALES)})")
+    parser.add_argument("--sizes", choices=SESSION_SIZE_DISTRIBUTIONS, default="geometric", help="Session size distribution (default: geometric)")
+    parser.add_argument("--mean-session-events", type=float, default=20.0, help="Mean events per benign session (default: 20)")
+    parser.add_argument("--giant-sessions", type=int, default=0, help="Pathological sessions mixed into each dataset (default: 0)")
+    parser.add_argument("--giant-session-events", type=int, default=100_000, help="Events per pathological session (default: 100000)")
+    parser.add_argument("--users", type=int, default=10_000, help="Distinct benign users (default: 10000)")
+    parser.add_argument("--hosts", type=int, default=5_000, help="Distinct hosts (default: 5000)")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset seed")
+    parser.add_argument("--workers", type=int, default=1, help="Scoring processes, as in the main CLI (default: 1)")
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="json", help="Report format written in the write phase (default: json)")
+    parser.add_argument("--results", help="JSON results history (default: data/benchmarks/results.json)")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if a phase regressed against the previous run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed phase slowdown / RSS growth for --check (default: 0.2)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    try:
+        scales = [parse_scale(s) for s in args.scales or DEFAULT_SCALES]
+        generator = SessionWorkloadGenerator(
+            seed=args.seed, users=args.users, hosts=args.hosts, sizes=args.sizes,
+            mean_session_events=args.mean_session_events,
+            giant_sessions=args.giant_sessions, giant_session_events=args.giant_session_events,
+        )
+        runner = BenchmarkRunner(generator, results_path=Path(args.results) if args.results else RESULTS_PATH,
+                                 workers=args.workers or os.cpu_count() or 1, report_format=args.format)
+        history = runner.load_history()
+        run = runner.run(scales)
+    except ValueError as e:
+        print(f"Benchmark failed: {e}")
+        sys.exit(1)
+
+    for case in run["cases"]:
+        rss_mb = (case["peak_rss_bytes"] or 0) / (1 << 20)
+        print(f"{case['case']:>28}: {case['events_per_second']:>10} events/s  "
+              f"({case['sessions']} sessions, {case['sketched_sessions']} sketched, peak RSS {rss_mb:.0f} MiB)")
+        print("    " + ", ".join(f"{phase} {case['phases'][phase]['seconds']}s" for phase in PHASES))
+
+    runner.save(run)
+    print(f"Results appended to {runner.results_path}")
+
+    if args.check:
+        problems = find_regressions(run, history, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+        print("No regressions against the previous run.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
-from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, Field
+import re
+import zlib
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Iterator, Tuple
+import numpy as np
+import polars as pl
+from pydantic import BaseModel, ConfigDict, Field
+from .sketch import reservoir_positions
 
 class EnrichedEvent(BaseModel):
     """
@@ -17,16 +22,202 @@ class EnrichedEvent(BaseModel):
     confidence_score: float = Field(..., ge=0.0, le=1.0)
     data_quality_score: float = Field(..., ge=0.0, le=1.0)
 
-class Session(BaseModel):
+def encode_strings(values: pl.Series) -> Tuple[List[Optional[str]], np.ndarray]:
+    """
+    Dictionary-encodes a string column: (sorted distinct values, int64 codes).
+    Nulls get code -1. Lookups then become numpy indexing into small tables.
+    """
+    vocab = values.drop_nulls().unique().sort()
+    codes = values.cast(pl.Enum(vocab.to_list())).to_physical().cast(pl.Int64).fill_null(-1).to_numpy()
+    return vocab.to_list(), codes
+
+
+# String columns a session can be keyed on, and gap units for SessionSpec.parse
+SESSION_KEY_COLUMNS = ("user", "source_host", "target_host", "event_type", "protocol", "mitre_technique")
+_GAP_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+class SessionSpec(BaseModel):
+    """
+    One sessionization definition: events sharing the `keys` columns belong
+    to the same session while consecutive gaps stay within `gap`.
+    Written as "user:60m", "user+source_host:30m", "source_host:90s".
+    """
+    model_config = ConfigDict(frozen=True)
+
+    keys: Tuple[str, ...] = ("user",)
+    gap: timedelta = timedelta(minutes=60)
+
+    @classmethod
+    def parse(cls, text: str) -> "SessionSpec":
+        keys, _, gap = text.partition(":")
+        match = re.fullmatch(r"(\d+)([smh])", gap.strip() or "60m")
+        if not match:
+            raise ValueError(f"Invalid session gap in {text!r} (expected e.g. 5m, 90s, 2h)")
+        names = tuple(k.strip() for k in keys.split("+"))
+        unknown = [k for k in names if k not in SESSION_KEY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Invalid session key(s) {unknown} in {text!r}; choose from {list(SESSION_KEY_COLUMNS)}")
+        return cls(keys=names, gap=timedelta(seconds=int(match.group(1)) * _GAP_UNITS[match.group(2)]))
+
+    @property
+    def name(self) -> str:
+        seconds = int(self.gap.total_seconds())
+        gap = f"{seconds // 60}m" if seconds % 60 == 0 else f"{seconds}s"
+        return f"{'+'.join(self.keys)}:{gap}"
+
+
+class Session:
     """
     Represents a grouped set of events for an identity within a time window.
+    A view over a contiguous row range of its SessionTable: columns are read
+    as zero-copy slices, and EnrichedEvent objects are only built on demand.
     """
-    session_id: str
-    user: str
-    start_time: datetime
-    end_time: datetime
-    events: List[EnrichedEvent]
-    is_high_priority: bool = False
+    __slots__ = ("table", "offset", "length", "session_id", "user", "start_time", "end_time", "is_high_priority", "_events")
+
+    def __init__(self, table: "SessionTable", offset: int, length: int, session_id: str, user: str,
+                 start_time: datetime, end_time: datetime, is_high_priority: bool = False):
+        self.table = table
+        self.offset = offset
+        self.length = length
+        self.session_id = session_id
+        self.user = user
+        self.start_time = start_time
+        self.end_time = end_time
+        self.is_high_priority = is_high_priority
+        self._events: Optional[List[EnrichedEvent]] = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def column(self, name: str) -> pl.Series:
+        return self.table.events[name].slice(self.offset, self.length)
+
+    def frame(self) -> pl.DataFrame:
+        """The session's rows of the shared table (zero-copy)."""
+        return self.table.events.slice(self.offset, self.length)
+
+    @property
+    def event_ids(self) -> List[str]:
+        return self.column("event_id").to_list()
+
+    def array(self, name: str) -> np.ndarray:
+        """The session's slice of a table-wide numpy column (a view, no copy)."""
+        return self.table.array(name)[self.offset:self.offset + self.length]
+
+    def array_codes(self, name: str) -> np.ndarray:
+        """The session's slice of a string column's table-wide codes (see SessionTable.encoded)."""
+        return self.table.encoded(name)[1][self.offset:self.offset + self.length]
+
+    @property
+    def timestamps_us(self) -> np.ndarray:
+        """Event times as int64 microseconds since the epoch."""
+        return self.array("timestamp")
+
+    @property
+    def techniques(self) -> List[Optional[str]]:
+        return self.column("mitre_technique").to_list()
+
+    @property
+    def confidence_scores(self) -> np.ndarray:
+        return self.array("confidence_score")
+
+    @property
+    def source_hosts(self) -> List[Optional[str]]:
+        return self.column("source_host").to_list()
+
+    @property
+    def target_hosts(self) -> List[Optional[str]]:
+        return self.column("target_host").to_list()
+
+    def materialize(self, limit: Optional[int] = None) -> List[EnrichedEvent]:
+        """Builds EnrichedEvent objects for (the first `limit`) events, e.g. for rendering."""
+        length = self.length if limit is None else min(limit, self.length)
+        rows = self.frame().head(length).to_dicts()
+        return [EnrichedEvent(**row) for row in rows]
+
+    def sample(self, k: int) -> List[EnrichedEvent]:
+        """
+        A reservoir sample of k events in time order, for rendering sessions too
+        large to show. Seeded by session_id, so repeated renders agree.
+        """
+        positions = reservoir_positions(self.length, k, seed=zlib.crc32(self.session_id.encode("utf-8")))
+        rows = self.frame()[positions].to_dicts()
+        return [EnrichedEvent(**row) for row in rows]
+
+    @property
+    def events(self) -> List[EnrichedEvent]:
+        if self._events is None:
+            self._events = self.materialize()
+        return self._events
+
+
+class SessionTable:
+    """
+    Every session of one load, stored column-wise. `events` holds the
+    EnrichedEvent columns sorted by (session key, timestamp), so each session is a
+    contiguous row range; `index` has one row per session with its offset,
+    length and summary fields. Iterating yields lightweight Session views.
+    """
+    INDEX_SCHEMA = {
+        "session_id": pl.String,
+        "user": pl.String,
+        "session_no": pl.Int64,
+        "start_time": pl.Datetime("us", "UTC"),
+        "end_time": pl.Datetime("us", "UTC"),
+        "is_high_priority": pl.Boolean,
+        "offset": pl.Int64,
+        "length": pl.Int64,
+    }
+
+    def __init__(self, events: pl.DataFrame, index: pl.DataFrame):
+        self.events = events
+        self.index = index
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._encoded: Dict[str, Tuple[List[Optional[str]], np.ndarray]] = {}
+        self._view_fields: Optional[List[tuple]] = None
+
+    def array(self, name: str) -> np.ndarray:
+        """
+        Whole-table numpy column, converted once and cached so per-session
+        accessors are plain slices. Timestamps are int64 epoch microseconds.
+        """
+        if name not in self._arrays:
+            column = self.events[name]
+            if name == "timestamp":
+                column = column.dt.epoch("us")
+            self._arrays[name] = column.to_numpy()
+        return self._arrays[name]
+
+    def encoded(self, name: str) -> Tuple[List[Optional[str]], np.ndarray]:
+        """Cached dictionary encoding of a string column (see encode_strings)."""
+        if name not in self._encoded:
+            self._encoded[name] = encode_strings(self.events[name])
+        return self._encoded[name]
+
+    @classmethod
+    def empty(cls) -> "SessionTable":
+        events = pl.DataFrame(schema={name: pl.String for name in EnrichedEvent.model_fields})
+        return cls(events, pl.DataFrame(schema=cls.INDEX_SCHEMA))
+
+    @property
+    def _fields(self) -> List[tuple]:
+        # Plain Python columns so building a view costs a few attribute loads;
+        # converted on first access, since batch scoring never needs them
+        if self._view_fields is None:
+            self._view_fields = list(zip(*(self.index[name].to_list() for name in
+                                           ("offset", "length", "session_id", "user", "start_time", "end_time", "is_high_priority"))))
+        return self._view_fields
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, i: int) -> Session:
+        return Session(self, *self._fields[i])
+
+    def __iter__(self) -> Iterator[Session]:
+        for fields in self._fields:
+            yield Session(self, *fields)
 
 class PathPrediction(BaseModel):
     """
@@ -35,6 +226,14 @@ class PathPrediction(BaseModel):
     next_node: str
     probability: float
 
+class SimilarSession(BaseModel):
+    """
+    A past session resembling the reported one (cosine similarity of feature vectors).
+    """
+    session_id: str
+    similarity: float
+    path_anomaly_score: float
+
 class PathReport(BaseModel):
     """
     Final JSON output report for the Behavioral Path Reconstruction.
@@ -45,3 +244,14 @@ class PathReport(BaseModel):
     path_anomaly_score: float
     prediction_vector: List[PathPrediction]
     generated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Sessions over the chain limit: blast_radius is a sample, these summarize the rest
+    blast_radius_estimate: Optional[int] = None
+    technique_trail: Optional[List[str]] = None
+    # With --baseline: largest deviation (in standard deviations) from the user's usual behaviour
+    baseline_deviation: Optional[float] = None
+    # With --graph: hosts reachable in the global interaction graph beyond the blast radius
+    reachable_hosts: Optional[List[str]] = None
+    reachable_host_count: Optional[int] = None
+    # With --similar: the session's feature vector, and the closest past sessions for alerts
+    feature_vector: Optional[List[float]] = None
+    similar_sessions: Optional[List[SimilarSession]] = None
@@ -1,8 +1,15 @@
-import networkx as nx
+import os
+import tempfile
+import multiprocessing
+import numpy as np
+import polars as pl
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 from datetime import datetime
-from .domain import Session, EnrichedEvent, PathReport, PathPrediction
+from concurrent.futures import ProcessPoolExecutor
+from .domain import Session, SessionTable, PathReport, PathPrediction, encode_strings
+from .baseline import BASELINE_METRICS, BASELINE_Z, deviations, expected_max, session_metrics
+from .sketch import SKETCH_HOSTS, TRAIL_LENGTH, bottom_k, hll_estimate, hll_registers, host_hashes
 
 logger = logging.getLogger(__name__)
 
@@ -48,111 +55,597 @@ MITRE_SEVERITY_WEIGHTS = {
     "Unknown": 1.0 
 }
 
+# Probability Matrix: likely next phases given the last observed phase
+NEXT_STEPS = {
+    "Initial Access": [("Discovery", 0.5), ("Execution", 0.3), ("Persistence", 0.2)],
+    "Execution": [("Privilege Escalation", 0.4), ("Persistence", 0.4), ("Defense Evasion", 0.2)],
+    "Credential Access": [("Lateral Movement", 0.5), ("Discovery", 0.3), ("Collection", 0.2)],
+    "Discovery": [("Lateral Movement", 0.6), ("Collection", 0.3), ("Command and Control", 0.1)],
+    "Lateral Movement": [("Collection", 0.5), ("Exfiltration", 0.3), ("Command and Control", 0.2)],
+    "Command and Control": [("Exfiltration", 0.9), ("Impact", 0.1)],
+    "Exfiltration": [("Impact", 0.9)],
+    "Unknown": [("Discovery", 0.3), ("Credential Access", 0.2), ("Standard User Activity", 0.5)]
+}
+
+# Per-session event counts are kept for these techniques, then one slot for
+# any other technique and one for events without a technique
+FEATURE_TECHNIQUES = tuple(sorted(MITRE_PHASE_MAP))
+TECHNIQUE_SLOTS = len(FEATURE_TECHNIQUES) + 2
+
+# Sessions whose event chain would exceed this many edges (a graph explosion)
+# are summarized with bounded sketches instead of full host lists and chains
+MAX_CHAIN_EDGES = 10000
+
+SESSION_KEY = "_session"
+
+# Below this many events per worker, process start-up outweighs parallel scoring
+MIN_EVENTS_PER_WORKER = 50_000
+
+# Streaming runs score whole sessions in batches of about this many events per worker
+SCORE_BATCH_EVENTS = 1_000_000
+
+# Exploded sessions named in the log per run; the rest are only counted
+SKETCHED_LOG_LIMIT = 20
+
+
+# Per-session running aggregates: everything scoring needs, and everything an
+# incremental run must carry over to extend an open session with new events.
+AGGREGATE_SCHEMA = {
+    "event_count": pl.Int64,
+    "start_time": pl.Datetime("us", "UTC"),
+    "end_time": pl.Datetime("us", "UTC"),
+    "base_risk": pl.Float64,
+    "root_cause_node": pl.String,
+    "blast_radius": pl.List(pl.String),
+    "last_technique": pl.String,
+    "first_source_host": pl.String,
+    "multi_source": pl.Boolean,
+    "max_confidence": pl.Float64,
+    # Oversized sessions only (null otherwise): HyperLogLog host registers and
+    # the last TRAIL_LENGTH meaningful techniques; blast_radius is then a bottom-k sample
+    "host_sketch": pl.List(pl.UInt8),
+    "technique_trail": pl.List(pl.String),
+    # Events per FEATURE_TECHNIQUES slot (TECHNIQUE_SLOTS counts; similarity features)
+    "technique_counts": pl.List(pl.Int64),
+}
+
+
+def event_risk(techniques: List[Optional[str]], tech_codes: np.ndarray, confidence: np.ndarray) -> np.ndarray:
+    """
+    Per-event MITRE severity weighted by confidence (fallback 0.1 for
+    baseline noise); `techniques`/`tech_codes` come from encode_strings.
+    """
+    weights = np.array([MITRE_SEVERITY_WEIGHTS.get(t or "Unknown", 1.0) for t in techniques]
+                       + [MITRE_SEVERITY_WEIGHTS["Unknown"]])[tech_codes]
+    return np.where(confidence > 0.0, weights * confidence, weights * 0.1)
+
+
+def _segment_sums(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, initial: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Per-session sums added strictly left to right, like a Python `+=` loop, so
+    results are bit-identical (np.add.reduceat uses pairwise summation).
+    Step k adds the k-th value of every session longer than k, so there are
+    max(lengths) vectorized steps and len(values) additions in total.
+    `initial` continues earlier folds (an open session extended by new events).
+    """
+    sums = np.zeros(len(lengths)) if initial is None else np.array(initial, dtype=np.float64)
+    order = np.argsort(-lengths, kind="stable")
+    longest_first = lengths[order]
+    for k in range(int(longest_first[0]) if len(lengths) else 0):
+        active = order[:np.searchsorted(-longest_first, -k, side="left")]
+        sums[active] += values[starts[active] + k]
+    return sums
+
+
+def _put(series: pl.Series, rows: np.ndarray, values: pl.Series) -> pl.Series:
+    """series with series[rows[i]] = values[i] (scatter() does not support list columns)."""
+    position = np.zeros(len(series), dtype=np.int64)
+    position[rows] = np.arange(len(rows))
+    mask = np.zeros(len(series), dtype=bool)
+    mask[rows] = True
+    return pl.select(
+        pl.when(pl.Series(mask)).then(values.gather(position)).otherwise(series).alias(series.name)
+    ).to_series()
+
+
+def _blast_radius(events: pl.DataFrame, owners: np.ndarray, sessions: int,
+                  oversized: Optional[np.ndarray] = None) -> Tuple[pl.Series, pl.Series]:
+    """
+    Sorted distinct non-empty source/target hosts of every session.
+    Hosts are deduplicated as integer (session, lexical rank) keys, which is
+    several times faster than per-group string unique().
+    Oversized sessions instead get a SKETCH_HOSTS bottom-k sample plus
+    HyperLogLog registers (second result, null for the other sessions).
+    """
+    vocab, codes = encode_strings(pl.concat([events["source_host"], events["target_host"]]))
+    size = max(len(vocab), 1)
+    keep = np.array([bool(v) for v in vocab] + [False])[codes]  # -1 (null) hits the trailing False
+
+    keys = np.sort(np.tile(owners, 2)[keep] * size + codes[keep])
+    keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+
+    sketch = pl.repeat(None, sessions, dtype=pl.List(pl.UInt8), eager=True).alias("host_sketch")
+    if oversized is not None and oversized.any():
+        capped = oversized[keys // size]
+        big = keys[capped]
+        hashes = host_hashes(vocab)[big % size]
+        slot = np.cumsum(oversized) - 1
+        registers = hll_registers(slot[big // size], hashes, int(oversized.sum()))
+        sketch = _put(sketch, np.flatnonzero(oversized), pl.Series(registers.tolist(), dtype=pl.List(pl.UInt8)))
+
+        # Keep the SKETCH_HOSTS smallest hashes of each oversized session
+        order = np.lexsort((hashes, big // size))
+        ranked, owner_of = big[order], big[order] // size
+        first = np.searchsorted(owner_of, owner_of, side="left")
+        sample = ranked[np.arange(len(ranked)) - first < SKETCH_HOSTS]
+        keys = np.sort(np.r_[keys[~capped], sample])
+
+    grouped = pl.DataFrame({
+        SESSION_KEY: keys // size,
+        "blast_radius": pl.Series(vocab, dtype=pl.String).gather(keys % size),
+    }).group_by(SESSION_KEY, maintain_order=True).agg("blast_radius")
+    if len(grouped) == sessions:
+        return grouped["blast_radius"], sketch
+
+    # Some sessions touched no host at all: give them empty lists
+    position = np.full(sessions, -1, dtype=np.int64)
+    position[grouped[SESSION_KEY].to_numpy()] = np.arange(len(grouped))
+    found = position >= 0
+    return pl.select(
+        pl.when(pl.Series(found))
+        .then(grouped["blast_radius"].gather(np.where(found, position, 0)))
+        .otherwise(pl.lit([], dtype=pl.List(pl.String)))
+        .alias("blast_radius")
+    ).to_series(), sketch
+
+
+def _technique_trails(techniques: pl.Series, meaningful: np.ndarray, starts: np.ndarray,
+                      lengths: np.ndarray, oversized: np.ndarray) -> pl.Series:
+    """The last TRAIL_LENGTH meaningful techniques of each oversized session (null for the others)."""
+    trails = pl.repeat(None, len(lengths), dtype=pl.List(pl.String), eager=True).alias("technique_trail")
+    rows = np.flatnonzero(oversized)
+    if not len(rows):
+        return trails
+    positions = np.flatnonzero(meaningful)
+    kept = []
+    for s in rows:
+        lo, hi = np.searchsorted(positions, [starts[s], starts[s] + lengths[s]])
+        kept.append(techniques.gather(positions[max(lo, hi - TRAIL_LENGTH):hi]).to_list())
+    return _put(trails, rows, pl.Series(kept, dtype=pl.List(pl.String)))
+
+
+def _score_partition(task: Tuple[str, np.ndarray, str]) -> str:
+    """
+    Scores one worker's share of sessions. Executed inside a worker: events
+    arrive and scores leave as Arrow IPC files, never as pickled objects.
+    """
+    events_path, lengths, scores_path = task
+    events = pl.read_ipc(events_path, memory_map=False)
+    SessionScorer().score(events, lengths).write_ipc(scores_path)
+    return scores_path
+
+
+class SessionScorer:
+    """
+    Vectorized risk scoring and forecasting for many sessions at once.
+    Sessions are contiguous row ranges, so every PathReport field comes from
+    column-wide array math plus gathers at session boundaries, with the same
+    arithmetic (and summation order) as scoring events one by one.
+    """
+
+    def __init__(self):
+        self._predictions = {
+            phase: [PathPrediction(next_node=name, probability=prob) for name, prob in steps]
+            for phase, steps in NEXT_STEPS.items()
+        }
+        self._records = {
+            phase: [p.model_dump(mode='json') for p in predictions]
+            for phase, predictions in self._predictions.items()
+        }
+
+    def score(self, events: pl.DataFrame, lengths: Sequence[int]) -> pl.DataFrame:
+        """
+        Scores contiguous sessions: the first lengths[0] rows of `events` are
+        session 0, and so on. Returns one row per session, in order.
+        Oversized sessions (see MAX_CHAIN_EDGES) are scored from sketches and flagged.
+        """
+        return self.finalize(self.aggregate(events, lengths))
+
+    def aggregate(self, events: pl.DataFrame, lengths: Sequence[int], prior: Optional[pl.DataFrame] = None) -> pl.DataFrame:
+        """
+        Per-session AGGREGATE_SCHEMA rows for contiguous sessions. `prior`
+        (aligned with the sessions, null rows where there is none) holds the
+        aggregates of open sessions these events extend; the result then
+        equals aggregating the earlier and new events together.
+        """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        sessions = len(lengths)
+        if sessions == 0:
+            return pl.DataFrame(schema={SESSION_KEY: pl.Int64, **AGGREGATE_SCHEMA})
+        starts = np.cumsum(lengths) - lengths
+        ends = starts + lengths - 1
+        owners = np.repeat(np.arange(sessions, dtype=np.int64), lengths)
+        continued = prior["event_count"].is_not_null().to_numpy() if prior is not None else np.zeros(sessions, dtype=bool)
+        counts = lengths + (prior["event_count"].fill_null(0).to_numpy() if prior is not None else 0)
+        oversized = counts - 1 > MAX_CHAIN_EDGES
+        techniques, tech_codes = encode_strings(events["mitre_technique"])
+
+        confidence = events["confidence_score"].to_numpy()
+        contribution = event_risk(techniques, tech_codes, confidence)
+        initial = prior["base_risk"].fill_null(0.0).to_numpy() if prior is not None else np.zeros(sessions)
+        base_risk = np.empty(sessions)
+        base_risk[~oversized] = _segment_sums(contribution, starts[~oversized], lengths[~oversized], initial[~oversized])
+        for s in np.flatnonzero(oversized):
+            # One streaming pass; accumulate adds left to right like the loop above
+            base_risk[s] = np.add.accumulate(np.r_[initial[s], contribution[starts[s]:ends[s] + 1]])[-1]
+
+        # Last meaningful (non-empty) technique
+        meaningful = np.array([bool(t) for t in techniques] + [False])[tech_codes]
+        last_seen = np.maximum.accumulate(np.where(meaningful, np.arange(len(meaningful)), -1))
+        last_index = last_seen[ends]
+        last_technique = events["mitre_technique"].gather(np.maximum(last_index, 0))
+
+        # Source-host variance and peak confidence (the high-priority signals)
+        _, source_codes = encode_strings(events["source_host"])
+        multi_source = np.logical_or.reduceat(source_codes != source_codes[starts][owners], starts)
+        max_confidence = np.fmax.reduceat(confidence, starts)
+        blast_radius, host_sketch = _blast_radius(events, owners, sessions, oversized)
+        slots = {t: i for i, t in enumerate(FEATURE_TECHNIQUES)}
+        technique_slot = np.array([slots.get(t, TECHNIQUE_SLOTS - 2) if t else TECHNIQUE_SLOTS - 1 for t in techniques]
+                                  + [TECHNIQUE_SLOTS - 1])[tech_codes]
+        technique_counts = np.bincount(owners * TECHNIQUE_SLOTS + technique_slot, minlength=sessions * TECHNIQUE_SLOTS)
+
+        current = pl.DataFrame({
+            SESSION_KEY: np.arange(sessions, dtype=np.int64),
+            "event_count": counts,
+            "start_time": events["timestamp"].gather(starts),
+            "end_time": events["timestamp"].gather(ends),
+            "base_risk": base_risk,
+            "root_cause_node": events["event_id"].gather(starts),
+            "blast_radius": blast_radius,
+            "last_technique": pl.select(pl.when(pl.Series(last_index >= starts)).then(last_technique)).to_series(),
+            "first_source_host": events["source_host"].gather(starts),
+            "multi_source": multi_source,
+            "max_confidence": max_confidence,
+            "host_sketch": host_sketch,
+            "technique_trail": _technique_trails(events["mitre_technique"], meaningful, starts, lengths, oversized),
+            "technique_counts": pl.Series(technique_counts).reshape((sessions, TECHNIQUE_SLOTS)),
+        }).with_columns(pl.col(name).cast(dtype) for name, dtype in AGGREGATE_SCHEMA.items())
+        if prior is None or not continued.any():
+            return current
+
+        # Extend open sessions: earliest fields come from the prior, latest from the new events
+        was = {name: pl.lit(prior[name]) for name in AGGREGATE_SCHEMA}
+        has_prior = pl.lit(pl.Series(continued))
+        merged = current.with_columns(
+            pl.min_horizontal(was["start_time"], pl.col("start_time")).alias("start_time"),
+            pl.max_horizontal(was["end_time"], pl.col("end_time")).alias("end_time"),
+            pl.coalesce(was["root_cause_node"], pl.col("root_cause_node")).alias("root_cause_node"),
+            pl.when(has_prior).then(pl.col("blast_radius").list.concat(was["blast_radius"]).list.unique().list.sort())
+            .otherwise(pl.col("blast_radius")).alias("blast_radius"),
+            pl.coalesce(pl.col("last_technique"), was["last_technique"]).alias("last_technique"),
+            pl.coalesce(was["first_source_host"], pl.col("first_source_host")).alias("first_source_host"),
+            (pl.col("multi_source") | (has_prior & (was["multi_source"] | pl.col("first_source_host").ne_missing(was["first_source_host"]))))
+            .alias("multi_source"),
+            pl.max_horizontal(pl.col("max_confidence"), was["max_confidence"]).alias("max_confidence"),
+        )
+        # Technique counts add up (state written before they existed counts as zeros)
+        rows = np.flatnonzero(continued)
+        earlier = [c if c is not None else [0] * TECHNIQUE_SLOTS for c in prior["technique_counts"].gather(rows).to_list()]
+        totals = np.array(merged["technique_counts"].gather(rows).to_list(), dtype=np.int64) + np.array(earlier, dtype=np.int64)
+        merged = merged.with_columns(_put(merged["technique_counts"], rows, pl.Series(totals.tolist(), dtype=pl.List(pl.Int64))))
+        extended = np.flatnonzero(oversized & continued)
+        return self._merge_sketches(merged, prior, extended) if len(extended) else merged
+
+    def _merge_sketches(self, merged: pl.DataFrame, prior: pl.DataFrame, rows: np.ndarray) -> pl.DataFrame:
+        """
+        Folds carried-over sketches into oversized sessions. A session that
+        only now crossed MAX_CHAIN_EDGES has an exact prior host list (hashed
+        into registers here) and only its last technique as prior trail.
+        """
+        sketches, samples, trails = [], [], []
+        for s in rows.tolist():
+            registers = np.array(merged["host_sketch"][s], dtype=np.uint8)
+            previous = prior["host_sketch"][s]
+            if previous is None:
+                hosts = prior["blast_radius"][s].to_list()
+                previous = hll_registers(np.zeros(len(hosts), dtype=np.int64), host_hashes(hosts), 1)[0]
+            sketches.append(np.maximum(registers, np.asarray(previous, dtype=np.uint8)).tolist())
+            # Union of two bottom-k samples, cut back to k: the bottom-k of the union
+            samples.append(bottom_k(merged["blast_radius"][s].to_list()))
+            earlier = prior["technique_trail"][s]
+            earlier = earlier.to_list() if earlier is not None else [t for t in [prior["last_technique"][s]] if t]
+            trails.append((earlier + merged["technique_trail"][s].to_list())[-TRAIL_LENGTH:])
+        return merged.with_columns(
+            _put(merged["host_sketch"], rows, pl.Series(sketches, dtype=pl.List(pl.UInt8))),
+            _put(merged["blast_radius"], rows, pl.Series(samples, dtype=pl.List(pl.String))),
+            _put(merged["technique_trail"], rows, pl.Series(trails, dtype=pl.List(pl.String))),
+        )
+
+    def finalize(self, aggregates: pl.DataFrame, baseline: Optional[pl.DataFrame] = None) -> pl.DataFrame:
+        """
+        Adds path_anomaly_score, last_phase, is_high_priority, host_count and
+        sketched to aggregate rows. Sketched (oversized) sessions count hosts
+        with their HyperLogLog estimate. With `baseline` (BehaviorBaselines
+        rows aligned with the sessions), the velocity and blast-radius terms
+        only fire for behaviour unusual for that principal, and a
+        baseline_deviation column (largest |z| over the metrics) is added.
+        """
+        counts = aggregates["event_count"].to_numpy()
+        sketched = counts - 1 > MAX_CHAIN_EDGES
+
+        # --- RISK SCORING LENS (Conditioned, not flat) ---
+        # 1. MITRE Severity (accumulated in aggregate)
+        base_risk = aggregates["base_risk"].to_numpy()
+
+        start = aggregates["start_time"].dt.epoch("us").to_numpy()
+        end = aggregates["end_time"].dt.epoch("us").to_numpy()
+        total_duration = (end - start) / 1_000_000
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_delta = total_duration / (counts - 1)
+        host_count = aggregates["blast_radius"].list.len().to_numpy().astype(np.int64)
+        if sketched.any():
+            registers = np.array(aggregates["host_sketch"].filter(pl.Series(sketched)).to_list(), dtype=np.uint8)
+            host_count[sketched] = np.round(hll_estimate(registers)).astype(np.int64)
+
+        machine_speed = avg_delta < 0.2
+        low_and_slow = total_duration / 60 > 600
+        free_hosts = 2
+        extra = []
+        if baseline is not None:
+            # Absolute flags are kept only where the principal's own history says unusual
+            z = deviations(session_metrics(counts, start, end, host_count, base_risk), baseline)
+            machine_speed &= ~(z["avg_delta"] >= -BASELINE_Z)
+            low_and_slow &= ~(z["duration"] <= BASELINE_Z)
+            free_hosts = np.fmax(2, np.floor(expected_max(baseline, "host_count")))
+            deviation = np.fmax.reduce([np.abs(z[m]) for m in BASELINE_METRICS])
+            extra.append(pl.Series("baseline_deviation", np.round(deviation, 2)).fill_nan(None))
+
+        # 2. Velocity Multiplier: machine speed, or low and slow (Advanced Persist)
+        velocity_mult = np.select(
+            [counts <= 1, machine_speed, low_and_slow],
+            [1.0, 1.5, 1.2],
+            default=1.0,
+        )
+
+        # 3. Blast Radius Additive: start penalizing after 2 hosts (or the principal's usual fan-out)
+        blast_penalty = np.maximum(host_count - free_hosts, 0) * 1.5
+
+        final_score = np.minimum(base_risk * velocity_mult + blast_penalty, 100.0)
+
+        # --- FORECASTING LENS: last meaningful state ---
+        techniques, tech_codes = encode_strings(aggregates["last_technique"])
+        phases = np.array([MITRE_PHASE_MAP.get(t, "Unknown") for t in techniques] + ["Unknown"], dtype=object)
+
+        return aggregates.with_columns(
+            pl.Series("path_anomaly_score", final_score),
+            pl.Series("last_phase", phases[tech_codes].tolist(), dtype=pl.String),
+            (pl.col("multi_source") | (pl.col("max_confidence") > 0.8)).fill_null(False).alias("is_high_priority"),
+            pl.Series("host_count", host_count),
+            pl.Series("sketched", sketched),
+            *extra,
+        )
+
+    def score_table(self, table: SessionTable, workers: int = 1) -> pl.DataFrame:
+        """
+        Scores every session of a SessionTable, aligned with its index. With
+        workers > 1, large tables are scored across a process pool; the result
+        is identical to scoring in-process.
+        """
+        lengths = table.index["length"].to_numpy()
+        workers = max(1, min(workers, len(table.events) // MIN_EVENTS_PER_WORKER))
+        if workers == 1:
+            scores = self.score(table.events, lengths)
+        else:
+            scores = self._score_parallel(table, lengths, workers)
+        return scores.with_columns(table.index["session_id"])
+
+    def iter_score_table(self, table: SessionTable, workers: int = 1,
+                         batch_events: int = SCORE_BATCH_EVENTS) -> Iterator[pl.DataFrame]:
+        """
+        score_table over consecutive runs of whole sessions holding about
+        `batch_events` events per worker, so results can be written out while
+        later sessions are still unscored. Sessions are scored independently,
+        so the concatenated batches equal score_table(table, workers),
+        `_session` positions included.
+        """
+        lengths = table.index["length"].to_numpy()
+        offsets = table.index["offset"].to_numpy()
+        if len(lengths) == 0:
+            yield self.score_table(table, workers)
+            return
+        ends = offsets + lengths
+        budget = batch_events * max(1, workers)
+        first = 0
+        while first < len(lengths):
+            start = int(offsets[first])
+            # At least one session per batch, however large
+            last = max(first + 1, int(np.searchsorted(ends, start + budget, side="right")))
+            batch = SessionTable(
+                table.events.slice(start, int(ends[last - 1]) - start),
+                table.index.slice(first, last - first).with_columns(pl.col("offset") - start),
+            )
+            yield self.score_table(batch, workers).with_columns(pl.col(SESSION_KEY) + first)
+            first = last
+
+    def _score_parallel(self, table: SessionTable, lengths: np.ndarray, workers: int) -> pl.DataFrame:
+        # Hash-partition users so each user's sessions stay on one worker
+        owner = (table.index["user"].hash(seed=0) % workers).cast(pl.Int64).to_numpy()
+        order = np.argsort(np.repeat(owner, lengths), kind="stable")
+        events = table.events[order]
+        event_counts = np.bincount(np.repeat(owner, lengths), minlength=workers)
+        event_offsets = np.r_[0, np.cumsum(event_counts)]
+        logger.info(f"Scoring {len(lengths)} sessions across {workers} worker(s)")
+
+        with tempfile.TemporaryDirectory(prefix="tool2-score-") as tmp:
+            tasks, positions = [], []
+            for w in range(workers):
+                if not event_counts[w]:
+                    continue
+                sessions = np.flatnonzero(owner == w)
+                events_path = os.path.join(tmp, f"events-{w}.arrow")
+                events.slice(int(event_offsets[w]), int(event_counts[w])).write_ipc(events_path)
+                tasks.append((events_path, lengths[sessions], os.path.join(tmp, f"scores-{w}.arrow")))
+                positions.append(sessions)
+
+            # Spawned, not forked: a forked copy of polars' thread pool can deadlock
+            with ProcessPoolExecutor(max_workers=len(tasks), mp_context=multiprocessing.get_context("spawn")) as pool:
+                paths = list(pool.map(_score_partition, tasks))
+            # Worker rows are numbered within their partition; merge back into table order
+            parts = [pl.read_ipc(path, memory_map=False).with_columns(pl.Series(SESSION_KEY, pos))
+                     for path, pos in zip(paths, positions)]
+        return pl.concat(parts).sort(SESSION_KEY)
+
+    def predictions(self, phase: str) -> List[PathPrediction]:
+        return self._predictions.get(phase, self._predictions["Unknown"])
+
+    def to_record(self, row: Dict[str, Any], generated_at: datetime) -> Dict[str, Any]:
+        """
+        JSON-ready equivalent of to_report(row).model_dump(mode='json'),
+        without building a model per session. Sketch fields only appear
+        for sketched sessions, baseline, reachability and similarity fields
+        only with --baseline, --graph and --similar.
+        """
+        record = {
+            "session_id": row["session_id"],
+            "root_cause_node": row["root_cause_node"],
+            "blast_radius": row["blast_radius"],
+            "path_anomaly_score": row["path_anomaly_score"],
+            "prediction_vector": self._records.get(row["last_phase"], self._records["Unknown"]),
+            "generated_at": generated_at.isoformat(),
+        }
+        if row["sketched"]:
+            record["blast_radius_estimate"] = row["host_count"]
+            record["technique_trail"] = row["technique_trail"]
+        if "baseline_deviation" in row:
+            record["baseline_deviation"] = row["baseline_deviation"]
+        if "reachable_hosts" in row:
+            record["reachable_hosts"] = row["reachable_hosts"]
+            record["reachable_host_count"] = row["reachable_host_count"]
+        if "feature_vector" in row:
+            record["feature_vector"] = row["feature_vector"]
+            if row["similar_sessions"] is not None:
+                record["similar_sessions"] = row["similar_sessions"]
+        return record
+
+    def to_report(self, row: Dict[str, Any]) -> PathReport:
+        """Builds the PathReport for one row of score()/score_table()."""
+        return PathReport(
+            session_id=row["session_id"],
+            root_cause_node=row["root_cause_node"],
+            blast_radius=row["blast_radius"],
+            path_anomaly_score=row["path_anomaly_score"],
+            prediction_vector=self.predictions(row["last_phase"]),
+            blast_radius_estimate=row["host_count"] if row["sketched"] else None,
+            technique_trail=row["technique_trail"] if row["sketched"] else None,
+            baseline_deviation=row.get("baseline_deviation"),
+            reachable_hosts=row.get("reachable_hosts"),
+            reachable_host_count=row.get("reachable_host_count"),
+            feature_vector=row.get("feature_vector"),
+            similar_sessions=row.get("similar_sessions"),
+        )
+
+
+class TemporalChain:
+    """
+    Directed temporal graph of one session, stored as flat numpy arrays.
+    Nodes are the session's events in time order; their timestamps and
+    technique / source-host codes are views into the shared SessionTable.
+    Edges are parallel `edge_src`, `edge_dst` and `delta_t` arrays: the
+    consecutive-event chain for now, with add_edges() for branching
+    (e.g. host -> host) edges later.
+    """
+    __slots__ = ("session", "timestamps", "techniques", "hosts", "edge_src", "edge_dst", "delta_t")
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.timestamps = session.timestamps_us
+        self.techniques = session.array_codes("mitre_technique")
+        self.hosts = session.array_codes("source_host")
+
+        # Linear chain: event i -> event i+1, delta_t in seconds
+        n = len(session)
+        self.edge_src = np.arange(n - 1, dtype=np.int64)
+        self.edge_dst = self.edge_src + 1
+        self.delta_t = np.diff(self.timestamps) / 1_000_000
+
+    @classmethod
+    def from_session(cls, session: Session, max_edges: int = MAX_CHAIN_EDGES) -> Optional["TemporalChain"]:
+        """Builds the chain, or returns None before allocating anything if it would exceed max_edges."""
+        if len(session) - 1 > max_edges:
+            return None
+        return cls(session)
+
+    def number_of_nodes(self) -> int:
+        return len(self.timestamps)
+
+    def number_of_edges(self) -> int:
+        return len(self.edge_src)
+
+    def add_edges(self, src: np.ndarray, dst: np.ndarray):
+        """Adds edges between node positions; delta_t is derived from the node timestamps."""
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        self.edge_src = np.concatenate([self.edge_src, src])
+        self.edge_dst = np.concatenate([self.edge_dst, dst])
+        self.delta_t = np.concatenate([self.delta_t, (self.timestamps[dst] - self.timestamps[src]) / 1_000_000])
+
+    def phases(self) -> List[str]:
+        """Kill-chain phase of every node ("Unknown" for unmapped or missing techniques)."""
+        vocab, _ = self.session.table.encoded("mitre_technique")
+        table = np.array([MITRE_PHASE_MAP.get(t, "Unknown") for t in vocab] + ["Unknown"], dtype=object)
+        return table[self.techniques].tolist()
+
+
 class GraphEngine:
     def __init__(self):
-        self.graph = nx.MultiDiGraph()
+        self.chain: Optional[TemporalChain] = None
+        self.scorer = SessionScorer()
     
     def build_and_analyze(self, session: Session) -> Optional[PathReport]:
         """
         Constructs a Directed Temporal Graph for the session and analyzes it.
+        Works on the session's columns; events are already in time order.
         """
-        self.graph.clear()
-        events = sorted(session.events, key=lambda x: x.timestamp)
-        
-        if not events:
+        if len(session) == 0:
             return None
 
-        # Build Graph
-        for i, event in enumerate(events):
-            technique = event.mitre_technique or "Unknown"
-            phase = MITRE_PHASE_MAP.get(technique, "Unknown")
-            
-            self.graph.add_node(
-                event.event_id,
-                timestamp=event.timestamp,
-                host=event.source_host,
-                technique=technique,
-                phase=phase
-            )
-            
-            if i > 0:
-                prev_event = events[i-1]
-                delta_t = (event.timestamp - prev_event.timestamp).total_seconds()
-                self.graph.add_edge(prev_event.event_id, event.event_id, delta_t=delta_t)
-
-        if self.graph.number_of_edges() > 10000:
-            logger.critical(f"Graph Explosion detected for session {session.session_id}! Pruning...")
-            return None
+        # The explosion guard runs before the chain is allocated
+        self.chain = TemporalChain.from_session(session)
+        if self.chain is None:
+            logger.critical(f"Graph Explosion detected for session {session.session_id}! Summarizing with sketches...")
 
         return self._compute_metrics(session)
 
     def _compute_metrics(self, session: Session) -> PathReport:
-        # --- RISK SCORING LENS (Conditioned, not flat) ---
-        base_risk = 0.0
-        events = session.events
-        
-        # 1. MITRE Severity Accumulation
-        for e in events:
-            tech = e.mitre_technique or "Unknown"
-            weight = MITRE_SEVERITY_WEIGHTS.get(tech, 1.0)
-            
-            # Weighted by Confidence
-            # If AI is 90% sure it's T1558, add full weight. If 0.1, ignore.
-            if e.confidence_score > 0.0:
-                base_risk += weight * e.confidence_score
-            else:
-                # Fallback for baseline noise (min 0.5 if technique present)
-                base_risk += weight * 0.1
-
-        # 2. Velocity Multiplier (Superhuman speed)
-        velocity_mult = 1.0
-        if len(events) > 1:
-            total_duration = (events[-1].timestamp - events[0].timestamp).total_seconds()
-            avg_delta = total_duration / (len(events) - 1)
-            time_span_minutes = total_duration / 60
-            
-            if avg_delta < 0.2: # Machine speed
-                velocity_mult = 1.5
-            elif time_span_minutes > 600: # Low and slow (Advanced Persist)
-                velocity_mult = 1.2
-        
-        # 3. Blast Radius Additive
-        touched_hosts = set()
-        for e in events:
-            if e.source_host: touched_hosts.add(e.source_host)
-            if e.target_host: touched_hosts.add(e.target_host)
-        
-        blast_penalty = max(0, len(touched_hosts) - 2) * 1.5 # Start penalizing after 2 hosts
-        
-        final_score = (base_risk * velocity_mult) + blast_penalty
-        
-        # --- FORECASTING LENS ---
-        # Get the last meaningful state
-        phases = [MITRE_PHASE_MAP.get(e.mitre_technique, "Unknown") for e in events if e.mitre_technique]
-        last_phase = phases[-1] if phases else "Unknown"
-        
-        # Probability Matrix
-        next_steps_map = {
-            "Initial Access": [("Discovery", 0.5), ("Execution", 0.3), ("Persistence", 0.2)],
-            "Execution": [("Privilege Escalation", 0.4), ("Persistence", 0.4), ("Defense Evasion", 0.2)],
-            "Credential Access": [("Lateral Movement", 0.5), ("Discovery", 0.3), ("Collection", 0.2)],
-            "Discovery": [("Lateral Movement", 0.6), ("Collection", 0.3), ("Command and Control", 0.1)],
-            "Lateral Movement": [("Collection", 0.5), ("Exfiltration", 0.3), ("Command and Control", 0.2)],
-            "Command and Control": [("Exfiltration", 0.9), ("Impact", 0.1)],
-            "Exfiltration": [("Impact", 0.9)],
-            "Unknown": [("Discovery", 0.3), ("Credential Access", 0.2), ("Standard User Activity", 0.5)]
-        }
-        
-        predictions = []
-        potential_next = next_steps_map.get(last_phase, next_steps_map["Unknown"])
-        
-        for name, prob in potential_next:
-            predictions.append(PathPrediction(next_node=name, probability=prob))
-            
-        return PathReport(
-            session_id=session.session_id,
-            root_cause_node=events[0].event_id,
-            blast_radius=list(touched_hosts),
-            path_anomaly_score=min(final_score, 100.0), # Normalize 0-100? Or 0-10? Let's assume 0-100 for granularity
-            prediction_vector=predictions
-        )
+        row = self.scorer.score(session.frame(), [len(session)]).row(0, named=True)
+        row["session_id"] = session.session_id
+        return self.scorer.to_report(row)
+
+    def analyze_table(self, table: SessionTable, workers: int = 1) -> pl.DataFrame:
+        """
+        Scores all sessions at once (see SessionScorer.score_table). Sketched
+        sessions are logged; `_session` is each row's position in `table`.
+        """
+        return self.log_sketched(self.scorer.score_table(table, workers))
+
+    def iter_analyze(self, table: SessionTable, workers: int = 1) -> Iterator[pl.DataFrame]:
+        """analyze_table batch by batch (see SessionScorer.iter_score_table)."""
+        return self.log_sketched_batches(self.scorer.iter_score_table(table, workers))
+
+    def log_sketched(self, scores: pl.DataFrame) -> pl.DataFrame:
+        """Logs sessions that exploded the chain limit and were scored from sketches."""
+        (scores,) = self.log_sketched_batches([scores])
+        return scores
+
+    def log_sketched_batches(self, batches: Iterable[pl.DataFrame]) -> Iterator[pl.DataFrame]:
+        """Passes score batches through, logging their exploded sessions as in log_sketched."""
+        total = 0
+        for scores in batches:
+            sketched = scores.filter(pl.col("sketched"))["session_id"]
+            for session_id in sketched.head(max(0, SKETCHED_LOG_LIMIT - total)):
+                logger.critical(f"Graph Explosion detected for session {session_id}! Summarizing with sketches...")
+            total += len(sketched)
+            yield scores
+        if total > SKETCHED_LOG_LIMIT:
+            logger.critical(f"... and {total - SKETCHED_LOG_LIMIT} more exploded sessions summarized")
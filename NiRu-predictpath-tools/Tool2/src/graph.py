@@ -0,0 +1,280 @@
+import os
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRAPH_DIR = Path(__file__).resolve().parent.parent / "data" / "interaction_graph"
+
+# Entity kinds
+USER, HOST = 0, 1
+
+ENTITY_SCHEMA = {"name": pl.String, "kind": pl.UInt8}
+
+# Reachable hosts listed per report (nearest first); the count is always exact
+REACHABLE_LIST_CAP = 100
+
+# Memoized per-entity reach bitmaps are dropped once they exceed this size
+REACH_CACHE_BYTES = 256 << 20
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _set_bits(bitmap: np.ndarray, limit: int) -> np.ndarray:
+    """Ids of the first (at least `limit`, if present) set bits of a packed bitmap, ascending."""
+    nonzero = np.flatnonzero(bitmap)[:limit]
+    bits = np.unpackbits(bitmap[nonzero]).reshape(-1, 8).astype(bool)
+    return (nonzero[:, None] * 8 + np.arange(8))[bits]
+
+
+class InteractionGraph:
+    """
+    Global user/host interaction graph across runs, as CSR arrays over integer
+    entity ids. Ids are row positions in `entities` (append-only, so they stay
+    stable between runs). Edges are directed and weighted by event count; an
+    event where `user` authenticates from `source_host` to `target_host` adds
+    user -> source, user -> target, source -> target (lateral movement) and
+    target -> user (the user's credentials are now exposed on target).
+    """
+
+    def __init__(self, entities: Optional[pl.DataFrame] = None, indptr: Optional[np.ndarray] = None,
+                 indices: Optional[np.ndarray] = None, weights: Optional[np.ndarray] = None):
+        self.entities = entities if entities is not None else pl.DataFrame(schema=ENTITY_SCHEMA)
+        n = len(self.entities)
+        self.indptr = indptr if indptr is not None else np.zeros(n + 1, dtype=np.int64)
+        self.indices = indices if indices is not None else np.zeros(0, dtype=np.int64)
+        self.weights = weights if weights is not None else np.zeros(0, dtype=np.int64)
+        self._lookup: Optional[Dict[Tuple[int, str], int]] = None
+        # Visit stamps, reused across queries so a BFS never clears an O(n) array
+        self._seen = np.zeros(n, dtype=np.int64)
+        self._stamp = 0
+        self._reach_cache: Dict[Tuple[int, int], np.ndarray] = {}
+        self._reach_cache_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    @property
+    def number_of_edges(self) -> int:
+        return len(self.indices)
+
+    def ids(self, names: Iterable[Optional[str]], kind: int) -> np.ndarray:
+        """Entity ids for names of one kind; -1 for unknown names."""
+        if self._lookup is None:
+            self._lookup = {
+                (k, name): i for i, (name, k) in enumerate(zip(self.entities["name"].to_list(), self.entities["kind"].to_list()))
+            }
+        return np.array([self._lookup.get((kind, name), -1) for name in names], dtype=np.int64)
+
+    def name(self, entity: int) -> str:
+        return self.entities["name"][int(entity)]
+
+    def update(self, events: pl.DataFrame) -> int:
+        """
+        Adds the interactions of `events` (user, source_host, target_host).
+        New entities are appended, then the new edges are merged into the CSR
+        arrays in one sort. Returns the number of edges added.
+        """
+        relations = [("user", USER, "source_host", HOST), ("user", USER, "target_host", HOST),
+                     ("source_host", HOST, "target_host", HOST), ("target_host", HOST, "user", USER)]
+        seen = pl.concat([
+            events.select(pl.col(column).alias("name"), pl.lit(kind, dtype=pl.UInt8).alias("kind"))
+            for column, kind in (("user", USER), ("source_host", HOST), ("target_host", HOST))
+        ]).filter(pl.col("name").is_not_null() & (pl.col("name") != "")).unique().sort("kind", "name")
+        added = seen.join(self.entities, on=["name", "kind"], how="anti")
+        self.entities = pl.concat([self.entities, added])
+        n = len(self.entities)
+        ids = self.entities.with_row_index("id").with_columns(pl.col("id").cast(pl.Int64))
+
+        def resolve(column: str, kind: int) -> np.ndarray:
+            keyed = events.select(pl.col(column).alias("name"), pl.lit(kind, dtype=pl.UInt8).alias("kind"))
+            return keyed.join(ids, on=["name", "kind"], how="left")["id"].fill_null(-1).to_numpy()
+
+        resolved = {(column, kind): resolve(column, kind) for column, kind in (("user", USER), ("source_host", HOST), ("target_host", HOST))}
+        src = np.concatenate([resolved[(a, ka)] for a, ka, _, _ in relations])
+        dst = np.concatenate([resolved[(b, kb)] for _, _, b, kb in relations])
+        valid = (src >= 0) & (dst >= 0) & (src != dst)
+        new_keys = src[valid] * n + dst[valid]
+
+        # Existing edges re-keyed for the grown id space, then summed with the new ones
+        rows = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+        keys = np.r_[rows * n + self.indices, new_keys]
+        weights = np.r_[self.weights, np.ones(len(new_keys), dtype=np.int64)]
+        order = np.argsort(keys, kind="stable")
+        keys, weights = keys[order], weights[order]
+        first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+        before = self.number_of_edges
+
+        self.indices = keys[first] % n if n else keys[first]
+        self.weights = np.add.reduceat(weights, first) if len(first) else weights
+        self.indptr = np.r_[0, np.cumsum(np.bincount(keys[first] // max(n, 1), minlength=n))].astype(np.int64)
+        self._lookup = None
+        self._seen = np.zeros(n, dtype=np.int64)
+        self._stamp = 0
+        self._reach_cache: Dict[Tuple[int, int], np.ndarray] = {}
+        self._reach_cache_bytes = 0
+        return self.number_of_edges - before
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=len(self))
+
+    def neighbors(self, entity: int) -> np.ndarray:
+        return self.indices[self.indptr[entity]:self.indptr[entity + 1]]
+
+    def _layers(self, seeds: np.ndarray, hops: int) -> List[np.ndarray]:
+        """Entities first reached at each hop 1..hops from `seeds` (sorted ids per hop)."""
+        self._stamp += 1
+        seeds = np.asarray(seeds, dtype=np.int64)
+        frontier = seeds[seeds >= 0]
+        self._seen[frontier] = self._stamp
+        layers = []
+        for _ in range(hops):
+            starts = self.indptr[frontier]
+            counts = self.indptr[frontier + 1] - starts
+            total = int(counts.sum())
+            if total == 0:
+                break
+            positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+            found = self.indices[positions]
+            found = found[self._seen[found] != self._stamp]
+            if len(found) * 8 > len(self):
+                # Wide frontier: a dense mark pass beats sorting the duplicates
+                mask = np.zeros(len(self), dtype=bool)
+                mask[found] = True
+                frontier = np.flatnonzero(mask)
+            else:
+                found = np.sort(found)
+                frontier = found[np.r_[True, found[1:] != found[:-1]]] if len(found) else found
+            self._seen[frontier] = self._stamp
+            layers.append(frontier)
+        return layers
+
+    def reachable(self, seeds: np.ndarray, hops: int) -> np.ndarray:
+        """
+        Entities reachable from `seeds` in 1..hops steps (seeds excluded),
+        nearest hop first. Each hop expands the whole frontier with one CSR
+        gather; visited marks are stamps, so a query costs O(visited edges).
+        """
+        layers = self._layers(seeds, hops)
+        return np.concatenate(layers) if layers else np.zeros(0, dtype=np.int64)
+
+    def _reach_bitmaps(self, entity: int, hops: int) -> np.ndarray:
+        """
+        Packed bitmaps (hops x ceil(n/8)) of the entities within 1..h hops of
+        one entity, memoized: sessions share users and hub hosts, so each
+        entity is expanded once per run instead of once per session.
+        """
+        bitmaps = self._reach_cache.get((entity, hops))
+        if bitmaps is None:
+            if self._reach_cache_bytes > REACH_CACHE_BYTES:
+                self._reach_cache.clear()
+                self._reach_cache_bytes = 0
+            within = np.zeros((hops, len(self)), dtype=bool)
+            for h, layer in enumerate(self._layers(np.array([entity]), hops)):
+                within[h:, layer] = True
+            bitmaps = np.packbits(within, axis=1)
+            self._reach_cache[(entity, hops)] = bitmaps
+            self._reach_cache_bytes += bitmaps.nbytes
+        return bitmaps
+
+    def reachable_hosts(self, scores: pl.DataFrame, users: pl.Series, hops: int) -> pl.DataFrame:
+        """
+        Adds `reachable_hosts` (nearest first, at most REACHABLE_LIST_CAP) and
+        `reachable_host_count` to score rows: hosts reachable within `hops`
+        from the session's user (`users`, aligned with `scores`) and its
+        blast-radius hosts, beyond the blast radius itself. A set's distance
+        to a host is the minimum over its seeds, so OR-ing the seeds' memoized
+        per-hop bitmaps gives the exact hop layers.
+        """
+        users = self.ids(users.to_list(), USER)
+        host_bits = np.packbits(self.entities["kind"].to_numpy() == HOST)
+        names = self.entities["name"].to_list()
+        lists, counts = [], []
+        for user, blast_radius in zip(users.tolist(), scores["blast_radius"].to_list()):
+            seeds = self.ids(blast_radius, HOST)
+            seeds = seeds[seeds >= 0]
+            if hops <= 0 or (user < 0 and len(seeds) == 0):
+                lists.append([])
+                counts.append(0)
+                continue
+            within = host_bits & self._reach_bitmaps(user if user >= 0 else int(seeds[0]), hops)
+            for entity in seeds.tolist():
+                within |= host_bits & self._reach_bitmaps(entity, hops)
+            # Blast-radius hosts are distinct hosts; discount those reachable from other seeds
+            seed_bits = (within[-1][seeds >> 3] >> (7 - (seeds & 7)).astype(np.uint8)) & 1
+            counts.append(int(_POPCOUNT[within[-1]].sum()) - int(seed_bits.sum()))
+            found, earlier, excluded = [], None, set(seeds.tolist())
+            for bitmap in within:
+                layer = _set_bits(bitmap if earlier is None else bitmap & ~earlier, REACHABLE_LIST_CAP + len(seeds))
+                found.extend(i for i in layer.tolist() if i not in excluded)
+                if len(found) >= REACHABLE_LIST_CAP:
+                    break
+                earlier = bitmap
+            lists.append([names[i] for i in found[:REACHABLE_LIST_CAP]])
+        return scores.with_columns(
+            pl.Series("reachable_hosts", lists, dtype=pl.List(pl.String)),
+            pl.Series("reachable_host_count", counts, dtype=pl.Int64),
+        )
+
+
+class GraphStore:
+    """
+    Persists the InteractionGraph (entities.parquet + adjacency.npz) and the
+    Tool1 files already folded into it, so every event is counted once.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or DEFAULT_GRAPH_DIR)
+        self.entities_path = self.root / "entities.parquet"
+        self.adjacency_path = self.root / "adjacency.npz"
+        self.files_path = self.root / "processed_files.parquet"
+
+    def load(self) -> Tuple[InteractionGraph, Set[str]]:
+        if not self.adjacency_path.exists():
+            return InteractionGraph(), set()
+        with np.load(self.adjacency_path) as arrays:
+            graph = InteractionGraph(pl.read_parquet(self.entities_path), arrays["indptr"], arrays["indices"], arrays["weights"])
+        files = set(pl.read_parquet(self.files_path)["file"].to_list()) if self.files_path.exists() else set()
+        return graph, files
+
+    def save(self, graph: InteractionGraph, files: Set[str]):
+        self.root.mkdir(parents=True, exist_ok=True)
+        staged = []
+        for path, write in (
+            (self.entities_path, lambda tmp: graph.entities.write_parquet(tmp)),
+            (self.adjacency_path, lambda tmp: np.savez(tmp, indptr=graph.indptr, indices=graph.indices, weights=graph.weights)),
+            (self.files_path, lambda tmp: pl.DataFrame({"file": sorted(files)}, schema={"file": pl.String}).write_parquet(tmp)),
+        ):
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                write(f)
+            staged.append((tmp, path))
+        # Files manifest last: a crash in between re-reads files rather than losing them
+        for tmp, path in staged:
+            os.replace(tmp, path)
+        logger.info(f"Interaction graph saved: {len(graph)} entities, {graph.number_of_edges} edges")
+
+
+def update_graph(store: GraphStore, parquet_path: str) -> Tuple[InteractionGraph, Set[str], int]:
+    """
+    Loads the stored graph and folds in Tool1 files it has not seen (all of
+    their events, regardless of run filters). Returns the graph, the updated
+    file manifest to save, and the number of new files.
+    """
+    from .ingest import DataIngester, file_key
+
+    graph, processed = store.load()
+    ingester = DataIngester(parquet_path)
+    files = [f for f in ingester.resolve_files(prune=False) if file_key(f) not in processed]
+    lf = ingester.scan(files)
+    if lf is not None:
+        events = lf.select("user", "source_host", "target_host").collect()
+        added = graph.update(events)
+        logger.info(f"Interaction graph: {len(events)} event(s) from {len(files)} new file(s), {added} new edge(s)")
+    return graph, processed | {file_key(f) for f in files}, len(files)
@@ -1,128 +1,321 @@
 import polars as pl
-from typing import List, Dict, Any
-from datetime import timedelta
+import glob
+import re
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple
+from datetime import date, datetime, timedelta, timezone
 import logging
-from .domain import EnrichedEvent, Session
+import numpy as np
+from .domain import EnrichedEvent, SessionSpec, SessionTable, encode_strings
 
 logger = logging.getLogger(__name__)
 
+# The only columns Tool2 reads from Tool1's output (raw_source, hashes etc. are never loaded)
+EVENT_COLUMNS = list(EnrichedEvent.model_fields)
+
+# Tool1 writes Hive-style partitions: <OUTPUT_DIR>/date=YYYY-MM-DD/events_*.parquet
+_PARTITION_RE = re.compile(r"date=(\d{4}-\d{2}-\d{2})")
+
+
+def parse_bound(value: Optional[str], end_of_day: bool = False) -> Optional[datetime]:
+    """
+    Parses a --since/--until value (YYYY-MM-DD or ISO datetime). Naive values are UTC,
+    matching Tool1's timestamps. With end_of_day, a bare date covers that whole day.
+    """
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1) - timedelta(microseconds=1)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def file_key(path: Path) -> str:
+    """Stable identity of a Tool1 output file (they are written once, never modified)."""
+    return Path(path).resolve().as_posix()
+
+
 class DataIngester:
-    def __init__(self, parquet_path: str):
+    """
+    Lazily loads Tool1 events from a Parquet file, a glob, or Tool1's
+    partitioned OUTPUT_DIR. Partitions outside [since, until] are skipped by
+    path; the time window and user/host filters are pushed into the Parquet
+    scan, and only EVENT_COLUMNS are read.
+    """
+
+    def __init__(
+        self,
+        parquet_path: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        users: Optional[Iterable[str]] = None,
+        hosts: Optional[Iterable[str]] = None,
+    ):
         self.parquet_path = parquet_path
+        self.since = since
+        self.until = until
+        self.users = list(users) if users else None
+        self.hosts = list(hosts) if hosts else None
+        # file_key()s of files already consumed (incremental runs), never re-read
+        self.skip_files: Set[str] = set()
+
+    def resolve_files(self, prune: bool = True) -> List[Path]:
+        """
+        Parquet files under the source, pruned to the partitions that overlap
+        the time window and minus skip_files. prune=False lists every file.
+        """
+        source = str(self.parquet_path)
+        if glob.has_magic(source):
+            files = [Path(p) for p in glob.glob(source, recursive=True)]
+        elif Path(source).is_dir():
+            files = list(Path(source).rglob("*.parquet"))
+        else:
+            files = [Path(source)] if Path(source).exists() else []
+
+        if not prune:
+            return sorted(files)
+        kept = [f for f in files if self._in_window(f)]
+        if len(kept) < len(files):
+            logger.info(f"Partition pruning skipped {len(files) - len(kept)} of {len(files)} file(s)")
+        if self.skip_files:
+            fresh = [f for f in kept if file_key(f) not in self.skip_files]
+            logger.info(f"{len(kept) - len(fresh)} file(s) already processed, {len(fresh)} new")
+            kept = fresh
+        return sorted(kept)
+
+    def _in_window(self, path: Path) -> bool:
+        match = _PARTITION_RE.search(path.as_posix())
+        if not match:
+            return True
+        # Partition dates are UTC dates of the event timestamps
+        day = date.fromisoformat(match.group(1))
+        if self.since and day < self.since.date():
+            return False
+        if self.until and day > self.until.date():
+            return False
+        return True
+
+    def scan(self, files: Optional[List[Path]] = None) -> Optional[pl.LazyFrame]:
+        """
+        Builds the filtered, projected scan (over resolve_files() unless
+        `files` is given). Returns None when no file matches.
+        """
+        files = self.resolve_files() if files is None else files
+        if not files:
+            return None
+
+        lf = pl.scan_parquet(files).select(EVENT_COLUMNS)
+
+        # Compare against literals of the column's own timezone-awareness
+        ts_dtype = lf.collect_schema()["timestamp"]
+        aware = isinstance(ts_dtype, pl.Datetime) and ts_dtype.time_zone is not None
+
+        def bound(value: datetime) -> datetime:
+            return value if aware else value.replace(tzinfo=None)
+
+        if self.since:
+            lf = lf.filter(pl.col("timestamp") >= bound(self.since))
+        if self.until:
+            lf = lf.filter(pl.col("timestamp") <= bound(self.until))
+        if self.users:
+            lf = lf.filter(pl.col("user").is_in(self.users))
+        if self.hosts:
+            lf = lf.filter(pl.col("source_host").is_in(self.hosts) | pl.col("target_host").is_in(self.hosts))
+        return lf
 
     def verify_integrity(self) -> bool:
         """
-        Placeholder for cryptographic chain verification.
-        In a real scenario, this would re-hash the event chain to ensure no tampering.
-        For now, we verify the file exists and is readable.
+        Placeholder for cryptographic chain verification (see Tool1 `verify`).
+        Checks that every matched file is readable Parquet with the columns
+        Tool2 needs; only footers are read, never the data.
         """
+        files = self.resolve_files()
+        if not files:
+            if self.resolve_files(prune=False):
+                logger.warning(f"No unprocessed partitions under {self.parquet_path} overlap the requested window")
+                return True
+            logger.error(f"Integrity check failed: no Parquet files found for {self.parquet_path}")
+            return False
         try:
-            pl.scan_parquet(self.parquet_path).collect()
-            logger.info(f"Integrity check passed for {self.parquet_path}")
+            for path in files:
+                missing = set(EVENT_COLUMNS) - set(pl.read_parquet_schema(path))
+                if missing:
+                    logger.error(f"Integrity check failed: {path} is missing {sorted(missing)}")
+                    return False
+            logger.info(f"Integrity check passed for {len(files)} file(s) under {self.parquet_path}")
             return True
         except Exception as e:
             logger.error(f"Integrity check failed: {e}")
             return False
 
-    def load_sessions(self, time_window_params: str = "60m") -> List[Session]:
+    def load_sessions(self, time_window_params: str = "60m") -> SessionTable:
         """
-        Loads data, groups by user, and creates session windows.
+        Loads data, groups by user, and creates session windows separated by
+        gaps longer than `time_window_params` (e.g. "60m").
+        Returns a columnar SessionTable; no per-event objects are built here.
         """
+        spec = SessionSpec.parse(f"user:{time_window_params}")
+        return self.load_session_sets([spec])[spec]
+
+    def load_session_sets(self, specs: Iterable[SessionSpec]) -> Dict[SessionSpec, SessionTable]:
+        """Reads events once and sessionizes them under every spec (see sessionize_many)."""
+        specs = list(specs)
         logger.info("Loading Parquet data...")
         try:
-            df = pl.read_parquet(self.parquet_path)
+            lf = self.scan()
+            if lf is None:
+                logger.error(f"No Parquet files found for {self.parquet_path}")
+                return {spec: SessionTable.empty() for spec in specs}
+            df = lf.collect()
         except Exception as e:
             logger.error(f"Failed to load parquet file: {e}")
-            return []
-
-        # Ensure timestamp is datetime
-        if "timestamp" not in df.columns:
-            # Fallback if timestamp is missing or named differently (e.g. parsed from ID?)
-            # Tool 1 logs implied timestamp exists. Let's assume 'timestamp' column.
-            # If not, we might need to derive it.
-            logger.warning("Column 'timestamp' not found, attempting detection...")
-            # For now, return empty if crucial data missing
-            return []
-
-        df = df.sort("timestamp")
-        
-        # State-Aware Sessionization
-        # We define a session as: Same user, events within 60 min gap
-        # Polars dynamic grouping can handle this.
-        
-        # However, for strict detailed control and mapping to our domain objects, 
-        # iterating might be safer for complex logic, but Polars is faster.
-        # Let's use Polars to assign session IDs.
-        
-        # 1. Sort by user, timestamp
-        df = df.sort(["user", "timestamp"])
-        
-        # 2. Calculate time difference between consecutive events for each user
-        df = df.with_columns([
-            pl.col("timestamp").diff().over("user").alias("time_diff")
-        ])
-        
-        # 3. Mark start of new session if time_diff > window
-        window_delta = timedelta(minutes=60) # simplistic check, Polars uses durations
-        
-        # Convert duration to us/ms for comparison if needed, or use Polars dynamic
-        df = df.with_columns(
-            (pl.col("time_diff").fill_null(pl.duration(days=365)) > pl.duration(minutes=60)).cum_sum().over("user").alias("session_group_id")
-        )
-        
-        # Create unique session ID
-        df = df.with_columns(
-            pl.format("{}_{}", pl.col("user"), pl.col("session_group_id")).alias("unique_session_id")
+            return {spec: SessionTable.empty() for spec in specs}
+        logger.info(f"Loaded {len(df)} events")
+        return sessionize_many(df, specs)
+
+
+def _key_codes(df: pl.DataFrame, keys: Tuple[str, ...]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    Integer code per event for a (multi-column) session key, ordered like the
+    sorted key values; nulls sort first. Also returns the user vocabulary when
+    the key is `user` alone (to look up carried-over sessions).
+    """
+    codes = np.zeros(len(df), dtype=np.int64)
+    vocab: List[Optional[str]] = []
+    for name in keys:
+        vocab, column = encode_strings(df[name])
+        codes = codes * (len(vocab) + 1) + column + 1
+    return codes, vocab
+
+
+def _split(df: pl.DataFrame, keys: Tuple[str, ...], gaps: List[timedelta], prior: Optional[pl.DataFrame] = None):
+    """
+    Sorts events once by (key, timestamp) and finds session boundaries for
+    every gap in that single order. Returns (order, first event of each key,
+    new-session flags per gap, numbers to add per event from `prior`).
+    """
+    codes, vocab = _key_codes(df, keys)
+    ts = df["timestamp"].dt.epoch("us").to_numpy()
+    # Ties keep file order
+    order = pl.DataFrame({"key": codes, "ts": ts}).with_row_index("row").select(
+        pl.arg_sort_by(["key", "ts", "row"])
+    ).to_series().to_numpy()
+    codes, ts = codes[order], ts[order]
+    key_start = np.r_[True, codes[1:] != codes[:-1]] if len(codes) else np.zeros(0, dtype=bool)
+    deltas = np.r_[0, np.diff(ts)]
+
+    previous = np.zeros(len(codes), dtype=np.int64)
+    continues = np.zeros(len(codes), dtype=bool)
+    if prior is not None and len(prior):
+        # Carried-over sessions are continued by a user's first new event; late events join them too
+        known = pl.DataFrame({"user": vocab, "_code": np.arange(1, len(vocab) + 1)}).join(prior, on="user")
+        prior_no = np.zeros(len(vocab) + 1, dtype=np.int64)
+        prior_end = np.zeros(len(vocab) + 1, dtype=np.int64)
+        has_prior = np.zeros(len(vocab) + 1, dtype=bool)
+        code = known["_code"].to_numpy()
+        prior_no[code] = known["session_no"].to_numpy()
+        prior_end[code] = known["end_time"].dt.epoch("us").to_numpy()
+        has_prior[code] = True
+        previous = prior_no[codes]
+        first = np.flatnonzero(key_start)
+        continues[first] = has_prior[codes[first]]
+        deltas[first] = ts[first] - prior_end[codes[first]]
+
+    boundaries = []
+    for gap in gaps:
+        limit = gap // timedelta(microseconds=1)
+        boundaries.append(np.where(key_start, ~continues | (deltas > limit), deltas > limit))
+    return order, key_start, boundaries, previous
+
+
+def _session_numbers(key_start: np.ndarray, boundary: np.ndarray) -> np.ndarray:
+    """1-based session number within each key, per event."""
+    count = np.cumsum(boundary)
+    before_key = np.maximum.accumulate(np.where(key_start, count - boundary, 0))
+    return count - before_key
+
+
+def sessionize_many(df: pl.DataFrame, specs: Iterable[SessionSpec], prior: Optional[pl.DataFrame] = None) -> Dict[SessionSpec, SessionTable]:
+    """
+    Splits events (EVENT_COLUMNS) into sessions for several definitions at
+    once. Events are sorted once per distinct key; every gap for that key
+    reuses the sorted frame, so tables sharing a key share their events.
+    `prior` (user, session_no, end_time) holds each user's latest session
+    from earlier runs and applies to specs keyed on `user` alone: a user's
+    first event continues it if within the gap, later sessions are numbered
+    after it.
+    """
+    specs = list(dict.fromkeys(specs))
+    tables: Dict[SessionSpec, SessionTable] = {}
+    for keys in dict.fromkeys(spec.keys for spec in specs):
+        group = [spec for spec in specs if spec.keys == keys]
+        order, key_start, boundaries, previous = _split(
+            df, keys, [spec.gap for spec in group], prior if keys == ("user",) else None
         )
+        events = df.select(EVENT_COLUMNS)[order]
+        if len(keys) == 1:
+            label = events[keys[0]]
+        else:
+            label = events.select(pl.concat_str([pl.col(k).fill_null("") for k in keys], separator="+")).to_series()
+        _, sources = encode_strings(events["source_host"])
+        confidence = events["confidence_score"].to_numpy()
+        ts = events["timestamp"]
+
+        for spec, boundary in zip(group, boundaries):
+            # A continued session starts a row range without taking a new number
+            starts = np.flatnonzero(boundary | key_start)
+            lengths = np.diff(np.r_[starts, len(events)])
+            numbers = (_session_numbers(key_start, boundary) + previous)[starts]
+            if len(starts):
+                owners = np.repeat(np.arange(len(starts)), lengths)
+                # IP switching (source_host variance) or high confidence scores
+                high_priority = (np.logical_or.reduceat(sources != sources[starts][owners], starts)
+                                 | (np.fmax.reduceat(confidence, starts) > 0.8))
+            else:
+                high_priority = np.zeros(0, dtype=bool)
+            index = pl.DataFrame({
+                "_label": label.gather(starts),
+                "user": events["user"].gather(starts),
+                "session_no": numbers,
+                "start_time": ts.gather(starts),
+                "end_time": ts.gather(starts + lengths - 1),
+                "is_high_priority": high_priority,
+                "offset": starts,
+                "length": lengths,
+            }).select(
+                pl.format("{}_{}", pl.col("_label"), pl.col("session_no")).alias("session_id"),
+                pl.exclude("_label"),
+            ).cast(SessionTable.INDEX_SCHEMA)
+            tables[spec] = SessionTable(events, index)
+    return tables
+
+
+def sessionize(df: pl.DataFrame, prior: Optional[pl.DataFrame] = None, spec: SessionSpec = SessionSpec()) -> SessionTable:
+    """
+    Splits events (EVENT_COLUMNS) into sessions, by default per user with a
+    60 minute gap, and returns them column-wise (see sessionize_many).
+    """
+    return sessionize_many(df, [spec], prior)[spec]
+
 
-        # Convert to Domain Objects
-        sessions: List[Session] = []
-        
-        # Group by unique_session_id and extract data
-        # This part effectively effectively "materializes" the sessions
-        grouped = df.partition_by("unique_session_id", as_dict=True)
-        
-        for s_id, group_df in grouped.items():
-            events = []
-            priority = False
-            
-            rows = group_df.to_dicts()
-            if not rows:
-                continue
-
-            start_t = rows[0]["timestamp"]
-            end_t = rows[-1]["timestamp"]
-            
-            # Check for IP switching (source_host variance)
-            unique_ips = group_df["source_host"].n_unique()
-            if unique_ips > 1:
-                priority = True
-                
-            # Check for high confidence scores
-            if group_df["confidence_score"].max() > 0.8: # Arbitrary threshold for "high"
-                priority = True
-
-            for row in rows:
-                events.append(EnrichedEvent(
-                    event_id=str(row.get("event_id", "")),
-                    timestamp=row["timestamp"],
-                    user=row["user"],
-                    source_host=row["source_host"],
-                    target_host=row.get("target_host"),
-                    event_type=row["event_type"],
-                    protocol=row.get("protocol"),
-                    mitre_technique=row.get("mitre_technique"),
-                    confidence_score=row["confidence_score"],
-                    data_quality_score=row["data_quality_score"]
-                ))
-            
-            sessions.append(Session(
-                session_id=str(s_id),
-                user=rows[0]["user"],
-                start_time=start_t,
-                end_time=end_t,
-                events=events,
-                is_high_priority=priority
-            ))
-            
-        return sessions
+def tag_sessions(df: pl.DataFrame, specs: Iterable[SessionSpec]) -> pl.DataFrame:
+    """
+    Adds one column per spec (named spec.name) with each event's session id,
+    keeping the input row order.
+    """
+    specs = list(dict.fromkeys(specs))
+    columns = {}
+    for keys in dict.fromkeys(spec.keys for spec in specs):
+        group = [spec for spec in specs if spec.keys == keys]
+        order, key_start, boundaries, _ = _split(df, keys, [spec.gap for spec in group])
+        if len(keys) == 1:
+            label = df[keys[0]]
+        else:
+            label = df.select(pl.concat_str([pl.col(k).fill_null("") for k in keys], separator="+")).to_series()
+        for spec, boundary in zip(group, boundaries):
+            numbers = np.empty(len(df), dtype=np.int64)
+            numbers[order] = _session_numbers(key_start, boundary)
+            columns[spec.name] = pl.select(pl.format("{}_{}", label, pl.Series(numbers))).to_series()
+    return df.with_columns(series.alias(name) for name, series in columns.items())
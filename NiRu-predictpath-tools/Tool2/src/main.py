@@ -1,13 +1,22 @@
 import argparse
+import os
 import sys
-import json
+from datetime import datetime
+import polars as pl
 from rich.console import Console
 from rich.table import Table
 from rich.tree import Tree
 from rich.panel import Panel
 from rich.text import Text
-from .ingest import DataIngester
+from .domain import SessionSpec
+from .ingest import DataIngester, parse_bound
 from .engine import GraphEngine
+from .baseline import BaselineStore
+from .graph import GraphStore, update_graph
+from .rolling import ROLLING_COLUMNS, ROLLING_SCHEMA, ROLLING_STEP, ROLLING_WINDOWS, rolling_risk, write_rolling
+from .similarity import SimilarityStore, annotate, feature_vectors
+from .report import REPORT_BATCH_ROWS, REPORT_FORMATS, TopK, open_report_writer
+from .state import IncrementalSessionizer, SessionStateStore
 
 console = Console()
 
@@ -23,13 +32,16 @@ def visualize_path(session, report):
     tree.add(f"Event: {report.root_cause_node} | User: {session.user}")
     
     # Build a simple visualization of the sequence
-    # Limit to first 10 events to avoid screen overflow
+    # Limit to first 10 events to avoid screen overflow (only these are materialized);
+    # sketched sessions show a reservoir sample across the whole session instead
+    sketched = report.blast_radius_estimate is not None
+    shown = session.sample(10) if sketched else session.materialize(limit=10)
     last_node = tree
-    for i, event in enumerate(session.events[:10]):
+    for i, event in enumerate(shown):
         # Calculate time delta from previous
         delta_msg = ""
         if i > 0:
-            prev = session.events[i-1]
+            prev = shown[i-1]
             dt = (event.timestamp - prev.timestamp).total_seconds()
             delta_msg = f"  ⬇  (+{dt:.2f}s)"
             
@@ -49,11 +61,24 @@ def visualize_path(session, report):
         step_node.add(f"Host: {event.source_host} -> {event.target_host or 'N/A'}")
         last_node = step_node
 
-    if len(session.events) > 10:
-        last_node.add(f"... {len(session.events) - 10} more events ...")
+    if sketched:
+        last_node.add(f"... sampled {len(shown)} of {len(session)} events ...")
+        tree.add(f"Technique trail (last {len(report.technique_trail)}): {' -> '.join(report.technique_trail) or 'Unknown'}")
+    elif len(session) > 10:
+        last_node.add(f"... {len(session) - 10} more events ...")
+
+    if report.reachable_host_count is not None:
+        tree.add(f"Reachable beyond blast radius: {report.reachable_host_count} hosts")
+
+    if report.similar_sessions:
+        similar = ", ".join(f"{s.session_id} ({s.similarity:.2f})" for s in report.similar_sessions)
+        tree.add(f"Resembles past sessions: {similar}")
 
     # Blast Radius
-    blast_table = Table(title="Blast Radius")
+    title = "Blast Radius"
+    if sketched:
+        title = f"Blast Radius (sample of ~{report.blast_radius_estimate} hosts)"
+    blast_table = Table(title=title)
     blast_table.add_column("Host", style="cyan")
     for host in report.blast_radius:
         blast_table.add_row(host)
@@ -70,39 +95,172 @@ def visualize_path(session, report):
 
 def main():
     parser = argparse.ArgumentParser(description="Tool 2: Behavioral Path Reconstruction Engine")
-    parser.add_argument("input_file", help="Path to input Parquet file (from Tool 1)")
+    parser.add_argument("input_file", help="Tool 1 Parquet file, glob, or partitioned output directory")
     parser.add_argument("--threshold", type=float, default=5.0, help="Anomaly score threshold to alert on")
+    parser.add_argument("--since", help="Only events at/after this UTC time (YYYY-MM-DD or ISO datetime)")
+    parser.add_argument("--until", help="Only events at/before this UTC time (YYYY-MM-DD or ISO datetime)")
+    parser.add_argument("--user", action="append", dest="users", help="Only this user (repeatable)")
+    parser.add_argument("--host", action="append", dest="hosts", help="Only events touching this host as source or target (repeatable)")
+    parser.add_argument("--session", action="append", dest="sessions", metavar="KEYS:GAP",
+                        help="Session definition, e.g. user:60m, user+source_host:30m, source_host:5m (repeatable; default user:60m)")
+    parser.add_argument("--workers", type=int, default=1, help="Score sessions across this many processes (0 = all cores)")
+    parser.add_argument("--top", type=int, default=20, help="Render only the K highest-scoring alerting sessions, after scoring (0 = render every alert as it is scored)")
+    parser.add_argument("--quiet", action="store_true", help="No Rich output at all (headless batch runs)")
+    parser.add_argument("--output", default="path_report.json", help="Report path (default: path_report.json)")
+    parser.add_argument("--format", choices=REPORT_FORMATS, help="Report format: json (UI), ndjson (streamed, one report per line) or parquet; default from --output suffix")
+    parser.add_argument("--rolling", metavar="PATH", help=f"Also write per-user rolling risk ({'/'.join(ROLLING_WINDOWS)} windows, {ROLLING_STEP} buckets) as Parquet")
+    parser.add_argument("--similar", type=int, default=0, metavar="K", help="Attach the K most similar past sessions to alerting reports, then add this run's sessions to the similarity index")
+    parser.add_argument("--similar-dir", help="Similarity index directory for --similar (default: data/similarity_index)")
+    parser.add_argument("--rebuild-similar-index", action="store_true", help="Rebuild the approximate (IVF) similarity index after adding this run's sessions")
+    parser.add_argument("--incremental", action="store_true", help="Only process Tool 1 files not seen by earlier runs, continuing open sessions")
+    parser.add_argument("--state-dir", help="Session state directory for --incremental (default: data/session_state)")
+    parser.add_argument("--baseline", action="store_true", help="Score sessions against each user's learned behaviour baseline, then fold them into it")
+    parser.add_argument("--baseline-dir", help="Baseline directory for --baseline (default: data/baselines)")
+    parser.add_argument("--graph", action="store_true", help="Update the global user/host interaction graph and report hosts reachable from each session")
+    parser.add_argument("--graph-dir", help="Interaction graph directory for --graph (default: data/interaction_graph)")
+    parser.add_argument("--reach", type=int, default=2, help="Hops to follow in the interaction graph for --graph (default: 2)")
     
     args = parser.parse_args()
+    if args.quiet:
+        console.quiet = True
     
-    ingester = DataIngester(args.input_file)
+    try:
+        since, until = parse_bound(args.since), parse_bound(args.until, end_of_day=True)
+    except ValueError as e:
+        console.print(f"[bold red]Invalid --since/--until: {e}[/bold red]")
+        sys.exit(2)
+    try:
+        specs = list(dict.fromkeys(SessionSpec.parse(text) for text in args.sessions or ["user:60m"]))
+    except ValueError as e:
+        console.print(f"[bold red]Invalid --session: {e}[/bold red]")
+        sys.exit(2)
+    if args.incremental and specs != [SessionSpec()]:
+        console.print("[bold red]--incremental only supports the default user:60m sessions[/bold red]")
+        sys.exit(2)
+    if args.incremental and (since or until or args.users or args.hosts):
+        # Files are marked processed whole, so filtered-out events would never be read again
+        console.print("[bold red]--incremental cannot be combined with --since, --until, --user or --host[/bold red]")
+        sys.exit(2)
+
+    workers = args.workers or os.cpu_count() or 1
+
+    ingester = DataIngester(args.input_file, since=since, until=until, users=args.users, hosts=args.hosts)
     engine = GraphEngine()
+    incremental = None
+    if args.incremental:
+        incremental = IncrementalSessionizer(SessionStateStore(args.state_dir), engine.scorer)
+        incremental.prepare(ingester)
     
     if not ingester.verify_integrity():
         console.print("[bold red]FATAL: Integrity Check Failed![/bold red]")
         sys.exit(1)
         
-    sessions = ingester.load_sessions()
-    console.print(f"[bold green]Loaded {len(sessions)} sessions.[/bold green]")
+    if incremental:
+        # Only sessions touched by new events are scored and reported
+        sessions, scores = incremental.run(ingester)
+        console.print(f"[bold green]Updated {len(sessions)} sessions.[/bold green]")
+        session_sets = {specs[0]: (sessions, engine.log_sketched_batches([scores]))}
+    else:
+        # One read and one sort per key; each definition is scored lazily, batch by batch
+        session_sets = {}
+        for spec, sessions in ingester.load_session_sets(specs).items():
+            console.print(f"[bold green]Loaded {len(sessions)} sessions ({spec.name}).[/bold green]")
+            session_sets[spec] = (sessions, engine.iter_analyze(sessions, workers))
+
+    baseline_store = None
+    fold_spec = None
+    if args.baseline:
+        baseline_store = BaselineStore(args.baseline_dir)
+        baselines = baseline_store.load()
+        # Sessions are judged against history before they join it; one per-user definition feeds it
+        fold_spec = next((spec for spec in session_sets if spec.keys == ("user",)), None)
+        fold_users, fold_scores = [], []
+
+    graph_store = graph_files = None
+    if args.graph:
+        # The graph is global: it folds in every event of files it has not seen, ignoring run filters
+        graph_store = GraphStore(args.graph_dir)
+        graph, graph_files, new_files = update_graph(graph_store, args.input_file)
+        console.print(f"[bold green]Interaction graph: {len(graph)} entities, {graph.number_of_edges} edges ({new_files} new file(s)).[/bold green]")
+
+    similar_store = None
+    if args.similar > 0 or args.rebuild_similar_index:
+        # Alerts are compared with past sessions only; this run's sessions join the index afterwards
+        similar_store = SimilarityStore(args.similar_dir)
+        similar_index = similar_store.load()
+        pending = []
+
+    generated_at = datetime.utcnow()
+    # Alerting sessions: rendered inline (--top 0), or only the top K once scoring is done
+    render = not args.quiet
+    top = TopK(args.top) if render and args.top > 0 else None
     
-    reports = []
+    # Reports are streamed out batch by batch as sessions are scored
+    with open_report_writer(args.output, args.format) as writer:
+        for spec, (sessions, batches) in session_sets.items():
+            for scores in batches:
+                users = sessions.index["user"].gather(scores["_session"])
+                if baseline_store:
+                    scores = engine.scorer.finalize(scores, baselines.lookup(users))
+                    if spec == fold_spec:
+                        fold_users.append(users)
+                        fold_scores.append(scores.select("event_count", "start_time", "end_time", "host_count", "base_risk"))
+                if graph_store:
+                    scores = graph.reachable_hosts(scores, users, args.reach)
+                if similar_store:
+                    keys = scores.select((pl.lit(f"{spec.name}/") + pl.col("session_id")).alias("key"))["key"]
+                    vectors = feature_vectors(scores)
+                    alerting = (scores["is_high_priority"] | (scores["path_anomaly_score"] >= args.threshold)).to_numpy()
+                    scores = annotate(similar_index, scores, keys, vectors, args.similar, alerting)
+                    pending.append((keys, scores.select("session_id", "path_anomaly_score", "end_time"), vectors))
+
+                for batch in scores.iter_slices(REPORT_BATCH_ROWS):
+                    records = []
+                    for row in batch.iter_rows(named=True):
+                        record = engine.scorer.to_record(row, generated_at)
+                        if spec != SessionSpec():
+                            record["session_spec"] = spec.name
+                        records.append(record)
+                        
+                        # Visualize if high priority or anomalous
+                        if render and (row["is_high_priority"] or row["path_anomaly_score"] >= args.threshold):
+                            if top is None:
+                                visualize_path(sessions[row["_session"]], engine.scorer.to_report(row))
+                            else:
+                                top.push(row["path_anomaly_score"], (sessions, row))
+                    writer.write(records)
+
+    if fold_spec is not None:
+        folded = baselines.update(pl.concat(fold_users), pl.concat(fold_scores))
+        console.print(f"[bold green]Behaviour baselines: {len(baselines)} users ({folded} new sessions).[/bold green]")
+    if similar_store:
+        for keys, scores, vectors in pending:
+            similar_index.add(keys, scores, vectors)
+        if args.rebuild_similar_index:
+            similar_index.build_ivf()
+        console.print(f"[bold green]Similarity index: {len(similar_index)} sessions ({similar_index.indexed_rows} in IVF lists).[/bold green]")
     
-    for session in sessions:
-        report = engine.build_and_analyze(session)
-        if not report:
-            continue
-            
-        reports.append(report.model_dump(mode='json'))
-        
-        # Visualize if high priority or anomalous
-        if session.is_high_priority or report.path_anomaly_score >= args.threshold:
-            visualize_path(session, report)
-            
-    # Dump full report
-    with open("path_report.json", "w") as f:
-        json.dump(reports, f, indent=2)
+    if top is not None:
+        if top.seen > len(top):
+            console.print(f"[bold yellow]{top.seen} alerting sessions; showing the top {len(top)} by anomaly score[/bold yellow]")
+        for sessions, row in top.items():
+            visualize_path(sessions[row["_session"]], engine.scorer.to_report(row))
+    if incremental:
+        incremental.commit()
+    if args.rolling:
+        # Its own projected scan of the run's events (all of them, also with --incremental)
+        lf = DataIngester(args.input_file, since=since, until=until, users=args.users, hosts=args.hosts).scan()
+        series = rolling_risk(lf.select(*ROLLING_COLUMNS).collect()) if lf is not None else pl.DataFrame(schema=ROLLING_SCHEMA)
+        write_rolling(series, args.rolling)
+        console.print(f"[bold green]Rolling risk saved to {args.rolling} ({len(series)} buckets).[/bold green]")
+    if similar_store:
+        similar_store.save(similar_index)
+    if baseline_store:
+        baseline_store.save(baselines)
+    if graph_store:
+        graph_store.save(graph, graph_files)
         
-    console.print("[bold green]Analysis Complete. Report saved to path_report.json[/bold green]")
+    console.print(f"[bold green]Analysis Complete. Report saved to {args.output}[/bold green]")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,164 @@
+import json
+import heapq
+import logging
+import textwrap
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMATS = ("json", "ndjson", "parquet")
+
+# Records are handed to the writer in batches of this many sessions
+REPORT_BATCH_ROWS = 10_000
+
+# Column layout of Parquet reports; prediction_vector stays nested
+REPORT_SCHEMA = {
+    "session_id": pl.String,
+    "root_cause_node": pl.String,
+    "blast_radius": pl.List(pl.String),
+    "path_anomaly_score": pl.Float64,
+    "prediction_vector": pl.List(pl.Struct({"next_node": pl.String, "probability": pl.Float64})),
+    "generated_at": pl.String,
+    "session_spec": pl.String,
+    "blast_radius_estimate": pl.Int64,
+    "technique_trail": pl.List(pl.String),
+    "baseline_deviation": pl.Float64,
+    "reachable_hosts": pl.List(pl.String),
+    "reachable_host_count": pl.Int64,
+    "feature_vector": pl.List(pl.Float64),
+    "similar_sessions": pl.List(pl.Struct({"session_id": pl.String, "similarity": pl.Float64, "path_anomaly_score": pl.Float64})),
+}
+
+
+def report_format(path: str, fmt: Optional[str] = None) -> str:
+    """The explicit format, else one inferred from the file suffix (default json)."""
+    if fmt:
+        return fmt
+    suffix = Path(path).suffix.lower()
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if suffix == ".parquet":
+        return "parquet"
+    return "json"
+
+
+class ReportWriter:
+    """
+    Writes path report records (SessionScorer.to_record dicts) batch by batch
+    while sessions are scored. Use as a context manager.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.count = 0
+
+    def write(self, records: List[Dict[str, Any]]):
+        self.count += len(records)
+
+    def close(self):
+        logger.info(f"Wrote {self.count} report(s) to {self.path}")
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonReportWriter(ReportWriter):
+    """
+    A plain JSON array, streamed element by element; the bytes match
+    json.dump(records, f, indent=2) so the UI keeps reading it unchanged.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(self.path, "w")
+
+    def write(self, records: List[Dict[str, Any]]):
+        for record in records:
+            self._file.write(",\n" if self.count else "[\n")
+            self._file.write(textwrap.indent(json.dumps(record, indent=2), "  "))
+            self.count += 1
+        self._file.flush()
+
+    def close(self):
+        self._file.write("\n]" if self.count else "[]")
+        self._file.close()
+        super().close()
+
+
+class NdjsonReportWriter(ReportWriter):
+    """One compact JSON report per line, flushed per batch so progress is visible."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(self.path, "w")
+
+    def write(self, records: List[Dict[str, Any]]):
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+        super().write(records)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class ParquetReportWriter(ReportWriter):
+    """
+    Parquet with REPORT_SCHEMA, written through pyarrow's ParquetWriter:
+    each batch becomes its own row group as it arrives, so memory stays
+    bounded by one batch however large the report.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow.parquet as pq  # only Parquet reports need pyarrow
+
+        super().__init__(path)
+        self._writer = pq.ParquetWriter(self.path, pl.DataFrame(schema=REPORT_SCHEMA).to_arrow().schema)
+
+    def write(self, records: List[Dict[str, Any]]):
+        if records:
+            frame = pl.DataFrame(records, schema=REPORT_SCHEMA)
+            self._writer.write_table(frame.to_arrow(), row_group_size=REPORT_BATCH_ROWS)
+        super().write(records)
+
+    def close(self):
+        self._writer.close()
+        super().close()
+
+
+class TopK:
+    """
+    Bounded min-heap of the k highest-scoring items seen so far: O(log k)
+    per push and O(k) memory however many sessions qualify. Equal scores
+    keep the earliest item.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.seen = 0
+        self._heap: List[Tuple[float, int, Any]] = []
+
+    def push(self, score: float, item: Any):
+        entry = (score, -self.seen, item)
+        self.seen += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> List[Any]:
+        """Kept items, highest score first."""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+def open_report_writer(path: str, fmt: Optional[str] = None) -> ReportWriter:
+    writers = {"json": JsonReportWriter, "ndjson": NdjsonReportWriter, "parquet": ParquetReportWriter}
+    return writers[report_format(path, fmt)](path)
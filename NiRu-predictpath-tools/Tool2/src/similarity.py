@@ -0,0 +1,305 @@
+import os
+import math
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import polars as pl
+from .engine import FEATURE_TECHNIQUES, KILL_CHAIN_ORDER, MITRE_PHASE_MAP, TECHNIQUE_SLOTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = Path(__file__).resolve().parent.parent / "data" / "similarity_index"
+
+# Feature layout: kill-chain phase histogram (event fractions, Unknown last),
+# technique presence bits (FEATURE_TECHNIQUES, then "other"), then velocity,
+# duration and fan-out, each log-scaled to roughly [0, 1]
+PHASES = tuple(sorted(KILL_CHAIN_ORDER, key=KILL_CHAIN_ORDER.get)) + ("Unknown",)
+FEATURE_NAMES = (
+    tuple(f"phase:{p}" for p in PHASES)
+    + tuple(f"technique:{t}" for t in FEATURE_TECHNIQUES) + ("technique:other",)
+    + ("velocity", "duration", "fan_out")
+)
+FEATURE_DIM = len(FEATURE_NAMES)
+
+# Scale caps of the log features: 1 day between events, a 1-day session, 1000 hosts
+_LOG_CAPS = (math.log1p(86_400), math.log1p(1_440), math.log1p(1_000))
+
+# Exact scans compare batches of this many queries against this many indexed
+# rows at a time, bounding the similarity block to 64 MiB
+SEARCH_BATCH_QUERIES = 1 << 10
+SEARCH_BLOCK_ROWS = 1 << 14
+
+# IVF (inverted file) index: spherical k-means lists, probing the closest few
+IVF_PROBES = 8
+IVF_TRAIN_SAMPLE = 100_000
+IVF_ITERATIONS = 10
+
+ENTRY_SCHEMA = {"key": pl.String, "session_id": pl.String, "path_anomaly_score": pl.Float64, "end_time": pl.Datetime("us", "UTC")}
+
+
+def _phase_matrix() -> np.ndarray:
+    """(TECHNIQUE_SLOTS x phases) 0/1 map from technique slot to kill-chain phase."""
+    matrix = np.zeros((TECHNIQUE_SLOTS, len(PHASES)))
+    for slot, technique in enumerate(FEATURE_TECHNIQUES):
+        matrix[slot, PHASES.index(MITRE_PHASE_MAP[technique])] = 1
+    matrix[TECHNIQUE_SLOTS - 2:, PHASES.index("Unknown")] = 1
+    return matrix
+
+
+def feature_vectors(scores: pl.DataFrame) -> np.ndarray:
+    """
+    Fixed-length (FEATURE_DIM) float32 vector per scored session, L2
+    normalised so a dot product is the cosine similarity.
+    """
+    counts = np.array(scores["technique_counts"].to_list(), dtype=np.float64).reshape(len(scores), TECHNIQUE_SLOTS)
+    events = np.maximum(scores["event_count"].to_numpy(), 1)
+    histogram = counts @ _phase_matrix() / events[:, None]
+    present = counts[:, :TECHNIQUE_SLOTS - 1] > 0
+    duration = (scores["end_time"].dt.epoch("us").to_numpy() - scores["start_time"].dt.epoch("us").to_numpy()) / 1_000_000
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_delta = np.where(events > 1, duration / (events - 1), 0.0)
+    scalars = np.column_stack([
+        np.log1p(avg_delta) / _LOG_CAPS[0],
+        np.log1p(duration / 60) / _LOG_CAPS[1],
+        np.log1p(scores["host_count"].to_numpy()) / _LOG_CAPS[2],
+    ]).clip(0, 1)
+    vectors = np.hstack([histogram, present, scalars]).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def _merge_top(best: Tuple[np.ndarray, np.ndarray], sims: np.ndarray, rows: np.ndarray, k: int):
+    """Folds a block of similarities (queries x block) into the running top-k."""
+    sims = np.hstack([best[0], sims])
+    rows = np.hstack([best[1], np.broadcast_to(rows, (len(sims), len(rows)))])
+    if sims.shape[1] > k:
+        keep = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        sims, rows = np.take_along_axis(sims, keep, axis=1), np.take_along_axis(rows, keep, axis=1)
+    return sims, rows
+
+
+class SimilarityIndex:
+    """
+    Feature vectors of past sessions (one row per session key, updated in
+    place when a session is reported again) with top-k cosine search.
+    Search is exact (blocked matrix products) unless an IVF index has been
+    built: spherical k-means lists over the rows present at build time,
+    of which the IVF_PROBES nearest are scanned. Rows added after the build
+    form an unindexed tail that is always scanned exactly, so new sessions
+    are searchable at once and the lists can be rebuilt offline.
+    """
+
+    def __init__(self, entries: Optional[pl.DataFrame] = None, vectors: Optional[np.ndarray] = None,
+                 ivf: Optional[Dict[str, np.ndarray]] = None):
+        self.entries = entries if entries is not None else pl.DataFrame(schema=ENTRY_SCHEMA)
+        self.vectors = vectors if vectors is not None else np.zeros((0, FEATURE_DIM), dtype=np.float32)
+        self.ivf = ivf
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def indexed_rows(self) -> int:
+        """Rows covered by the IVF lists (0 without an IVF index)."""
+        return int(self.ivf["offsets"][-1]) if self.ivf is not None else 0
+
+    def add(self, keys: pl.Series, scores: pl.DataFrame, vectors: np.ndarray) -> int:
+        """Adds or updates sessions (aligned keys/scores/vectors); returns how many were new."""
+        batch = pl.DataFrame({
+            "key": keys,
+            "session_id": scores["session_id"],
+            "path_anomaly_score": scores["path_anomaly_score"],
+            "end_time": scores["end_time"],
+        }).with_columns(pl.Series("_new", np.arange(len(keys))))
+        # A key reported twice in one batch keeps its last vector
+        batch = batch.unique(subset="key", keep="last").sort("_new")
+        known = batch.join(self.entries.select("key").with_row_index("_row"), on="key", how="left")
+        update = known.filter(pl.col("_row").is_not_null())
+        fresh = known.filter(pl.col("_row").is_null())
+
+        rows = update["_row"].cast(pl.Int64).to_numpy()
+        self.vectors[rows] = vectors[update["_new"].to_numpy()]
+        self.entries = pl.concat([
+            self.entries.with_columns(
+                _overwrite(self.entries[name], rows, update[name]) for name in ("session_id", "path_anomaly_score", "end_time")
+            ),
+            fresh.select(list(ENTRY_SCHEMA)),
+        ])
+        self.vectors = np.vstack([self.vectors, vectors[fresh["_new"].to_numpy()]])
+        return len(fresh)
+
+    def search(self, queries: np.ndarray, k: int, exclude: Optional[pl.Series] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k rows per query by cosine similarity, best first: (similarities,
+        rows), both (queries x k); rows are -1 where fewer than k exist.
+        `exclude` (aligned keys) drops each query's own entry.
+        """
+        k_search = k + (1 if exclude is not None else 0)
+        batches = [self._search_batch(queries[start:start + SEARCH_BATCH_QUERIES], k_search)
+                   for start in range(0, len(queries), SEARCH_BATCH_QUERIES)]
+        if batches:
+            sims, rows = np.concatenate([b[0] for b in batches]), np.concatenate([b[1] for b in batches])
+        else:
+            sims, rows = np.zeros((0, 0), dtype=np.float32), np.zeros((0, 0), dtype=np.int64)
+        if exclude is not None and len(self):
+            own = (rows >= 0) & (self.entries["key"].to_numpy()[np.maximum(rows, 0)] == exclude.to_numpy()[:, None])
+            sims = np.where(own, -np.inf, sims)
+        order = np.argsort(-sims, axis=1, kind="stable")
+        sims, rows = np.take_along_axis(sims, order, axis=1), np.take_along_axis(rows, order, axis=1)
+        pad = max(0, k - sims.shape[1])
+        sims = np.pad(sims[:, :k], ((0, 0), (0, pad)), constant_values=-np.inf)
+        rows = np.pad(rows[:, :k], ((0, 0), (0, pad)), constant_values=-1)
+        return sims, np.where(np.isfinite(sims), rows, -1)
+
+    def _search_batch(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Unordered top-k candidates for a batch of queries: exact, or IVF plus the unindexed tail."""
+        best = (np.full((len(queries), 0), -np.inf, dtype=np.float32), np.zeros((len(queries), 0), dtype=np.int64))
+        if self.ivf is None:
+            start = 0
+        else:
+            best = self._search_ivf(queries, k)
+            start = self.indexed_rows
+        for block_start in range(start, len(self), SEARCH_BLOCK_ROWS):
+            block = np.arange(block_start, min(block_start + SEARCH_BLOCK_ROWS, len(self)))
+            best = _merge_top(best, queries @ self.vectors[block].T, block, k)
+        return best
+
+    def _search_ivf(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k over the IVF_PROBES lists nearest each query, one matrix product per probed list."""
+        centroids, order, offsets = self.ivf["centroids"], self.ivf["order"], self.ivf["offsets"]
+        probes = min(IVF_PROBES, len(centroids))
+        nearest = np.argsort(-(queries @ centroids.T), axis=1)[:, :probes]
+        sims = np.full((len(queries), probes * k), -np.inf, dtype=np.float32)
+        rows = np.full((len(queries), probes * k), -1, dtype=np.int64)
+        # (query, probe slot) pairs grouped by the list they probe
+        pairs = np.argsort(nearest.ravel(), kind="stable")
+        lists, starts = np.unique(nearest.ravel()[pairs], return_index=True)
+        for c, lo, hi in zip(lists, starts, np.r_[starts[1:], len(pairs)]):
+            members = order[offsets[c]:offsets[c + 1]]
+            if len(members) == 0:
+                continue
+            qs, slots = np.divmod(pairs[lo:hi], probes)
+            block = queries[qs] @ self.vectors[members].T
+            kept = min(k, len(members))
+            top = np.argpartition(-block, kept - 1, axis=1)[:, :kept] if len(members) > kept else np.broadcast_to(np.arange(kept), block.shape)
+            columns = slots[:, None] * k + np.arange(kept)
+            sims[qs[:, None], columns] = np.take_along_axis(block, top, axis=1)
+            rows[qs[:, None], columns] = members[top]
+        return _merge_top((sims, rows), np.zeros((len(queries), 0), dtype=np.float32), np.zeros(0, dtype=np.int64), k)
+
+    def build_ivf(self, lists: Optional[int] = None, seed: int = 0):
+        """
+        (Re)builds the IVF lists over all current rows: spherical k-means
+        (about sqrt(n) lists) trained on a sample, then every row is assigned
+        to its closest centroid. CPU-only; run offline on large indexes.
+        """
+        n = len(self)
+        if n == 0:
+            self.ivf = None
+            return
+        lists = lists or max(1, int(math.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = self.vectors[rng.choice(n, size=min(n, IVF_TRAIN_SAMPLE), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=min(lists, len(sample)), replace=False)].copy()
+        for _ in range(IVF_ITERATIONS):
+            assigned = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assigned, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1), centroids)
+        assigned = np.concatenate([
+            np.argmax(self.vectors[start:start + SEARCH_BLOCK_ROWS] @ centroids.T, axis=1)
+            for start in range(0, n, SEARCH_BLOCK_ROWS)
+        ])
+        order = np.argsort(assigned, kind="stable")
+        offsets = np.r_[0, np.cumsum(np.bincount(assigned, minlength=len(centroids)))]
+        self.ivf = {"centroids": centroids.astype(np.float32), "order": order, "offsets": offsets}
+        logger.info(f"Built IVF similarity index: {n} session(s) in {len(centroids)} list(s)")
+
+    def describe(self, sims: np.ndarray, rows: np.ndarray) -> List[List[Dict[str, Any]]]:
+        """JSON-ready similar-session lists for search() results."""
+        ids = self.entries["session_id"].to_list()
+        scores = self.entries["path_anomaly_score"].to_list()
+        return [
+            [{"session_id": ids[r], "similarity": round(float(s), 4), "path_anomaly_score": scores[r]}
+             for s, r in zip(sim_row, row_row) if r >= 0]
+            for sim_row, row_row in zip(sims, rows)
+        ]
+
+
+SIMILAR_DTYPE = pl.List(pl.Struct({"session_id": pl.String, "similarity": pl.Float64, "path_anomaly_score": pl.Float64}))
+
+
+def annotate(index: SimilarityIndex, scores: pl.DataFrame, keys: pl.Series, vectors: np.ndarray,
+             k: int, alerting: np.ndarray) -> pl.DataFrame:
+    """
+    Adds feature_vector to every scored session and, for `alerting` rows,
+    similar_sessions: the k closest sessions already in the index (other
+    than the session itself). One batched search for all alerting rows.
+    """
+    similar: List[Optional[List[Dict[str, Any]]]] = [None] * len(scores)
+    rows = np.flatnonzero(alerting)
+    if k > 0 and len(rows) and len(index):
+        sims, found = index.search(vectors[rows], k, exclude=keys.gather(rows))
+        for row, matches in zip(rows.tolist(), index.describe(sims, found)):
+            similar[row] = matches
+    return scores.with_columns(
+        pl.Series("feature_vector", np.round(vectors.astype(np.float64), 4).ravel())
+        .reshape((len(scores), FEATURE_DIM)).cast(pl.List(pl.Float64)),
+        pl.Series("similar_sessions", similar, dtype=SIMILAR_DTYPE),
+    )
+
+
+def _overwrite(series: pl.Series, rows: np.ndarray, values: pl.Series) -> pl.Series:
+    if len(rows) == 0:
+        return series
+    return series.scatter(rows, values)
+
+
+class SimilarityStore:
+    """
+    Persists a SimilarityIndex: entries.parquet (keys and report fields),
+    vectors.npy (float32 rows) and, once built, ivf.npz. Files are replaced
+    atomically; a stale IVF (covering more rows than are stored) is ignored.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or DEFAULT_INDEX_DIR)
+        self.entries_path = self.root / "entries.parquet"
+        self.vectors_path = self.root / "vectors.npy"
+        self.ivf_path = self.root / "ivf.npz"
+
+    def load(self) -> SimilarityIndex:
+        if not self.vectors_path.exists():
+            return SimilarityIndex()
+        entries = pl.read_parquet(self.entries_path)
+        vectors = np.load(self.vectors_path)
+        ivf = None
+        if self.ivf_path.exists():
+            with np.load(self.ivf_path) as arrays:
+                ivf = {name: arrays[name] for name in ("centroids", "order", "offsets")}
+            if ivf["offsets"][-1] > len(vectors) or ivf["centroids"].shape[1] != vectors.shape[1]:
+                ivf = None
+        return SimilarityIndex(entries, vectors, ivf)
+
+    def save(self, index: SimilarityIndex):
+        self.root.mkdir(parents=True, exist_ok=True)
+        staged = []
+        for path, write in (
+            (self.entries_path, lambda f: index.entries.write_parquet(f)),
+            (self.vectors_path, lambda f: np.save(f, index.vectors)),
+            (self.ivf_path, (lambda f: np.savez(f, **index.ivf)) if index.ivf is not None else None),
+        ):
+            if write is None:
+                continue
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                write(f)
+            staged.append((tmp, path))
+        for tmp, path in staged:
+            os.replace(tmp, path)
+        if index.ivf is None and self.ivf_path.exists():
+            self.ivf_path.unlink()
+        logger.info(f"Similarity index saved: {len(index)} session(s), {index.indexed_rows} in IVF lists")
@@ -0,0 +1,91 @@
+import math
+import random
+import hashlib
+from typing import List, Optional
+import numpy as np
+
+# Bounded summaries for oversized sessions (more than MAX_CHAIN_EDGES edges):
+# their host set is kept as a HyperLogLog, their technique sequence and
+# rendered events as fixed-size samples, so memory per session is constant.
+
+HLL_PRECISION = 12  # 4096 one-byte registers per session, ~1.6% standard error
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+# Hosts listed in a sketched session's report (bottom-k by hash, so mergeable)
+SKETCH_HOSTS = 50
+
+# Most recent meaningful techniques kept for a sketched session
+TRAIL_LENGTH = 20
+
+
+def host_hashes(values: List[Optional[str]]) -> np.ndarray:
+    """
+    Stable 64-bit hashes of host names. Registers are persisted between
+    incremental runs, so the hash must not depend on the Python or polars
+    version (unlike hash() or Series.hash()).
+    """
+    return np.array(
+        [int.from_bytes(hashlib.blake2b((v or "").encode("utf-8"), digest_size=8).digest(), "little") for v in values],
+        dtype=np.uint64,
+    )
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Bit length of uint64 values, exact (each 32-bit half fits a float64 mantissa)."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1]).astype(np.int64)
+
+
+def hll_registers(slots: np.ndarray, hashes: np.ndarray, sessions: int) -> np.ndarray:
+    """
+    HyperLogLog registers (sessions x HLL_REGISTERS, uint8) for hashed items,
+    item i belonging to session slots[i]. Registers merge by elementwise max.
+    """
+    registers = np.zeros((sessions, HLL_REGISTERS), dtype=np.uint8)
+    if len(hashes):
+        bucket = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.int64)
+        rest = hashes << np.uint64(HLL_PRECISION)
+        # Position of the first 1 bit in the remaining 64 - p bits
+        rank = np.minimum(64 - _bit_length(rest) + 1, 64 - HLL_PRECISION + 1).astype(np.uint8)
+        np.maximum.at(registers, (slots, bucket), rank)
+    return registers
+
+
+def hll_estimate(registers: np.ndarray) -> np.ndarray:
+    """Distinct-count estimate per register row, with the small-range correction."""
+    registers = np.atleast_2d(registers)
+    m = HLL_REGISTERS
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)), axis=1)
+    zeros = np.sum(registers == 0, axis=1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def bottom_k(values: List[str], k: int = SKETCH_HOSTS) -> List[str]:
+    """The k values with the smallest hashes, sorted; a mergeable uniform sample."""
+    if len(values) <= k:
+        return sorted(values)
+    order = np.argsort(host_hashes(values), kind="stable")[:k]
+    return sorted(values[i] for i in order)
+
+
+def reservoir_positions(n: int, k: int, seed: int = 0) -> List[int]:
+    """
+    Uniform sample of k positions out of a stream of n (Algorithm L): one
+    pass, O(k) memory, and only O(k log(n/k)) random draws. Sorted.
+    """
+    rng = random.Random(seed)
+    reservoir = list(range(min(k, n)))
+    if n <= k:
+        return reservoir
+    w = math.exp(math.log(rng.random()) / k)
+    i = k - 1
+    while True:
+        i += int(math.log(rng.random()) / math.log(1 - w)) + 1
+        if i >= n:
+            return sorted(reservoir)
+        reservoir[rng.randrange(k)] = i
+        w *= math.exp(math.log(rng.random()) / k)
@@ -0,0 +1,123 @@
+import os
+import logging
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+import numpy as np
+import polars as pl
+from .domain import SessionTable
+from .engine import AGGREGATE_SCHEMA, SessionScorer
+from .ingest import DataIngester, file_key, sessionize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DIR = Path(__file__).resolve().parent.parent / "data" / "session_state"
+
+# One row per user: the user's latest session and its running aggregates
+STATE_SCHEMA = {"user": pl.String, "session_no": pl.Int64, **AGGREGATE_SCHEMA}
+
+
+class SessionStateStore:
+    """
+    Compact local state for incremental runs: each user's latest (possibly
+    still open) session with its running aggregates, and the Tool1 files
+    already consumed. Both are small Parquet files replaced atomically.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or DEFAULT_STATE_DIR)
+        self.sessions_path = self.root / "open_sessions.parquet"
+        self.files_path = self.root / "processed_files.parquet"
+
+    def load_sessions(self) -> pl.DataFrame:
+        if not self.sessions_path.exists():
+            return pl.DataFrame(schema=STATE_SCHEMA)
+        sessions = pl.read_parquet(self.sessions_path)
+        # State written before a column existed simply lacks it
+        missing = [pl.lit(None, dtype=dtype).alias(name) for name, dtype in STATE_SCHEMA.items() if name not in sessions.columns]
+        return sessions.with_columns(missing).select(list(STATE_SCHEMA))
+
+    def load_files(self) -> Set[str]:
+        if not self.files_path.exists():
+            return set()
+        return set(pl.read_parquet(self.files_path)["file"].to_list())
+
+    def save(self, sessions: pl.DataFrame, files: Set[str]):
+        self.root.mkdir(parents=True, exist_ok=True)
+        staged = []
+        for path, frame in (
+            (self.sessions_path, sessions.select(list(STATE_SCHEMA))),
+            (self.files_path, pl.DataFrame({"file": sorted(files)}, schema={"file": pl.String})),
+        ):
+            tmp = path.with_suffix(".tmp")
+            frame.write_parquet(tmp)
+            staged.append((tmp, path))
+        # Sessions first: a crash in between re-reads files rather than skipping unprocessed ones
+        for tmp, path in staged:
+            os.replace(tmp, path)
+        logger.info(f"Session state saved: {len(sessions)} user(s), {len(files)} processed file(s)")
+
+
+class IncrementalSessionizer:
+    """
+    Sessionizes only events from Tool1 files not seen by earlier runs. Each
+    user's open session is continued across runs (same 60-minute gap rule),
+    with its aggregates carried over, so the scores equal a full re-run.
+    Only sessions touched by the new events are scored and returned.
+    """
+
+    def __init__(self, store: SessionStateStore, scorer: SessionScorer):
+        self.store = store
+        self.scorer = scorer
+        self._pending: Optional[Tuple[pl.DataFrame, Set[str]]] = None
+
+    def prepare(self, ingester: DataIngester):
+        """
+        Makes the ingester skip files consumed by earlier runs. Filtered
+        ingesters are refused: their files would be recorded as processed
+        although only the matching events were sessionized.
+        """
+        if ingester.since or ingester.until or ingester.users or ingester.hosts:
+            raise ValueError("Incremental runs must read every event; --since/--until/--user/--host are not supported")
+        ingester.skip_files = self.store.load_files()
+
+    def run(self, ingester: DataIngester) -> Tuple[SessionTable, pl.DataFrame]:
+        """
+        Returns the new events' sessions and their updated scores (same columns
+        as SessionScorer.score_table). Call commit() once results are saved.
+        """
+        processed = ingester.skip_files or self.store.load_files()
+        files: List[Path] = [f for f in ingester.resolve_files() if file_key(f) not in processed]
+        lf = ingester.scan(files)
+        if lf is None:
+            logger.info("No new Tool1 files since the last run")
+            self._pending = None
+            table = SessionTable.empty()
+            return table, self.scorer.score_table(table)
+
+        prior = self.store.load_sessions()
+        table = sessionize(lf.collect(), prior=prior.select("user", "session_no", "end_time"))
+        index = table.index
+
+        # Align carried-over aggregates with the sessions they continue (null rows otherwise)
+        aligned = (
+            index.select("user", "session_no").with_row_index("_row")
+            .join(prior, on=["user", "session_no"], how="left")
+            .sort("_row")
+        )
+        aggregates = self.scorer.aggregate(table.events, index["length"].to_numpy(), prior=aligned.select(list(AGGREGATE_SCHEMA)))
+        scores = self.scorer.finalize(aggregates).with_columns(index["session_id"])
+        continued = int(aligned["event_count"].is_not_null().sum())
+        logger.info(f"{len(index)} session(s) updated from {len(table.events)} new event(s), {continued} continued from earlier runs")
+
+        # Each user's latest session becomes their open session
+        latest = pl.concat([index.select("user", "session_no"), aggregates.select(list(AGGREGATE_SCHEMA))], how="horizontal")
+        latest = latest.filter(pl.Series(np.r_[index["user"].to_numpy()[1:] != index["user"].to_numpy()[:-1], True]))
+        state = pl.concat([prior.filter(~pl.col("user").is_in(latest["user"])), latest.select(list(STATE_SCHEMA))])
+        self._pending = (state, processed | {file_key(f) for f in files})
+        return table, scores
+
+    def commit(self):
+        """Persists the state produced by the last run()."""
+        if self._pending is not None:
+            self.store.save(*self._pending)
+            self._pending = None
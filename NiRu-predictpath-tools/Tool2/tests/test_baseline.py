@@ -0,0 +1,95 @@
+import unittest
+import random
+import shutil
+import tempfile
+from pathlib import Path
+from src.baseline import MIN_BASELINE_SESSIONS, BaselineStore, BehaviorBaselines
+from src.engine import SessionScorer
+from src.ingest import sessionize
+from tests.test_engine import make_events
+
+
+def service_sessions(count, hosts=5, start=0.0):
+    """A service account: bursts of 10 events 50ms apart from app1 to `hosts` databases, 2 hours apart."""
+    rows = []
+    for s in range(count):
+        t = start + s * 7200.0
+        rows += [("svc", t + i * 0.05, "app1", f"db{i % hosts}", "T1078", 0.5) for i in range(10)]
+    return make_events(rows)
+
+
+class TestBehaviorBaselines(unittest.TestCase):
+    def _scores(self, events):
+        table = sessionize(events)
+        return table, SessionScorer().score_table(table)
+
+    def test_batches_match_two_pass_statistics(self):
+        rng = random.Random(2)
+        rows, t = [], 0.0
+        for _ in range(40):
+            t += 7200
+            rows += [("alice", t + k * rng.choice([1.0, 30.0]), "ws1", rng.choice(["fs1", "dc1", "ws2"]), "T1078", 0.4)
+                     for k in range(rng.randint(1, 6))]
+        table, scores = self._scores(make_events(rows))
+        users = table.index["user"]
+
+        baselines = BehaviorBaselines()
+        for start in range(0, len(scores), 7):
+            baselines.update(users.slice(start, 7), scores.slice(start, 7))
+        row = baselines.frame.row(0, named=True)
+        hosts = scores["host_count"].to_numpy().astype(float)
+        self.assertEqual(row["host_count_n"], len(scores))
+        self.assertAlmostEqual(row["host_count_mean"], hosts.mean())
+        self.assertAlmostEqual(row["host_count_m2"] / row["host_count_n"], hosts.var())
+        # Single-event sessions have no inter-event delta
+        self.assertEqual(row["avg_delta_n"], int((scores["event_count"] > 1).sum()))
+
+        # Sessions already folded in are skipped on a rerun
+        self.assertEqual(baselines.update(users, scores), 0)
+
+    def test_usual_behaviour_is_not_penalized(self):
+        scorer = SessionScorer()
+        history, history_scores = self._scores(service_sessions(MIN_BASELINE_SESSIONS))
+        baselines = BehaviorBaselines()
+        baselines.update(history.index["user"], history_scores)
+
+        table, scores = self._scores(service_sessions(1, start=MIN_BASELINE_SESSIONS * 7200.0))
+        plain = scores.row(0, named=True)
+        relative = scorer.finalize(scores, baselines.lookup(table.index["user"])).row(0, named=True)
+        # Machine speed and 6 hosts are this account's norm: only the base risk remains
+        self.assertEqual(plain["path_anomaly_score"], plain["base_risk"] * 1.5 + (6 - 2) * 1.5)
+        self.assertEqual(relative["path_anomaly_score"], relative["base_risk"])
+        self.assertEqual(relative["baseline_deviation"], 0.0)
+
+        # A fan-out well beyond its usual 6 hosts is still penalized (past mean + 3 * MIN_STD)
+        table, scores = self._scores(service_sessions(1, hosts=10, start=MIN_BASELINE_SESSIONS * 7200.0))
+        row = scorer.finalize(scores, baselines.lookup(table.index["user"])).row(0, named=True)
+        self.assertEqual(row["path_anomaly_score"], row["base_risk"] + (11 - 9) * 1.5)
+        self.assertGreater(row["baseline_deviation"], 3)
+
+    def test_unknown_users_keep_absolute_thresholds(self):
+        table, scores = self._scores(service_sessions(1))
+        relative = SessionScorer().finalize(scores, BehaviorBaselines().lookup(table.index["user"]))
+        self.assertEqual(relative["path_anomaly_score"].to_list(), scores["path_anomaly_score"].to_list())
+        self.assertIsNone(relative["baseline_deviation"][0])
+
+
+class TestBaselineStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_round_trip(self):
+        table = sessionize(service_sessions(3))
+        baselines = BehaviorBaselines()
+        baselines.update(table.index["user"], SessionScorer().score_table(table))
+        store = BaselineStore(self.tmp / "baselines")
+        store.save(baselines)
+        self.assertEqual(store.load().frame.to_dicts(), baselines.frame.to_dicts())
+        self.assertEqual(len(BaselineStore(self.tmp / "missing").load()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
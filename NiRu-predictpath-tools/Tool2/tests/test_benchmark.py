@@ -0,0 +1,78 @@
+import unittest
+import shutil
+import tempfile
+from pathlib import Path
+import numpy as np
+import polars as pl
+from src.benchmark.generator import SESSION_SIZE_DISTRIBUTIONS, SessionWorkloadGenerator, parse_scale
+from src.benchmark.runner import find_regressions
+from src.ingest import DataIngester
+
+
+class TestSessionWorkloadGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_deterministic_sessions_and_giants(self):
+        generator = SessionWorkloadGenerator(seed=7, users=50, hosts=40, giant_sessions=1, giant_session_events=2000)
+        manifest = generator.generate(self.tmp / "a", 10_000)
+        generator.generate(self.tmp / "b", 10_000)
+
+        a = pl.read_parquet(self.tmp / "a" / "**" / "*.parquet").sort("event_id")
+        b = pl.read_parquet(self.tmp / "b" / "**" / "*.parquet").sort("event_id")
+        self.assertTrue(a.equals(b))
+        self.assertEqual(len(a), 10_000)
+        self.assertTrue(list((self.tmp / "a").glob("date=*/part-*.parquet")))
+
+        # Sessionization recovers exactly the generated sessions, the giant one intact
+        table = DataIngester(str(self.tmp / "a")).load_sessions()
+        self.assertEqual(len(table), manifest["benign_sessions"] + 1)
+        giant = table.index.filter(pl.col("user") == "G0@DOM1")
+        self.assertEqual(len(giant), 1)
+        self.assertEqual(int(giant["length"][0]), 2000)
+
+    def test_size_distributions_keep_their_mean(self):
+        rng = np.random.default_rng(0)
+        for sizes in SESSION_SIZE_DISTRIBUTIONS:
+            drawn = SessionWorkloadGenerator(sizes=sizes, mean_session_events=20).session_sizes(rng, 200_000)
+            self.assertGreaterEqual(drawn.min(), 1)
+            self.assertAlmostEqual(drawn.mean(), 20, delta=1.0, msg=sizes)
+        with self.assertRaises(ValueError):
+            SessionWorkloadGenerator(sizes="pareto")
+
+    def test_giants_must_fit(self):
+        with self.assertRaises(ValueError):
+            SessionWorkloadGenerator(giant_sessions=1, giant_session_events=1000).generate(self.tmp / "c", 1500)
+
+    def test_parse_scale(self):
+        self.assertEqual(parse_scale("1e5"), 100_000)
+        self.assertEqual(parse_scale("10m"), 10_000_000)
+        with self.assertRaises(ValueError):
+            parse_scale("0")
+
+
+class TestRegressionCheck(unittest.TestCase):
+    def _run(self, score_seconds, rss, workers=1):
+        phases = {"load": {"seconds": 0.1}, "sessionize": {"seconds": 1.0}, "score": {"seconds": score_seconds}, "write": {"seconds": 2.0}}
+        return {"cases": [{"case": "geometric-20/1000000", "workers": workers, "format": "json",
+                           "phases": phases, "peak_rss_bytes": rss}]}
+
+    def test_flags_slower_phase_and_rss_growth(self):
+        history = [self._run(4.0, 100), self._run(2.0, 100)]
+
+        self.assertEqual(find_regressions(self._run(2.2, 110), history), [])
+        problems = find_regressions(self._run(3.0, 200), history)
+        self.assertEqual(len(problems), 2)
+        self.assertIn("score took 3.0s, 50% over baseline 2.0s", problems[0])
+
+    def test_short_phases_and_other_configurations_are_ignored(self):
+        history = [self._run(0.05, 100)]
+        self.assertEqual(find_regressions(self._run(0.2, 100), history), [])
+        self.assertEqual(find_regressions(self._run(9.0, 100, workers=4), history), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import unittest
+import random
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import polars as pl
+from src.domain import EnrichedEvent
+from src.engine import GraphEngine, TemporalChain, MAX_CHAIN_EDGES, MITRE_PHASE_MAP, MITRE_SEVERITY_WEIGHTS
+from src.sketch import SKETCH_HOSTS, TRAIL_LENGTH
+from src.ingest import EVENT_COLUMNS, sessionize
+
+T0 = datetime(2024, 3, 1, 9, tzinfo=timezone.utc)
+
+
+def make_events(rows):
+    """rows: (user, seconds after T0, source_host, target_host, technique, confidence)"""
+    return pl.DataFrame([{
+        "event_id": f"e{i}",
+        "timestamp": T0 + timedelta(seconds=offset),
+        "user": user,
+        "source_host": source,
+        "target_host": target,
+        "event_type": "auth_success",
+        "protocol": "Kerberos",
+        "mitre_technique": technique,
+        "confidence_score": confidence,
+        "data_quality_score": 1.0,
+    } for i, (user, offset, source, target, technique, confidence) in enumerate(rows)]).select(EVENT_COLUMNS)
+
+
+class TestSessionViews(unittest.TestCase):
+    def setUp(self):
+        self.table = sessionize(make_events([
+            ("bob", 0, "ws1", "dc1", "T1078", 0.5),
+            ("alice", 10, "ws2", None, None, 0.2),
+            ("alice", 20, "ws2", "fs1", "T1558", 0.9),
+            ("alice", 5000, "ws2", "fs1", "T1041", 0.0),  # > 60 min gap: new session
+        ]))
+
+    def test_sessions_are_contiguous_row_ranges(self):
+        self.assertEqual(len(self.table), 3)
+        alice = self.table[0]
+        self.assertEqual((alice.session_id, alice.offset, len(alice)), ("alice_1", 0, 2))
+        self.assertEqual(alice.event_ids, ["e1", "e2"])
+        self.assertTrue(alice.is_high_priority)  # confidence 0.9
+        self.assertEqual([s.session_id for s in self.table], ["alice_1", "alice_2", "bob_1"])
+
+    def test_events_materialize_lazily(self):
+        alice = self.table[0]
+        self.assertIsNone(alice._events)
+        shown = alice.materialize(limit=1)
+        self.assertEqual(len(shown), 1)
+        self.assertIsInstance(shown[0], EnrichedEvent)
+        self.assertEqual(alice.events[1].target_host, "fs1")
+
+
+class TestGraphEngine(unittest.TestCase):
+    def test_scores_session_views(self):
+        table = sessionize(make_events([
+            ("alice", 0, "ws1", "dc1", "T1078", 0.5),
+            ("alice", 30, "ws1", "fs1", "T1558", 1.0),
+            ("alice", 60, "ws2", "fs2", None, 0.0),
+        ]))
+        report = GraphEngine().build_and_analyze(table[0])
+
+        # 2.0*0.5 + 8.0*1.0 + 1.0*0.1, no velocity multiplier, 5 hosts -> (5-2)*1.5
+        self.assertAlmostEqual(report.path_anomaly_score, 9.1 + 4.5)
+        self.assertEqual(report.root_cause_node, "e0")
+        self.assertEqual(sorted(report.blast_radius), ["dc1", "fs1", "fs2", "ws1", "ws2"])
+        # Last technique is T1558 -> Credential Access
+        self.assertEqual(report.prediction_vector[0].next_node, "Lateral Movement")
+
+    def test_vectorized_scores_match_per_session_scoring(self):
+        rng = random.Random(7)
+        rows = []
+        for user in ("alice", "bob", "carol", "dave"):
+            t = 0.0
+            for _ in range(rng.randint(1, 40)):
+                t += rng.choice([0.05, 1, 30, 900, 4000])
+                rows.append((user, t, rng.choice(["ws1", "ws2", ""]), rng.choice(["dc1", "", None]),
+                             rng.choice(["T1078", "T1558", "T1041", "", None]), rng.choice([0.0, 0.15, 0.7, 1.0])))
+        table = sessionize(make_events(rows))
+        engine = GraphEngine()
+        scores = engine.analyze_table(table)
+
+        self.assertEqual(len(scores), len(table))
+        for row, session in zip(scores.iter_rows(named=True), table):
+            expected = _reference_report(session)
+            self.assertEqual(row["path_anomaly_score"], expected["path_anomaly_score"])  # exact, not approximate
+            self.assertEqual(row["blast_radius"], sorted(expected["blast_radius"]))
+            self.assertEqual(row["last_phase"], expected["last_phase"])
+            self.assertEqual(row["root_cause_node"], session.event_ids[0])
+
+    def test_parallel_scoring_matches_in_process(self):
+        rng = random.Random(3)
+        rows = [(f"user{rng.randint(0, 30)}", rng.uniform(0, 20000), rng.choice(["ws1", "ws2"]), rng.choice(["dc1", None]),
+                 rng.choice(["T1078", "T1041", None]), rng.random()) for _ in range(2000)]
+        table = sessionize(make_events(rows))
+        engine = GraphEngine()
+        expected = engine.analyze_table(table)
+        with mock.patch("src.engine.MIN_EVENTS_PER_WORKER", 100):
+            self.assertTrue(engine.analyze_table(table, workers=3).equals(expected))
+
+    def test_batched_scoring_matches_whole_table(self):
+        rng = random.Random(5)
+        rows = [(f"user{rng.randint(0, 30)}", rng.uniform(0, 20000), rng.choice(["ws1", "ws2"]), rng.choice(["dc1", None]),
+                 rng.choice(["T1078", "T1041", None]), rng.random()) for _ in range(500)]
+        table = sessionize(make_events(rows))
+        engine = GraphEngine()
+        expected = engine.analyze_table(table)
+        for batch_events in (1, 40, 10 ** 6):
+            batches = list(engine.scorer.iter_score_table(table, batch_events=batch_events))
+            # Batches hold whole sessions; a session longer than the budget is a batch of its own
+            self.assertEqual(len(batches) == 1, batch_events == 10 ** 6)
+            self.assertTrue(pl.concat(batches).equals(expected), batch_events)
+
+    def test_oversized_sessions_are_sketched(self):
+        rows = [("alice", i * 0.1, f"ws{i % 3000}", "dc1", "T1041" if i % 2 else "T1078", 0.5) for i in range(MAX_CHAIN_EDGES + 2)]
+        rows.append(("bob", 0, "", None, None, 0.5))
+        table = sessionize(make_events(rows))
+        engine = GraphEngine()
+        scores = engine.analyze_table(table)
+
+        self.assertEqual(scores["session_id"].to_list(), ["alice_1", "bob_1"])
+        alice, bob = scores.iter_rows(named=True)
+        self.assertTrue(alice["sketched"])
+        self.assertFalse(bob["sketched"])
+        self.assertEqual(bob["blast_radius"], [])
+
+        # Severity sums stay exact; only the host count is estimated
+        base_risk = 0.0
+        for e in table[0].events:
+            base_risk += MITRE_SEVERITY_WEIGHTS[e.mitre_technique] * e.confidence_score
+        self.assertEqual(alice["base_risk"], base_risk)
+        self.assertAlmostEqual(alice["host_count"], 3001, delta=3001 * 0.05)
+        self.assertEqual(alice["path_anomaly_score"], 100.0)
+        self.assertEqual(len(alice["blast_radius"]), SKETCH_HOSTS)
+        self.assertEqual(alice["technique_trail"], ["T1078", "T1041"] * (TRAIL_LENGTH // 2))
+
+        record = engine.scorer.to_record(alice, T0)
+        self.assertEqual(record["blast_radius_estimate"], alice["host_count"])
+        self.assertNotIn("blast_radius_estimate", engine.scorer.to_record(bob, T0))
+        self.assertEqual(engine.build_and_analyze(table[0]).blast_radius_estimate, alice["host_count"])
+
+
+class TestTemporalChain(unittest.TestCase):
+    def test_chain_arrays_are_session_views(self):
+        table = sessionize(make_events([
+            ("bob", 0, "ws9", "dc1", "T1110", 0.5),
+            ("alice", 0, "ws1", "dc1", "T1078", 0.5),
+            ("alice", 1.5, "ws2", "fs1", None, 0.5),
+            ("alice", 4, "ws2", "fs1", "T1041", 0.5),
+        ]))
+        chain = TemporalChain.from_session(table[0])
+
+        self.assertEqual((chain.number_of_nodes(), chain.number_of_edges()), (3, 2))
+        self.assertEqual(chain.delta_t.tolist(), [1.5, 2.5])
+        self.assertEqual(chain.phases(), ["Initial Access", "Unknown", "Exfiltration"])
+        self.assertTrue(np.shares_memory(chain.timestamps, table.array("timestamp")))
+
+        chain.add_edges([0], [2])
+        self.assertEqual(chain.number_of_edges(), 3)
+        self.assertEqual(chain.delta_t[-1], 4.0)
+
+    def test_explosion_guard_precedes_allocation(self):
+        table = sessionize(make_events([("alice", i, "ws1", None, None, 0.5) for i in range(4)]))
+        self.assertIsNone(TemporalChain.from_session(table[0], max_edges=2))
+        self.assertNotIn("timestamp", table._arrays)
+        self.assertIsNotNone(TemporalChain.from_session(table[0], max_edges=3))
+
+
+def _reference_report(session):
+    """The original one-event-at-a-time scoring, kept as the oracle for the vectorized scorer."""
+    events = session.events
+    base_risk = 0.0
+    for e in events:
+        weight = MITRE_SEVERITY_WEIGHTS.get(e.mitre_technique or "Unknown", 1.0)
+        base_risk += weight * e.confidence_score if e.confidence_score > 0.0 else weight * 0.1
+    velocity_mult = 1.0
+    if len(events) > 1:
+        total_duration = (events[-1].timestamp - events[0].timestamp).total_seconds()
+        if total_duration / (len(events) - 1) < 0.2:
+            velocity_mult = 1.5
+        elif total_duration / 60 > 600:
+            velocity_mult = 1.2
+    hosts = {h for e in events for h in (e.source_host, e.target_host) if h}
+    phases = [MITRE_PHASE_MAP.get(e.mitre_technique, "Unknown") for e in events if e.mitre_technique]
+    return {
+        "path_anomaly_score": min(base_risk * velocity_mult + max(0, len(hosts) - 2) * 1.5, 100.0),
+        "blast_radius": list(hosts),
+        "last_phase": phases[-1] if phases else "Unknown",
+    }
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import random
+import shutil
+import tempfile
+from pathlib import Path
+import numpy as np
+import polars as pl
+from src.graph import HOST, USER, GraphStore, InteractionGraph, update_graph
+from tests.test_engine import make_events
+
+EDGES = pl.DataFrame({
+    "user": ["alice", "alice", "bob", "bob"],
+    "source_host": ["ws1", "ws1", "ws2", "fs1"],
+    "target_host": ["fs1", "fs1", "fs1", "dc1"],
+})
+
+
+class TestInteractionGraph(unittest.TestCase):
+    def test_edges_are_weighted_and_directed(self):
+        graph = InteractionGraph()
+        graph.update(EDGES)
+        alice, = graph.ids(["alice"], USER)
+        ws1, fs1, dc1 = graph.ids(["ws1", "fs1", "dc1"], HOST)
+
+        self.assertEqual(sorted(graph.name(e) for e in graph.neighbors(alice)), ["fs1", "ws1"])
+        row = graph.neighbors(ws1).tolist().index(fs1)
+        self.assertEqual(graph.weights[graph.indptr[ws1] + row], 2)
+        self.assertEqual(graph.out_degree()[dc1], 1)  # dc1 -> bob (credential exposure)
+        self.assertEqual(graph.in_degree()[fs1], 4)  # alice, bob, ws1, ws2
+
+    def test_batches_merge_to_one_shot_graph(self):
+        rng = random.Random(5)
+        events = pl.DataFrame({
+            "user": [rng.choice(["alice", "bob", "carol"]) for _ in range(400)],
+            "source_host": [rng.choice(["ws1", "ws2", "ws3", None]) for _ in range(400)],
+            "target_host": [rng.choice(["fs1", "dc1", "ws1", ""]) for _ in range(400)],
+        })
+        whole = InteractionGraph()
+        whole.update(events)
+        batched = InteractionGraph()
+        for start in range(0, 400, 150):
+            batched.update(events.slice(start, 150))
+
+        def edges(graph):
+            names = graph.entities["name"].to_list()
+            rows = np.repeat(np.arange(len(graph)), graph.out_degree())
+            return sorted(zip([names[r] for r in rows], [names[c] for c in graph.indices], graph.weights.tolist()))
+        self.assertEqual(edges(batched), edges(whole))
+        self.assertEqual(int(whole.weights.sum()), int(batched.weights.sum()))
+
+    def test_reachable_hosts_are_nearest_first_beyond_blast_radius(self):
+        graph = InteractionGraph()
+        graph.update(EDGES)
+        scores = pl.DataFrame({"blast_radius": [["ws1"], [], ["nowhere"]]}, schema={"blast_radius": pl.List(pl.String)})
+        users = pl.Series(["alice", "carol", "alice"])
+
+        one = graph.reachable_hosts(scores, users, 1)
+        self.assertEqual(one["reachable_hosts"].to_list(), [["fs1"], [], ["fs1", "ws1"]])
+        two = graph.reachable_hosts(scores, users, 2)
+        # fs1 -> dc1 is the second hop; ws2 (via bob) would take a third
+        self.assertEqual(two["reachable_hosts"][0].to_list(), ["fs1", "dc1"])
+        self.assertEqual(two["reachable_host_count"].to_list(), [2, 0, 3])
+        self.assertEqual(graph.name(graph.reachable(graph.ids(["dc1"], HOST), 1)[0]), "bob")
+
+
+class TestGraphStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_files_are_folded_in_once(self):
+        output = self.tmp / "output" / "date=2024-03-01"
+        output.mkdir(parents=True)
+        events = make_events([("alice", 0.0, "ws1", "fs1", "T1078", 0.5), ("bob", 1.0, "fs1", "dc1", None, 0.9)])
+        events.write_parquet(output / "part-0.parquet")
+
+        store = GraphStore(self.tmp / "graph")
+        graph, files, new = update_graph(store, str(self.tmp / "output"))
+        store.save(graph, files)
+        again, files, new = update_graph(store, str(self.tmp / "output"))
+
+        self.assertEqual(new, 0)
+        self.assertEqual(again.entities.to_dicts(), graph.entities.to_dicts())
+        self.assertEqual((again.indptr.tolist(), again.weights.tolist()), (graph.indptr.tolist(), graph.weights.tolist()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import random
+import shutil
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+import polars as pl
+from src.domain import SessionSpec
+from src.ingest import DataIngester, EVENT_COLUMNS, parse_bound, sessionize, sessionize_many, tag_sessions
+
+
+def write_partition(root: Path, day: datetime, users, hosts):
+    """Writes one Tool1-style partition (including columns Tool2 never reads)."""
+    rows = []
+    for i, (user, host) in enumerate(zip(users, hosts)):
+        rows.append({
+            "event_id": f"{day:%Y%m%d}-{i}",
+            "timestamp": day + timedelta(minutes=i),
+            "event_type": "auth_success",
+            "source_host": host,
+            "target_host": "dc1",
+            "user": user,
+            "protocol": "NTLM",
+            "port": 445,
+            "mitre_technique": "T1078",
+            "mitre_tactic": None,
+            "confidence_score": 0.5,
+            "data_quality_score": 1.0,
+            "raw_source": "x" * 64,
+            "event_hash": "0" * 64,
+        })
+    path = root / f"date={day:%Y-%m-%d}" / "events.parquet"
+    path.parent.mkdir(parents=True)
+    pl.DataFrame(rows).write_parquet(path)
+
+
+class TestDataIngester(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        for d in range(3):
+            day = datetime(2024, 3, 1 + d, 9, tzinfo=timezone.utc)
+            write_partition(self.root, day, ["alice", "bob", "alice"], ["ws1", "ws2", "ws3"])
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_prunes_partitions_outside_window(self):
+        ingester = DataIngester(str(self.root), since=parse_bound("2024-03-02"), until=parse_bound("2024-03-02", end_of_day=True))
+        self.assertEqual([f.parent.name for f in ingester.resolve_files()], ["date=2024-03-02"])
+
+        df = ingester.scan().collect()
+        self.assertEqual(df.columns, EVENT_COLUMNS)
+        self.assertEqual(len(df), 3)
+
+    def test_time_user_and_host_filters(self):
+        since = parse_bound("2024-03-01T09:01:00")
+        df = DataIngester(str(self.root / "**" / "*.parquet"), since=since, users=["alice"]).scan().collect()
+        self.assertEqual(len(df), 5)  # alice's 09:00 event on the first day is before the window
+        self.assertEqual(set(df["user"]), {"alice"})
+
+        df = DataIngester(str(self.root), hosts=["ws2"]).scan().collect()
+        self.assertEqual(df["event_id"].to_list(), ["20240301-1", "20240302-1", "20240303-1"])
+
+    def test_load_sessions_across_partitions(self):
+        sessions = DataIngester(str(self.root), users=["bob"]).load_sessions()
+        # Days are 24h apart, far beyond the 60 minute gap
+        self.assertEqual(len(sessions), 3)
+        self.assertTrue(all(s.user == "bob" for s in sessions))
+
+    def test_integrity_checks_footers(self):
+        self.assertTrue(DataIngester(str(self.root)).verify_integrity())
+        self.assertTrue(DataIngester(str(self.root), since=parse_bound("2030-01-01")).verify_integrity())
+        self.assertFalse(DataIngester(str(self.root / "missing")).verify_integrity())
+
+        pl.DataFrame({"event_id": ["x"]}).write_parquet(self.root / "date=2024-03-01" / "partial.parquet")
+        self.assertFalse(DataIngester(str(self.root)).verify_integrity())
+
+
+class TestSessionSpecs(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(5)
+        t0 = datetime(2024, 3, 1, tzinfo=timezone.utc)
+        self.events = pl.DataFrame([{
+            "event_id": f"e{i}",
+            "timestamp": t0 + timedelta(seconds=rng.randint(0, 6 * 3600)),
+            "user": rng.choice(["alice", "bob"]),
+            "source_host": rng.choice(["ws1", "ws2", "ws3"]),
+            "target_host": "dc1",
+            "event_type": "auth_success",
+            "protocol": None,
+            "mitre_technique": None,
+            "confidence_score": 0.5,
+            "data_quality_score": 1.0,
+        } for i in range(300)]).select(EVENT_COLUMNS)
+        self.specs = [SessionSpec.parse(text) for text in ("user:60m", "user:5m", "user+source_host:30m", "source_host:5m")]
+
+    def test_parse(self):
+        self.assertEqual(SessionSpec.parse("user+source_host:30m"), SessionSpec(keys=("user", "source_host"), gap=timedelta(minutes=30)))
+        self.assertEqual(SessionSpec.parse("user").name, "user:60m")
+        self.assertEqual(SessionSpec.parse("source_host:90s").name, "source_host:90s")
+        with self.assertRaises(ValueError):
+            SessionSpec.parse("password:5m")
+
+    def test_one_pass_matches_reference(self):
+        tables = sessionize_many(self.events, self.specs)
+        tagged = tag_sessions(self.events, self.specs)
+        for spec in self.specs:
+            expected = _reference_sessions(self.events, spec)
+            table = tables[spec]
+            self.assertEqual(sorted(s.session_id for s in table), sorted(expected))
+            for session in table:
+                self.assertEqual(session.event_ids, expected[session.session_id])
+            by_event = dict(zip(tagged["event_id"], tagged[spec.name]))
+            self.assertTrue(all(by_event[e] == sid for sid, ids in expected.items() for e in ids))
+
+        # Specs with the same key share one sorted events frame
+        self.assertIs(tables[self.specs[0]].events, tables[self.specs[1]].events)
+        self.assertTrue(sessionize(self.events).index.equals(tables[SessionSpec()].index))
+
+
+def _reference_sessions(events, spec):
+    """Session id -> event ids, one event at a time."""
+    sessions, last = {}, {}
+    for row in sorted(events.iter_rows(named=True), key=lambda r: (tuple(r[k] for k in spec.keys), r["timestamp"])):
+        key = tuple(row[k] for k in spec.keys)
+        number, previous = last.get(key, (0, None))
+        if previous is None or row["timestamp"] - previous > spec.gap:
+            number += 1
+        last[key] = (number, row["timestamp"])
+        sessions.setdefault(f"{'+'.join(key)}_{number}", []).append(row["event_id"])
+    return sessions
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import json
+import random
+import shutil
+import tempfile
+from pathlib import Path
+import polars as pl
+from src.report import TopK, open_report_writer, report_format
+
+RECORDS = [
+    {
+        "session_id": f"alice_{i}",
+        "root_cause_node": f"e{i}",
+        "blast_radius": ["dc1", "ws1"][:i],
+        "path_anomaly_score": 1.5 * i,
+        "prediction_vector": [{"next_node": "Discovery", "probability": 0.3}, {"next_node": "Lateral Movement", "probability": 0.7}],
+        "generated_at": "2024-03-01T09:00:00",
+    }
+    for i in range(3)
+]
+
+
+class TestReportWriters(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _write(self, name, batches):
+        path = self.tmp / name
+        with open_report_writer(str(path)) as writer:
+            for batch in batches:
+                writer.write(batch)
+        return path
+
+    def test_json_matches_indented_dump(self):
+        for records in (RECORDS, []):
+            path = self._write("path_report.json", [records[:1], [], records[1:]])
+            self.assertEqual(path.read_text(), json.dumps(records, indent=2))
+
+    def test_ndjson_is_one_report_per_line(self):
+        path = self._write("path_report.ndjson", [RECORDS[:2], RECORDS[2:]])
+        self.assertEqual([json.loads(line) for line in path.read_text().splitlines()], RECORDS)
+
+    def test_parquet_keeps_prediction_vector_nested(self):
+        path = self._write("path_report.parquet", [RECORDS[:1], RECORDS[1:]])
+        frame = pl.read_parquet(path)
+        self.assertEqual(frame.select(list(RECORDS[0])).to_dicts(), RECORDS)
+        self.assertEqual(frame.schema["prediction_vector"], pl.List(pl.Struct({"next_node": pl.String, "probability": pl.Float64})))
+
+    def test_parquet_writes_one_row_group_per_batch(self):
+        import pyarrow.parquet as pq
+
+        path = self._write("path_report.parquet", [RECORDS[:2], [], RECORDS[2:]])
+        self.assertEqual([pq.ParquetFile(path).metadata.row_group(i).num_rows for i in range(2)], [2, 1])
+        self.assertEqual(pq.ParquetFile(path).metadata.num_row_groups, 2)
+
+        empty = pl.read_parquet(self._write("empty.parquet", []))
+        self.assertTrue(empty.is_empty())
+        self.assertEqual(empty.schema["blast_radius"], pl.List(pl.String))
+
+    def test_format_from_suffix(self):
+        self.assertEqual(report_format("out.jsonl"), "ndjson")
+        self.assertEqual(report_format("out.PARQUET"), "parquet")
+        self.assertEqual(report_format("out.json"), "json")
+        self.assertEqual(report_format("out.json", "ndjson"), "ndjson")
+
+
+class TestTopK(unittest.TestCase):
+    def test_keeps_highest_scores_earliest_first_on_ties(self):
+        rng = random.Random(1)
+        scores = [rng.choice([0.5, 2.0, 7.5, 100.0]) for _ in range(500)]
+        top = TopK(10)
+        for i, score in enumerate(scores):
+            top.push(score, i)
+
+        expected = sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:10]
+        self.assertEqual(top.items(), expected)
+        self.assertEqual((top.seen, len(top)), (500, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import shutil
+import tempfile
+from pathlib import Path
+import polars as pl
+from src.engine import MITRE_SEVERITY_WEIGHTS
+from src.rolling import ROLLING_SCHEMA, rolling_risk, write_rolling
+from tests.test_engine import make_events
+
+
+class TestRollingRisk(unittest.TestCase):
+    def setUp(self):
+        # bob interleaves with alice; two alice events share a timestamp
+        self.events = make_events([
+            ("alice", 0.0, "ws1", "fs1", "T1078", 0.5),
+            ("bob", 10.0, "ws2", "dc1", "T1558", 0.9),
+            ("alice", 200.0, "ws1", "dc1", "T1558", 1.0),
+            ("alice", 200.0, "ws1", "dc1", None, 0.0),
+            ("alice", 400.0, "ws1", "fs1", "T1078", 0.5),
+            ("alice", 5000.0, "ws1", "fs1", "T1041", 1.0),
+        ]).sort("timestamp")
+
+    def test_windows_and_buckets(self):
+        series = rolling_risk(self.events)
+        self.assertEqual(series.schema, pl.Schema(ROLLING_SCHEMA))
+        self.assertEqual(series["user"].to_list(), ["alice", "alice", "alice", "bob"])
+        first, second, last = series.head(3).to_dicts()
+
+        t1078, t1558, unknown = MITRE_SEVERITY_WEIGHTS["T1078"] * 0.5, MITRE_SEVERITY_WEIGHTS["T1558"], 0.1
+        self.assertEqual(first["events"], 3)
+        self.assertAlmostEqual(first["risk"], t1078 + t1558 + unknown)
+        # At 400s the event at 0s has left the 5m window but not the 1h one
+        self.assertEqual(second["events"], 1)
+        self.assertAlmostEqual(second["risk_5m"], t1558 + unknown + t1078)
+        self.assertAlmostEqual(second["risk_1h"], 2 * t1078 + t1558 + unknown)
+        self.assertAlmostEqual(last["risk_1h"], MITRE_SEVERITY_WEIGHTS["T1041"])
+        self.assertAlmostEqual(last["risk_24h"], 2 * t1078 + t1558 + unknown + MITRE_SEVERITY_WEIGHTS["T1041"])
+
+    def test_write_round_trip(self):
+        tmp = Path(tempfile.mkdtemp())
+        try:
+            series = rolling_risk(self.events)
+            write_rolling(series, str(tmp / "rolling.parquet"))
+            self.assertEqual(pl.read_parquet(tmp / "rolling.parquet").to_dicts(), series.to_dicts())
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import shutil
+import tempfile
+from pathlib import Path
+import numpy as np
+import polars as pl
+from src.engine import SessionScorer
+from src.ingest import sessionize
+from src.similarity import FEATURE_DIM, FEATURE_NAMES, SimilarityIndex, SimilarityStore, annotate, feature_vectors
+from tests.test_engine import make_events
+
+
+def random_index(count, seed=0):
+    """An index of `count` unit vectors around 20 centres, keyed k0, k1, ..."""
+    rng = np.random.default_rng(seed)
+    centres = rng.random((20, FEATURE_DIM))
+    vectors = centres[rng.integers(0, 20, count)] + rng.normal(0, 0.05, (count, FEATURE_DIM))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    keys = pl.Series([f"k{i}" for i in range(count)])
+    scores = pl.DataFrame({
+        "session_id": keys,
+        "path_anomaly_score": np.arange(count, dtype=np.float64),
+        "end_time": pl.Series([None] * count, dtype=pl.Datetime("us", "UTC")),
+    })
+    index = SimilarityIndex()
+    index.add(keys, scores, vectors)
+    return index, keys, scores, vectors
+
+
+class TestFeatureVectors(unittest.TestCase):
+    def test_layout(self):
+        table = sessionize(make_events([
+            ("alice", 0.0, "ws1", "fs1", "T1078", 0.5),
+            ("alice", 60.0, "fs1", "dc1", "T1003", 0.9),
+            ("alice", 120.0, "dc1", "db1", "T1003", 0.9),
+            ("alice", 180.0, "db1", "ext", None, 0.0),
+        ]))
+        vector = feature_vectors(SessionScorer().score_table(table))[0]
+        self.assertEqual(vector.shape, (FEATURE_DIM,))
+        self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+        named = dict(zip(FEATURE_NAMES, vector))
+        # Phase fractions 1/4 : 2/4 : 1/4 keep their ratio after normalisation
+        self.assertAlmostEqual(named["phase:Credential Access"], 2 * named["phase:Initial Access"], places=5)
+        self.assertAlmostEqual(named["phase:Unknown"], named["phase:Initial Access"], places=5)
+        self.assertGreater(named["technique:T1003"], 0)
+        self.assertEqual(named["technique:T1041"], 0)
+        self.assertGreater(named["fan_out"], 0)
+
+
+class TestSimilarityIndex(unittest.TestCase):
+    def test_exact_search_matches_brute_force(self):
+        index, _, _, vectors = random_index(1000)
+        queries = vectors[:50]
+        sims, rows = index.search(queries, 5)
+        expected = np.sort(queries @ vectors.T, axis=1)[:, ::-1][:, :5]
+        np.testing.assert_allclose(sims, expected, rtol=1e-5)
+        np.testing.assert_allclose(np.take_along_axis(queries @ vectors.T, rows, axis=1), sims, rtol=1e-5)
+
+    def test_excludes_own_key_and_pads(self):
+        index, keys, _, vectors = random_index(3)
+        sims, rows = index.search(vectors, 5, exclude=keys)
+        for q in range(3):
+            self.assertEqual(sorted(rows[q, :2].tolist()), sorted(set(range(3)) - {q}))
+            self.assertEqual(rows[q, 2:].tolist(), [-1, -1, -1])
+            self.assertTrue(np.isneginf(sims[q, 2:]).all())
+
+    def test_ivf_recall_and_unindexed_tail(self):
+        index, keys, scores, vectors = random_index(5000)
+        exact = index.search(vectors[:100], 10)[1]
+        index.build_ivf()
+        self.assertEqual(index.indexed_rows, 5000)
+        approximate = index.search(vectors[:100], 10)[1]
+        recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(exact, approximate)])
+        self.assertGreater(recall, 0.9)
+
+        # Sessions added after the build are found through the exact tail scan
+        fresh = np.zeros((1, FEATURE_DIM), dtype=np.float32)
+        fresh[0, 0] = 1
+        self.assertEqual(index.add(pl.Series(["new"]), scores.head(1).with_columns(pl.lit("new").alias("session_id")), fresh), 1)
+        self.assertEqual(index.indexed_rows, 5000)
+        sims, rows = index.search(fresh, 1)
+        self.assertEqual(rows[0, 0], 5000)
+        self.assertAlmostEqual(float(sims[0, 0]), 1.0, places=5)
+
+    def test_readded_session_updates_in_place(self):
+        index, keys, scores, vectors = random_index(10)
+        updated = scores.head(1).with_columns(pl.lit(99.0).alias("path_anomaly_score"))
+        self.assertEqual(index.add(keys.head(1), updated, vectors[[5]]), 0)
+        self.assertEqual(len(index), 10)
+        self.assertEqual(index.entries["path_anomaly_score"][0], 99.0)
+        np.testing.assert_array_equal(index.vectors[0], vectors[5])
+
+    def test_annotate_alerting_rows(self):
+        index, keys, scores, vectors = random_index(100)
+        annotated = annotate(index, scores.head(3), keys.head(3), vectors[:3], 2, np.array([True, False, True]))
+        similar = annotated["similar_sessions"].to_list()
+        self.assertIsNone(similar[1])
+        self.assertEqual(len(similar[0]), 2)
+        self.assertNotIn("k0", [match["session_id"] for match in similar[0]])
+        self.assertEqual(annotated["feature_vector"].list.len().to_list(), [FEATURE_DIM] * 3)
+
+
+class TestSimilarityStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_round_trip(self):
+        index, _, _, vectors = random_index(500)
+        index.build_ivf()
+        store = SimilarityStore(self.tmp / "index")
+        store.save(index)
+        loaded = store.load()
+        self.assertEqual(loaded.entries.to_dicts(), index.entries.to_dicts())
+        np.testing.assert_array_equal(loaded.vectors, index.vectors)
+        self.assertEqual(loaded.indexed_rows, 500)
+        np.testing.assert_array_equal(loaded.search(vectors[:5], 3)[1], index.search(vectors[:5], 3)[1])
+        self.assertEqual(len(SimilarityStore(self.tmp / "missing").load()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
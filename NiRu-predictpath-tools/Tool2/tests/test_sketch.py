@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+from src.sketch import bottom_k, hll_estimate, hll_registers, host_hashes, reservoir_positions
+
+
+class TestSketches(unittest.TestCase):
+    def test_hyperloglog_estimates_and_merges(self):
+        hosts = [f"host{i}" for i in range(20000)]
+        hashes = host_hashes(hosts)
+        # Two sessions in one call, then split halves merged by elementwise max
+        registers = hll_registers(np.r_[np.zeros(20000, dtype=np.int64), np.ones(50, dtype=np.int64)],
+                                  np.r_[hashes, hashes[:50]], 2)
+        estimate = hll_estimate(registers)
+        self.assertAlmostEqual(estimate[0], 20000, delta=20000 * 0.05)
+        self.assertAlmostEqual(estimate[1], 50, delta=2)
+
+        halves = [hll_registers(np.zeros(10000, dtype=np.int64), part, 1)[0] for part in (hashes[:10000], hashes[10000:])]
+        np.testing.assert_array_equal(np.maximum(*halves), registers[0])
+
+    def test_bottom_k_of_union_is_union_of_bottom_k(self):
+        left, right = [f"a{i}" for i in range(300)], [f"b{i}" for i in range(300)]
+        self.assertEqual(bottom_k(bottom_k(left, 20) + bottom_k(right, 20), 20), bottom_k(left + right, 20))
+        self.assertEqual(bottom_k(["b", "a"], 20), ["a", "b"])
+
+    def test_reservoir_is_uniform_and_bounded(self):
+        self.assertEqual(reservoir_positions(5, 10), [0, 1, 2, 3, 4])
+        sample = reservoir_positions(10 ** 9, 10, seed=7)
+        self.assertEqual((len(sample), sample, max(sample) < 10 ** 9), (10, sorted(sample), True))
+        self.assertEqual(sample, reservoir_positions(10 ** 9, 10, seed=7))
+
+        counts = np.zeros(20)
+        for seed in range(4000):
+            counts[reservoir_positions(20, 5, seed)] += 1
+        self.assertLess(np.abs(counts / 4000 - 0.25).max(), 0.04)
+
+
+if __name__ == '__main__':
+    unittest.main()
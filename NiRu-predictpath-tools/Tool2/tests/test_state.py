@@ -0,0 +1,109 @@
+import sys
+import unittest
+import random
+import shutil
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from src.engine import MAX_CHAIN_EDGES, SessionScorer
+from src.ingest import DataIngester, sessionize
+from src.state import IncrementalSessionizer, SessionStateStore
+from tests.test_engine import make_events
+
+
+class TestIncrementalSessionizer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.output = self.tmp / "output"
+        rng = random.Random(11)
+        rows = []
+        for user in ("alice", "bob", "carol"):
+            t = 0.0
+            for _ in range(30):
+                t += rng.choice([0.1, 20, 600, 5000])
+                rows.append((user, t, rng.choice(["ws1", "ws2"]), rng.choice(["dc1", "fs1", None]),
+                             rng.choice(["T1078", "T1558", None]), rng.choice([0.0, 0.4, 0.9])))
+        self.events = make_events(rows).sort("timestamp")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _write(self, name, frame):
+        path = self.output / "date=2024-03-01" / f"{name}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        frame.write_parquet(path)
+
+    def _run(self):
+        ingester = DataIngester(str(self.output))
+        incremental = IncrementalSessionizer(SessionStateStore(self.tmp / "state"), SessionScorer())
+        incremental.prepare(ingester)
+        table, scores = incremental.run(ingester)
+        incremental.commit()
+        return scores
+
+    def test_batches_match_one_shot_scoring(self):
+        full = sessionize(self.events)
+        expected = {r["session_id"]: r for r in SessionScorer().score_table(full).drop("_session").iter_rows(named=True)}
+
+        # Split mid-session so open sessions must be carried over
+        half = len(self.events) // 2
+        self._write("part-0", self.events.head(half))
+        first = self._run()
+        self._write("part-1", self.events.tail(len(self.events) - half))
+        second = self._run()
+
+        latest = {r["session_id"]: r for r in first.drop("_session").iter_rows(named=True)}
+        latest.update({r["session_id"]: r for r in second.drop("_session").iter_rows(named=True)})
+        self.assertEqual(latest, expected)  # exact, including float scores
+        self.assertTrue(set(first["session_id"]) & set(second["session_id"]))
+
+    def test_session_crossing_chain_limit_keeps_exact_sketches(self):
+        rows = [("alice", i * 0.1, f"ws{i % 700}", f"fs{i % 50}", "T1078", 0.5) for i in range(MAX_CHAIN_EDGES + 500)]
+        events = make_events(rows)
+        expected = SessionScorer().score_table(sessionize(events)).row(0, named=True)
+
+        self._write("part-0", events.head(6000))
+        self.assertFalse(self._run()["sketched"][0])
+        self._write("part-1", events.tail(len(events) - 6000))
+        row = self._run().row(0, named=True)
+
+        # HyperLogLog and bottom-k merge exactly; the trail only restarts from the last technique
+        for name in ("sketched", "base_risk", "host_count", "host_sketch", "blast_radius", "path_anomaly_score"):
+            self.assertEqual(row[name], expected[name], name)
+        self.assertEqual(row["technique_trail"], expected["technique_trail"])
+
+    def test_rerun_without_new_files_is_empty(self):
+        self._write("part-0", self.events)
+        self.assertGreater(len(self._run()), 0)
+        self.assertEqual(len(self._run()), 0)
+        self.assertEqual(len(SessionStateStore(self.tmp / "state").load_sessions()), 3)
+
+    def test_filtered_runs_are_refused(self):
+        self._write("part-0", self.events)
+        store = SessionStateStore(self.tmp / "state")
+        filtered = [
+            DataIngester(str(self.output), users=["alice"]),
+            DataIngester(str(self.output), hosts=["dc1"]),
+            DataIngester(str(self.output), since=datetime(2024, 3, 1, tzinfo=timezone.utc)),
+            DataIngester(str(self.output), until=datetime(2024, 3, 2, tzinfo=timezone.utc)),
+        ]
+        for ingester in filtered:
+            with self.assertRaises(ValueError):
+                IncrementalSessionizer(store, SessionScorer()).prepare(ingester)
+        self.assertEqual(store.load_files(), set())
+
+        # Nothing was consumed, so an unfiltered run still sees every user
+        self.assertEqual(self._run()["session_id"].str.split("_").list.first().unique().sort().to_list(),
+                         ["alice", "bob", "carol"])
+
+    def test_cli_rejects_filters_with_incremental(self):
+        for flag, value in (("--user", "alice"), ("--host", "dc1"), ("--since", "2024-03-01"), ("--until", "2024-03-02")):
+            out = subprocess.run([sys.executable, "-m", "src.main", str(self.output), "--incremental", "--quiet",
+                                  "--state-dir", str(self.tmp / "state"), flag, value],
+                                 cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True)
+            self.assertEqual(out.returncode, 2, flag)
+
+
+if __name__ == '__main__':
+    unittest.main()
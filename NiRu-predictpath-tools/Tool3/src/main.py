@@ -1,32 +1,72 @@
 import argparse
+import os
 import sys
 import json
 import logging
+from pathlib import Path
 from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator
+import polars as pl
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
 from .domain import PredictionSummary, CurrentState
-from .predictor import TrajectoryEngine, get_technique_name
+from .predictor import FORECAST_MODES, TrajectoryEngine, get_technique_name
+from .transitions import DEFAULT_BEAM_WIDTH, DEFAULT_HORIZON
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger("PredictPath-Tool3")
 console = Console()
 
-def load_tool2_report(path: str):
+def load_tool2_report(path: str) -> Iterable[Dict[str, Any]]:
+    """
+    Tool 2 reports as dicts: a JSON array (path_report.json), NDJSON
+    (.ndjson/.jsonl, read one line at a time) or Parquet (read in batches).
+    """
+    if not os.path.exists(path):
+        logger.error(f"Input file not found: {path}")
+        sys.exit(1)
+    suffix = Path(path).suffix.lower()
+    if suffix in (".ndjson", ".jsonl"):
+        return _iter_ndjson(path)
+    if suffix == ".parquet":
+        return _iter_parquet(path)
     try:
         with open(path, 'r') as f:
             return json.load(f)
-    except FileNotFoundError:
-        logger.error(f"Input file not found: {path}")
-        sys.exit(1)
     except json.JSONDecodeError:
         logger.error(f"Invalid JSON in file: {path}")
         sys.exit(1)
 
+def _iter_ndjson(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, 'r') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.error(f"Invalid JSON on line {line_no} of {path}")
+                sys.exit(1)
+
+def _iter_parquet(path: str, batch_rows: int = 10_000) -> Iterator[Dict[str, Any]]:
+    reports = pl.read_parquet(path)
+    for batch in reports.iter_slices(batch_rows):
+        yield from batch.iter_rows(named=True)
+
+def positive_int(value: str) -> int:
+    """argparse type for step counts and widths."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
 def visualize_forecast(summary: PredictionSummary):
     """
     Renders a premium visual forecast to the terminal.
@@ -87,12 +127,16 @@ def visualize_forecast(summary: PredictionSummary):
 
 def main():
     parser = argparse.ArgumentParser(description="Tool 3: Predictive Attack Trajectory Engine (Perfected)")
-    parser.add_argument("input_report", help="Path to Tool 2 output (path_report.json)")
+    parser.add_argument("input_report", help="Path to Tool 2 output (path_report.json, .ndjson or .parquet)")
     parser.add_argument("--output", default="trajectory_forecast.json", help="Output path for JSON predictions")
+    parser.add_argument("--forecast", choices=FORECAST_MODES, default="bfs",
+                        help="bfs: exhaustive 3-step enumeration; markov: matrix-power step probabilities and beam search for deep horizons")
+    parser.add_argument("--horizon", type=positive_int, help=f"Steps to forecast (default: 3 for bfs, {DEFAULT_HORIZON} for markov)")
+    parser.add_argument("--beam-width", type=positive_int, default=DEFAULT_BEAM_WIDTH, help=f"Partial sequences kept per step in markov mode (default: {DEFAULT_BEAM_WIDTH})")
     args = parser.parse_args()
     
     logger.info("Initializing Context-Aware Engine...")
-    engine = TrajectoryEngine()
+    engine = TrajectoryEngine(mode=args.forecast, horizon=args.horizon, beam_width=args.beam_width)
     
     logger.info(f"Loading input from {args.input_report}...")
     tool2_data = load_tool2_report(args.input_report)
@@ -129,7 +173,8 @@ def main():
             observed_techniques=observed,
             last_seen_timestamp=datetime.now(timezone.utc),
             graph_depth=graph_depth,
-            host_scope=blast_radius
+            # Tool 2 --graph reports hosts reachable beyond the blast radius
+            host_scope=blast_radius + (session_report.get("reachable_hosts") or [])
         )
 
         summary = engine.predict(
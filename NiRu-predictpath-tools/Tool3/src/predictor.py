@@ -1,9 +1,17 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import networkx as nx
 import logging
 from datetime import datetime, timezone
 from .domain import PredictedScenario, ReactionTimeWindow, TrajectoryExplainability, PredictionSummary, CurrentState
-from .knowledge_base import TRANSITION_MATRIX, TIME_PRIORS, PREREQUISITES, get_technique_name
+from .knowledge_base import PREREQUISITES, get_technique_name
+from .transitions import DATA_STAGING, DEFAULT_BEAM_WIDTH, DEFAULT_HORIZON, CompiledTransitions, Forecast
+
+# bfs: exhaustive pruned enumeration (3 steps by default); markov: matrix powers + beam search
+FORECAST_MODES = ("bfs", "markov")
+BFS_DEPTH = 3
+
+# Techniques listed per step in the markov horizon summary
+HORIZON_TOP_TECHNIQUES = 3
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +21,19 @@ class TrajectoryEngine:
     constrained by Time Priors, Session Scope, and Graph Topology.
     """
     
-    def __init__(self):
-        self.model_version = "v3.0-Session-Differentiated"
+    def __init__(self, mode: str = "bfs", horizon: Optional[int] = None, beam_width: int = DEFAULT_BEAM_WIDTH):
+        if mode not in FORECAST_MODES:
+            raise ValueError(f"Unknown forecast mode: {mode}. Supported: {', '.join(FORECAST_MODES)}")
+        self.mode = mode
+        self.horizon = horizon or (BFS_DEPTH if mode == "bfs" else DEFAULT_HORIZON)
+        self.beam_width = beam_width
+        self.model_version = "v3.0-Session-Differentiated" if mode == "bfs" else f"v3.1-Markov-Beam-h{self.horizon}"
+        self.transitions = CompiledTransitions()
+        # Forecast paths per context key (see forecast); only explanations vary per session
+        self._forecasts: Dict[Tuple[str, bool, bool, int], List[Forecast]] = {}
+        # Markov mode: matrix powers per (multi_host, staged), step summaries per context key
+        self._powers: Dict[Tuple[bool, bool], Any] = {}
+        self._horizons: Dict[Tuple[str, bool, bool, int], List[Dict[str, float]]] = {}
 
     def predict(self, session_id: str, current_state: CurrentState, current_risk: float) -> PredictionSummary:
         """
@@ -23,9 +42,11 @@ class TrajectoryEngine:
         # 1. Determine Start Node (Latest Technique)
         start_node = current_state.observed_techniques[-1] if current_state.observed_techniques else "T1078"
         
-        # 2. Run Probabilistic BFS
-        # We pass the full history to condition the BFS
-        raw_scenarios = self._bfs_probabilistic_traversal(start_node, current_state, max_depth=3)
+        # 2. Probabilistic forecast, memoized by context; evidence is filled in per session
+        raw_scenarios = [
+            self._build_scenario(list(sequence), prob, t_min, t_max, current_state)
+            for sequence, prob, t_min, t_max in self.forecast(start_node, current_state, max_depth=self.horizon)
+        ]
         
         # 3. Calculate Aggregate Confidence (Dynamic)
         # Factor 1: Data Volume (Richness)
@@ -52,70 +73,60 @@ class TrajectoryEngine:
         elif not raw_scenarios:
             suppression_reason = "No known attack vectors match current state."
 
+        evidence_summary = {"depth_factor": depth_factor, "volume_factor": vol_factor, "top_prob": max_prob}
+        if self.mode == "markov":
+            evidence_summary["horizon_probabilities"] = self.horizon_probabilities(start_node, current_state)
+
         return PredictionSummary(
             session_id=session_id,
             current_state=current_state,
             predicted_scenarios=final_scenarios, 
             model_version=self.model_version,
             aggregate_confidence=aggregate_confidence,
-            evidence_summary={"depth_factor": depth_factor, "volume_factor": vol_factor, "top_prob": max_prob},
+            evidence_summary=evidence_summary,
             suppression_reason=suppression_reason
         )
 
-    def _bfs_probabilistic_traversal(self, start_node: str, state: CurrentState, max_depth: int) -> List[PredictedScenario]:
-        scenarios = []
-        queue = [(start_node, [], 1.0, 0.0, 0.0)] # curr, path, prob, t_min, t_max
-        visited_paths = set()
-
-        while queue:
-            curr, path, prob, t_min, t_max = queue.pop(0)
-            
-            if len(path) > 0:
-                scenarios.append(self._build_scenario(path, prob, t_min, t_max, state))
-            
-            if len(path) >= max_depth:
-                continue
+    def forecast(self, start_node: str, state: CurrentState, max_depth: int) -> List[Forecast]:
+        """
+        Top forecast paths from `start_node`: the pruned BFS, or the beam
+        search in markov mode. Either only depends on
+        the start, whether lateral movement is possible (2+ hosts in scope)
+        and whether data staging was observed, so each such context is
+        traversed once and reused for every later session.
+        """
+        key = self._context(start_node, state, max_depth)
+        forecasts = self._forecasts.get(key)
+        if forecasts is None:
+            if self.mode == "markov":
+                forecasts = self.transitions.beam_search(*key, beam_width=self.beam_width)
+            else:
+                forecasts = self.transitions.traverse(*key)
+            self._forecasts[key] = forecasts
+        return forecasts
 
-            transitions = TRANSITION_MATRIX.get(curr, [])
-            
-            for next_tech, trans_prob in transitions:
-                # --- CONTEXTUAL MODIFIERS ---
-                modifier = 1.0
-                
-                # Constraint 1: Lateral Movement (T1021)
-                # Boost if multiple hosts are reachable. Penalize if stuck on one.
-                if next_tech == "T1021":
-                    if len(state.host_scope) < 2:
-                        modifier = 0.0 # Impossible to move laterally if only 1 host is known/reachable
-                    else:
-                        modifier = 1.2 # Boost if multihost
-                        
-                # Constraint 2: Exfiltration (T1041)
-                # If we have seen Data Staging (T1560) in history, boost Exfil probability
-                if next_tech == "T1041":
-                    if "T1560" in state.observed_techniques:
-                         modifier = 1.5
-                    elif "T1560" not in path:
-                         modifier = 0.5
+    def horizon_probabilities(self, start_node: str, state: CurrentState) -> List[Dict[str, float]]:
+        """
+        Markov mode: for each step 1..horizon, the most likely techniques and
+        their probability of occurring exactly that many steps ahead, read
+        from the context's matrix powers.
+        """
+        key = self._context(start_node, state, self.horizon)
+        summary = self._horizons.get(key)
+        if summary is None:
+            context = key[1:3]
+            if context not in self._powers:
+                self._powers[context] = self.transitions.matrix_powers(*context, self.horizon)
+            steps = self.transitions.step_probabilities(self._powers[context], start_node)
+            techniques = self.transitions.techniques
+            summary = self._horizons[key] = [
+                {techniques[i]: round(float(step[i]), 3) for i in step.argsort()[::-1][:HORIZON_TOP_TECHNIQUES] if step[i] >= 0.001}
+                for step in steps
+            ]
+        return summary
 
-                new_prob = prob * trans_prob * modifier
-                
-                if new_prob < 0.1: # Prune weak paths
-                    continue
-                
-                dwell = TIME_PRIORS.get(next_tech, (0, 3600))
-                new_min = t_min + dwell[0]
-                new_max = t_max + dwell[1]
-                
-                new_path = path + [next_tech]
-                path_sig = "-".join(new_path)
-                
-                if path_sig not in visited_paths:
-                    visited_paths.add(path_sig)
-                    queue.append((next_tech, new_path, new_prob, new_min, new_max))
-        
-        scenarios.sort(key=lambda x: x.probability, reverse=True)
-        return scenarios[:5]
+    def _context(self, start_node: str, state: CurrentState, depth: int) -> Tuple[str, bool, bool, int]:
+        return (start_node, len(state.host_scope) >= 2, DATA_STAGING in state.observed_techniques, depth)
 
     def _build_scenario(self, sequence: List[str], prob: float, t_min: float, t_max: float, state: CurrentState) -> PredictedScenario:
         risk = "Medium"
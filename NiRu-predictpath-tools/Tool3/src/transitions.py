@@ -0,0 +1,208 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .knowledge_base import TRANSITION_MATRIX, TIME_PRIORS
+
+# Dwell time assumed for techniques without a prior (seconds)
+DEFAULT_DWELL = (0, 3600)
+
+# Paths whose probability falls below this are pruned
+MIN_PATH_PROBABILITY = 0.1
+
+# Techniques the contextual modifiers key on
+LATERAL_MOVEMENT = "T1021"
+EXFILTRATION = "T1041"
+DATA_STAGING = "T1560"
+
+# Markov forecasting defaults: steps ahead and partial sequences kept per step
+DEFAULT_HORIZON = 8
+DEFAULT_BEAM_WIDTH = 32
+
+# (sequence, probability, t_min, t_max) of one forecast path
+Forecast = Tuple[Tuple[str, ...], float, float, float]
+
+
+class CompiledTransitions:
+    """
+    TRANSITION_MATRIX and TIME_PRIORS compiled once into integer-indexed
+    arrays: techniques are numbered in order of first appearance, outgoing
+    edges are CSR rows (indptr / targets / probs, in knowledge-base order)
+    and dwell bounds are per-technique vectors. Traversals then work on
+    small ints instead of string lookups and path joins.
+    """
+
+    def __init__(self, matrix: Dict[str, List[Tuple[str, float]]] = TRANSITION_MATRIX,
+                 priors: Dict[str, Tuple[float, float]] = TIME_PRIORS):
+        names: Dict[str, int] = {}
+        for source, edges in matrix.items():
+            names.setdefault(source, len(names))
+            for target, _ in edges:
+                names.setdefault(target, len(names))
+        self.techniques: List[str] = list(names)
+        self.index = names
+
+        self.indptr = np.zeros(len(names) + 1, dtype=np.int64)
+        targets, probs = [], []
+        for i, technique in enumerate(self.techniques):
+            for target, prob in matrix.get(technique, []):
+                targets.append(names[target])
+                probs.append(prob)
+            self.indptr[i + 1] = len(targets)
+        self.targets = np.array(targets, dtype=np.int64)
+        self.probs = np.array(probs, dtype=np.float64)
+        dwell = np.array([priors.get(t, DEFAULT_DWELL) for t in self.techniques], dtype=np.float64).reshape(-1, 2)
+        self.dwell_min, self.dwell_max = dwell[:, 0], dwell[:, 1]
+
+        self.lateral = names.get(LATERAL_MOVEMENT, -1)
+        self.exfiltration = names.get(EXFILTRATION, -1)
+        self.staging = names.get(DATA_STAGING, -1)
+        # Plain-Python views of the rows for the scalar traversal
+        self._rows = [
+            list(zip(self.targets[lo:hi].tolist(), self.probs[lo:hi].tolist()))
+            for lo, hi in zip(self.indptr[:-1].tolist(), self.indptr[1:].tolist())
+        ]
+        self._dwell = list(zip(self.dwell_min.tolist(), self.dwell_max.tolist()))
+
+    def __len__(self) -> int:
+        return len(self.techniques)
+
+    def modifiers(self, multi_host: bool, staged: bool) -> Dict[int, Tuple[float, Optional[float]]]:
+        """
+        Contextual multipliers per target technique, as (modifier, modifier
+        when DATA_STAGING is already on the path; None = same):
+        - lateral movement is impossible with fewer than 2 reachable hosts,
+          and boosted with more;
+        - exfiltration is boosted once staging was observed, and damped
+          unless staging happened earlier on the path.
+        """
+        mods: Dict[int, Tuple[float, Optional[float]]] = {}
+        if self.lateral >= 0:
+            mods[self.lateral] = (1.2 if multi_host else 0.0, None)
+        if self.exfiltration >= 0:
+            mods[self.exfiltration] = (1.5, None) if staged else (0.5, 1.0)
+        return mods
+
+    def traverse(self, start: str, multi_host: bool, staged: bool, max_depth: int, limit: int = 5) -> List[Forecast]:
+        """
+        Breadth-first enumeration of every path of up to `max_depth` steps
+        from `start` whose probability stays above MIN_PATH_PROBABILITY;
+        the `limit` most probable, ties in BFS order. Depends only on its
+        arguments, so callers can memoize by them.
+        """
+        if start not in self.index:
+            return []
+        mods = self.modifiers(multi_host, staged)
+        found: List[Tuple[Tuple[int, ...], float, float, float]] = []
+        queue = deque([(self.index[start], (), 1.0, 0.0, 0.0)])
+        while queue:
+            curr, path, prob, t_min, t_max = queue.popleft()
+            if path:
+                found.append((path, prob, t_min, t_max))
+            if len(path) >= max_depth:
+                continue
+            for nxt, trans_prob in self._rows[curr]:
+                modifier = 1.0
+                if nxt in mods:
+                    modifier, on_staged_path = mods[nxt]
+                    if on_staged_path is not None and self.staging in path:
+                        modifier = on_staged_path
+                new_prob = prob * trans_prob * modifier
+                if new_prob < MIN_PATH_PROBABILITY:
+                    continue
+                dwell_min, dwell_max = self._dwell[nxt]
+                # Each (prefix, successor) pair is generated once, so paths never repeat
+                queue.append((nxt, path + (nxt,), new_prob, t_min + dwell_min, t_max + dwell_max))
+
+        found.sort(key=lambda f: f[1], reverse=True)
+        return [(tuple(self.techniques[i] for i in path), prob, t_min, t_max) for path, prob, t_min, t_max in found[:limit]]
+
+    def markov_matrix(self, multi_host: bool, staged: bool) -> np.ndarray:
+        """
+        Dense transition matrix over 2n states, with the contextual
+        modifiers applied as column masks. State i < n is technique i with
+        no DATA_STAGING on the path yet, state n + i the same technique
+        after it, so the path-dependent exfiltration damping stays exact in
+        a first-order chain. Rows whose modified mass exceeds 1 are
+        renormalised, keeping every k-step mass a probability.
+        """
+        n = len(self)
+        base = np.zeros((n, n))
+        base[np.repeat(np.arange(n), np.diff(self.indptr)), self.targets] = self.probs
+        before, after = np.ones(n), np.ones(n)
+        for column, (modifier, on_staged_path) in self.modifiers(multi_host, staged).items():
+            before[column] = modifier
+            after[column] = modifier if on_staged_path is None else on_staged_path
+
+        matrix = np.zeros((2 * n, 2 * n))
+        matrix[:n, :n] = base * before
+        matrix[n:, n:] = base * after
+        if self.staging >= 0:
+            # Reaching the staging technique moves the path into the second half
+            matrix[:n, n + self.staging] = matrix[:n, self.staging]
+            matrix[:n, self.staging] = 0.0
+        mass = matrix.sum(axis=1, keepdims=True)
+        return np.where(mass > 1.0, matrix / np.where(mass > 1.0, mass, 1.0), matrix)
+
+    def matrix_powers(self, multi_host: bool, staged: bool, horizon: int) -> np.ndarray:
+        """(horizon, 2n, 2n) stack of P, P^2, ..., P^horizon for the context."""
+        matrix = self.markov_matrix(multi_host, staged)
+        powers = np.empty((horizon,) + matrix.shape)
+        current = np.eye(len(matrix))
+        for k in range(horizon):
+            current = powers[k] = current @ matrix
+        return powers
+
+    def step_probabilities(self, powers: np.ndarray, start: str) -> np.ndarray:
+        """
+        (horizon, n) probability of being at each technique exactly k + 1
+        steps after `start` (both path halves folded together).
+        """
+        n = len(self)
+        if start not in self.index:
+            return np.zeros((len(powers), n))
+        rows = powers[:, self.index[start], :]
+        return rows[:, :n] + rows[:, n:]
+
+    def beam_search(self, start: str, multi_host: bool, staged: bool, horizon: int,
+                    beam_width: int = DEFAULT_BEAM_WIDTH, limit: int = 5) -> List[Forecast]:
+        """
+        The `limit` most probable complete sequences from `start` under
+        markov_matrix: paths reaching `horizon` steps, or ending early at a
+        technique with no known successor. Each step keeps only the
+        `beam_width` most probable partial paths, so the cost is
+        O(horizon * beam_width * n) whatever the depth.
+        """
+        if start not in self.index:
+            return []
+        matrix = self.markov_matrix(multi_host, staged)
+        n, states_n = len(self), len(matrix)
+        states = np.array([self.index[start]])
+        paths = np.zeros((1, 0), dtype=np.int64)
+        probs, t_min, t_max = np.ones(1), np.zeros(1), np.zeros(1)
+        complete: List[Tuple[np.ndarray, float, float, float]] = []
+
+        for _ in range(horizon):
+            rows = matrix[states]
+            ended = ~rows.any(axis=1)
+            if paths.shape[1]:
+                complete += [(paths[b], probs[b], t_min[b], t_max[b]) for b in np.flatnonzero(ended)]
+            scores = (probs[:, None] * rows).ravel()
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) == 0:
+                paths = paths[:0]
+                break
+            # Most probable first; ties keep parent then knowledge-base order
+            keep = candidates[np.argsort(-scores[candidates], kind="stable")[:beam_width]]
+            parent, states = np.divmod(keep, states_n)
+            technique = states % n
+            paths = np.hstack([paths[parent], technique[:, None]])
+            probs = scores[keep]
+            t_min = t_min[parent] + self.dwell_min[technique]
+            t_max = t_max[parent] + self.dwell_max[technique]
+        complete += [(paths[b], probs[b], t_min[b], t_max[b]) for b in range(len(paths))]
+
+        complete.sort(key=lambda c: c[1], reverse=True)
+        return [
+            (tuple(self.techniques[i] for i in path.tolist()), float(prob), float(lo), float(hi))
+            for path, prob, lo, hi in complete[:limit]
+        ]
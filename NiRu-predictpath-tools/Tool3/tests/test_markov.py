@@ -0,0 +1,129 @@
+import io
+import sys
+import unittest
+from contextlib import redirect_stderr
+from unittest import mock
+import numpy as np
+from src import main as cli
+from src.transitions import CompiledTransitions
+
+CONTEXTS = [(multi_host, staged) for multi_host in (False, True) for staged in (False, True)]
+
+
+def brute_force(matrix, n, start, horizon):
+    """Every complete sequence with its probability: paths of `horizon` steps, or ending at a state with no successor."""
+    complete = []
+
+    def walk(state, path, prob):
+        successors = np.flatnonzero(matrix[state] > 0)
+        if path and (len(path) == horizon or len(successors) == 0):
+            complete.append((tuple(path), prob))
+            return
+        for nxt in successors:
+            walk(nxt, path + [nxt % n], prob * matrix[state, nxt])
+
+    walk(start, [], 1.0)
+    return complete
+
+
+class TestMarkovForecast(unittest.TestCase):
+    def setUp(self):
+        self.transitions = CompiledTransitions()
+        self.n = len(self.transitions)
+
+    def state(self, technique, staged_path=False):
+        return self.transitions.index[technique] + (self.n if staged_path else 0)
+
+    def test_rows_are_substochastic(self):
+        for context in CONTEXTS:
+            matrix = self.transitions.markov_matrix(*context)
+            self.assertEqual(matrix.shape, (2 * self.n, 2 * self.n))
+            self.assertTrue((matrix >= 0).all())
+            self.assertTrue((matrix.sum(axis=1) <= 1.0 + 1e-12).all(), context)
+
+        # Boosted exfiltration after observed staging pushes T1560's mass over 1; it is renormalised
+        row = self.transitions.markov_matrix(False, True)[self.state("T1560")]
+        self.assertAlmostEqual(row.sum(), 1.0)
+        self.assertAlmostEqual(row[self.state("T1041")], 0.25 * 1.5 / (0.70 + 0.25 * 1.5))
+
+    def test_modifiers_match_the_bfs(self):
+        single, multi = self.transitions.markov_matrix(False, False), self.transitions.markov_matrix(True, False)
+        self.assertEqual(single[self.state("T1078"), self.state("T1021")], 0.0)
+        self.assertAlmostEqual(multi[self.state("T1078"), self.state("T1021")], 0.20 * 1.2)
+        self.assertAlmostEqual(single[self.state("T1046"), self.state("T1041")], 0.05 * 0.5)
+
+    def test_staging_moves_paths_to_the_second_half(self):
+        matrix = self.transitions.markov_matrix(True, False)
+        lateral, staging = self.state("T1021"), self.state("T1560")
+        self.assertEqual(matrix[lateral, staging], 0.0)
+        self.assertAlmostEqual(matrix[lateral, self.state("T1560", staged_path=True)], 0.40)
+
+        # Exfiltration is damped before staging, undamped once staging is on the path
+        self.assertAlmostEqual(matrix[self.state("T1046"), self.state("T1041")], 0.05 * 0.5)
+        self.assertAlmostEqual(
+            matrix[self.state("T1560", staged_path=True), self.state("T1041", staged_path=True)], 0.25
+        )
+        # Nothing leads back out of the staged half
+        self.assertEqual(matrix[self.n:, :self.n].sum(), 0.0)
+
+    def test_matrix_powers(self):
+        for context in CONTEXTS:
+            matrix = self.transitions.markov_matrix(*context)
+            powers = self.transitions.matrix_powers(*context, horizon=4)
+            self.assertEqual(powers.shape, (4, 2 * self.n, 2 * self.n))
+            for k in range(4):
+                np.testing.assert_allclose(powers[k], np.linalg.matrix_power(matrix, k + 1))
+
+            steps = self.transitions.step_probabilities(powers, "T1078")
+            self.assertEqual(steps.shape, (4, self.n))
+            np.testing.assert_allclose(steps[0], matrix[self.state("T1078"), :self.n] + matrix[self.state("T1078"), self.n:])
+            self.assertTrue((steps.sum(axis=1) <= 1.0 + 1e-12).all())
+
+        self.assertFalse(self.transitions.step_probabilities(powers, "T9999").any())
+
+    def test_unbounded_beam_equals_brute_force(self):
+        for context in CONTEXTS:
+            matrix = self.transitions.markov_matrix(*context)
+            for start in ("T1078", "T1110", "T1021", "T1560"):
+                for horizon in (1, 3, 5):
+                    expected = brute_force(matrix, self.n, self.transitions.index[start], horizon)
+                    got = self.transitions.beam_search(start, *context, horizon=horizon,
+                                                       beam_width=10 ** 6, limit=10 ** 6)
+                    named = {tuple(self.transitions.techniques[i] for i in seq): p for seq, p in expected}
+                    self.assertEqual(len(got), len(named), (start, context, horizon))
+                    for seq, prob, _, _ in got:
+                        self.assertAlmostEqual(prob, named[seq])
+                    probs = [prob for _, prob, _, _ in got]
+                    self.assertEqual(probs, sorted(probs, reverse=True))
+
+    def test_beam_keeps_complete_sequences(self):
+        # T1041 leads to techniques with no known successor, so those paths end early
+        forecasts = self.transitions.beam_search("T1041", False, False, horizon=6)
+        self.assertEqual([seq for seq, _, _, _ in forecasts], [("T1486",), ("T1496",)])
+        self.assertEqual(forecasts[0][2:], (60.0, 300.0))
+
+        greedy = self.transitions.beam_search("T1078", True, False, horizon=4, beam_width=1)
+        self.assertEqual(len(greedy), 1)
+        self.assertEqual(self.transitions.beam_search("T9999", True, False, horizon=4), [])
+
+
+class TestForecastOptions(unittest.TestCase):
+    def parse_error(self, *argv):
+        stderr = io.StringIO()
+        with mock.patch.object(sys, "argv", ["tool3", "report.json", *argv]), redirect_stderr(stderr):
+            with self.assertRaises(SystemExit) as exit_info:
+                cli.main()
+        return exit_info.exception.code, stderr.getvalue()
+
+    def test_horizon_and_beam_width_must_be_positive(self):
+        for argv in (["--horizon", "0"], ["--beam-width", "0"], ["--horizon", "-3"], ["--beam-width", "wide"]):
+            code, message = self.parse_error("--forecast", "markov", *argv)
+            self.assertEqual(code, 2, argv)
+            self.assertIn(argv[0], message)
+
+    def test_positive_int(self):
+        self.assertEqual(cli.positive_int("12"), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
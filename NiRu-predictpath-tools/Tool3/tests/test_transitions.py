@@ -0,0 +1,123 @@
+import unittest
+from datetime import datetime, timezone
+from src.domain import CurrentState
+from src.knowledge_base import TRANSITION_MATRIX, TIME_PRIORS
+from src.predictor import TrajectoryEngine
+from src.transitions import MIN_PATH_PROBABILITY, CompiledTransitions
+
+
+def legacy_bfs(start, host_scope, observed, max_depth):
+    """The original per-session traversal over TRANSITION_MATRIX, kept as the reference."""
+    scenarios = []
+    queue = [(start, [], 1.0, 0.0, 0.0)]
+    visited_paths = set()
+    while queue:
+        curr, path, prob, t_min, t_max = queue.pop(0)
+        if path:
+            scenarios.append((tuple(path), round(prob, 3), int(t_min), int(t_max)))
+        if len(path) >= max_depth:
+            continue
+        for next_tech, trans_prob in TRANSITION_MATRIX.get(curr, []):
+            modifier = 1.0
+            if next_tech == "T1021":
+                modifier = 0.0 if len(host_scope) < 2 else 1.2
+            if next_tech == "T1041":
+                if "T1560" in observed:
+                    modifier = 1.5
+                elif "T1560" not in path:
+                    modifier = 0.5
+            new_prob = prob * trans_prob * modifier
+            if new_prob < 0.1:
+                continue
+            dwell = TIME_PRIORS.get(next_tech, (0, 3600))
+            new_path = path + [next_tech]
+            if "-".join(new_path) not in visited_paths:
+                visited_paths.add("-".join(new_path))
+                queue.append((next_tech, new_path, new_prob, t_min + dwell[0], t_max + dwell[1]))
+    scenarios.sort(key=lambda s: s[1], reverse=True)
+    return scenarios[:5]
+
+
+def state(observed, hosts):
+    return CurrentState(observed_techniques=observed, last_seen_timestamp=datetime.now(timezone.utc),
+                        graph_depth=len(observed), host_scope=hosts)
+
+
+def rounded(forecasts):
+    return [(seq, round(prob, 3), int(t_min), int(t_max)) for seq, prob, t_min, t_max in forecasts]
+
+
+class TestCompiledTransitions(unittest.TestCase):
+    def setUp(self):
+        self.transitions = CompiledTransitions()
+
+    def paths(self, start, multi_host=False, staged=False, max_depth=3, limit=100):
+        return {seq: prob for seq, prob, _, _ in self.transitions.traverse(start, multi_host, staged, max_depth, limit)}
+
+    def test_lateral_movement_needs_two_hosts(self):
+        single = self.paths("T1078", multi_host=False)
+        self.assertFalse(any("T1021" in seq for seq in single))
+
+        multi = self.paths("T1078", multi_host=True)
+        self.assertAlmostEqual(multi[("T1021",)], 0.20 * 1.2)
+        self.assertAlmostEqual(multi[("T1046", "T1021")], 0.40 * 0.60 * 1.2)
+
+    def test_exfiltration_damped_unless_staged(self):
+        self.assertAlmostEqual(self.paths("T1560", staged=False)[("T1041",)], 0.25 * 0.5)
+        self.assertAlmostEqual(self.paths("T1560", staged=True)[("T1041",)], 0.25 * 1.5)
+
+        # Staging earlier on the path lifts the damping
+        staged_path = self.paths("T1021", multi_host=True)
+        self.assertAlmostEqual(staged_path[("T1560", "T1041")], 0.40 * 0.25)
+
+    def test_weak_paths_are_pruned(self):
+        paths = self.transitions.traverse("T1078", True, False, max_depth=5, limit=1000)
+        self.assertTrue(paths)
+        self.assertTrue(all(prob >= MIN_PATH_PROBABILITY for _, prob, _, _ in paths))
+        # T1078 -> T1059 is 0.05 and never expanded
+        self.assertFalse(any(seq[0] == "T1059" for seq, _, _, _ in paths))
+
+    def test_dwell_windows_accumulate(self):
+        windows = {seq: (t_min, t_max) for seq, _, t_min, t_max in self.transitions.traverse("T1078", True, False, 2)}
+        self.assertEqual(windows[("T1046",)], (30, 900))
+        self.assertEqual(windows[("T1046", "T1021")], (30 + 300, 900 + 7200))
+
+    def test_unknown_start_has_no_forecast(self):
+        self.assertEqual(self.transitions.traverse("T9999", True, True, max_depth=3), [])
+
+    def test_matches_legacy_bfs(self):
+        for start in self.transitions.techniques + ["T9999"]:
+            for hosts in (["h1"], ["h1", "h2"]):
+                for observed in (["T1078"], ["T1560", start]):
+                    for depth in (1, 2, 3, 4):
+                        expected = legacy_bfs(start, hosts, observed, depth)
+                        got = self.transitions.traverse(start, len(hosts) >= 2, "T1560" in observed, depth)
+                        self.assertEqual(rounded(got), expected, (start, hosts, observed, depth))
+
+
+class TestForecastMemoization(unittest.TestCase):
+    def test_sessions_sharing_a_context_reuse_one_traversal(self):
+        engine = TrajectoryEngine()
+        first = engine.forecast("T1046", state(["T1078", "T1046"], ["h1", "h2"]), max_depth=3)
+        second = engine.forecast("T1046", state(["T1110", "T1046"], ["h3", "h4", "h5"]), max_depth=3)
+        self.assertIs(first, second)
+
+        single_host = engine.forecast("T1046", state(["T1078", "T1046"], ["h1"]), max_depth=3)
+        self.assertIsNot(single_host, first)
+        self.assertEqual(len(engine._forecasts), 2)
+
+    def test_predictions_match_legacy_bfs(self):
+        engine = TrajectoryEngine()
+        for observed in (["T1078"], ["T1110", "T1078"], ["T1078", "T1046"], ["T1110", "T1078", "T1046"]):
+            for hosts in (["h1"], ["h1", "h2", "h3"]):
+                summary = engine.predict("s", state(observed, hosts), current_risk=0.0)
+                got = [
+                    (tuple(s.sequence), s.probability, s.reaction_time_window.min_seconds, s.reaction_time_window.max_seconds)
+                    for s in summary.predicted_scenarios
+                ]
+                expected = legacy_bfs(observed[-1], hosts, observed, 3) if summary.suppression_reason is None else []
+                self.assertEqual(got, expected, (observed, hosts))
+
+
+if __name__ == '__main__':
+    unittest.main()